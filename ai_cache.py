@@ -0,0 +1,128 @@
+"""
+Persistent response cache for Gemini calls
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlite_cache import DEFAULT_CACHE_DIR, evict_lru
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so cosmetic prompt differences share an entry"""
+    return ' '.join(prompt.split())
+
+
+class ResponseCache:
+    """Content-addressed SQLite cache keyed by model name + normalized prompt.
+
+    Entries expire after ``ttl_seconds``; once the stored responses exceed
+    ``max_bytes`` the least recently used ones are evicted. The database is
+    shared by every session and process pointing at the same directory. A
+    cache that cannot be opened (e.g. read-only disk) simply misses.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl_seconds: int = 30 * 24 * 3600,
+                 max_bytes: int = 50 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(cache_dir, 'gemini_responses.db'),
+                                         timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        except (OSError, sqlite3.Error):
+            self._conn = None
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{normalize_prompt(prompt)}".encode('utf-8')).hexdigest()
+
+    def get(self, model_name: str, prompt: str) -> Optional[str]:
+        if self._conn is None:
+            return None
+        key = self.make_key(model_name, prompt)
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                return row[0]
+        except sqlite3.Error:
+            return None
+
+    def put(self, model_name: str, prompt: str, response: str):
+        if self._conn is None:
+            return
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.make_key(model_name, prompt), model_name, response, size, now, now)
+                )
+                self._evict(now)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        evict_lru(self._conn, self.max_bytes)
+
+    def invalidate(self, model_name: str, prompt: str):
+        if self._conn is None:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (self.make_key(model_name, prompt),))
+        except sqlite3.Error:
+            pass
+
+    def get_or_generate(self, model_name: str, prompt: str, generate: Callable[[str], str],
+                        validate: Optional[Callable[[str], object]] = None) -> str:
+        """Cached response for ``prompt``, generating (and caching) it on a miss.
+
+        With ``validate``, only responses it accepts (returns without
+        raising) are cached; a cached response it rejects is dropped and
+        regenerated, and a fresh one it rejects raises.
+        """
+        cached = self.get(model_name, prompt)
+        if cached is not None:
+            if validate is None:
+                return cached
+            try:
+                validate(cached)
+                return cached
+            except Exception:
+                self.invalidate(model_name, prompt)
+        response = generate(prompt)
+        if validate is not None:
+            validate(response)
+        self.put(model_name, prompt, response)
+        return response
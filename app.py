@@ -1,11 +1,22 @@
 import streamlit as st
-import pandas as pd
 import json
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict
+from datetime import date, datetime, timedelta
+from dataclasses import dataclass, asdict, replace
+from typing import List, Optional, Dict, Tuple
 import google.generativeai as genai
 import os
+import uuid
+
+from ai_cache import ResponseCache
+from change_feed import ChangeFeed, FeedSubscriber
+from compact_book import compact_record
+from library_index import LibraryStats
+from library_loader import LoadReport, stream_books
+from library_storage import create_storage, new_book_id
+from overdue_report import due_soon_items, overdue_items, to_csv
+from recommendations import SimilarBooksTable, SimilarityModel, similar_table_file
+from shared_catalogue import BaseCatalogue, CatalogueOverlay
+from summary_batch import BatchSummarizer
 
 # Configure page
 st.set_page_config(
@@ -14,6 +25,7 @@ st.set_page_config(
     layout="wide"
 )
 
+@compact_record
 @dataclass
 class Book:
     id: str
@@ -25,7 +37,7 @@ class Book:
     tags: List[str]
     is_borrowed: bool = False
     borrower_name: str = ""
-    due_date: Optional[str] = None
+    due_date: Optional[date] = None
     summary: str = ""
 
 @dataclass
@@ -33,19 +45,39 @@ class LibraryData:
     books: List[Book]
     borrowing_history: List[Dict]
 
+@st.cache_resource(show_spinner=False)
+def load_shared_catalogue(data_file: str) -> Tuple[ChangeFeed, SimilarBooksTable]:
+    """Sample books plus stored history, built once per process, with the feed
+    of changes sessions commit on top of them and the recommendation table"""
+    report = LoadReport()
+    history = []
+    try:
+        for _, entries in stream_books(create_storage(data_file), Book, report):
+            history.extend(entries)
+    except OSError:
+        # This is expected on Streamlit Cloud - we already have sample books
+        pass
+    base = BaseCatalogue(LibraryManager.create_sample_books(), history, report)
+    recommender = SimilarityModel()
+    recommender.rebuild(base.books)
+    similar_books = SimilarBooksTable(recommender, similar_table_file(data_file))
+    similar_books.load()
+    feed = ChangeFeed(base)
+    similar_books.follow(feed)
+    return feed, similar_books
+
 class LibraryManager:
     def __init__(self):
         self.data_file = "library_data.json"
-        # Initialize with sample books if running on Streamlit Cloud
-        if 'library_books' not in st.session_state:
-            st.session_state.library_books = self.create_sample_books()
-        if 'borrowing_history' not in st.session_state:
-            st.session_state.borrowing_history = []
-        
-        # Try to load from file if it exists (for local development)
-        self.load_data()
+        self.storage = create_storage(self.data_file)
+        self.feed, self.similar_books = load_shared_catalogue(self.data_file)
+        self.load_report = self.feed.base.load_report
+        # Books and indexes are shared by every session; this session's view
+        # of the changes made since they were loaded is kept in its overlay
+        self.subscriber = FeedSubscriber(self.feed, uuid.uuid4().hex)
     
-    def create_sample_books(self):
+    @staticmethod
+    def create_sample_books():
         """Create sample books for Streamlit Cloud"""
         return [
             Book("0001", "To Kill a Mockingbird", "Harper Lee", "Fiction", 1960, "978-0-06-112008-4", 
@@ -58,7 +90,7 @@ class LibraryManager:
             
             Book("0003", "Pride and Prejudice", "Jane Austen", "Romance", 1813, "978-0-14-143951-8", 
                  ["classic", "romance", "regency"], is_borrowed=True, borrower_name="Alice Johnson",
-                 due_date=(datetime.now() + timedelta(days=5)).strftime("%Y-%m-%d"),
+                 due_date=(datetime.now() + timedelta(days=5)).date(),
                  summary="The timeless story of Elizabeth Bennet and Mr. Darcy's complex courtship."),
             
             Book("0004", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 1925, "978-0-7432-7356-5", 
@@ -75,7 +107,7 @@ class LibraryManager:
             
             Book("0007", "The Hitchhiker's Guide to the Galaxy", "Douglas Adams", "Sci-Fi", 1979, "978-0-345-39180-3", 
                  ["humor", "space", "adventure"], is_borrowed=True, borrower_name="Bob Smith",
-                 due_date=(datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d"),
+                 due_date=(datetime.now() + timedelta(days=10)).date(),
                  summary="A hilarious journey through space with Arthur Dent and his alien friend Ford Prefect."),
             
             Book("0008", "The Murder of Roger Ackroyd", "Agatha Christie", "Mystery", 1926, "978-0-06-207350-4", 
@@ -108,7 +140,7 @@ class LibraryManager:
             
             Book("0015", "Where the Crawdads Sing", "Delia Owens", "Fiction", 2018, "978-0-7352-1909-0", 
                  ["nature", "mystery", "coming-of-age"], is_borrowed=True, borrower_name="Carol Davis",
-                 due_date=(datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d"),  # Overdue
+                 due_date=(datetime.now() - timedelta(days=2)).date(),  # Overdue
                  summary="Kya the 'Marsh Girl' grows up isolated in North Carolina's coastal marshes."),
             
             Book("0016", "The Silent Patient", "Alex Michaelides", "Mystery", 2019, "978-1-250-30170-7", 
@@ -132,91 +164,131 @@ class LibraryManager:
                  summary="From the perspective of an artificial friend, exploring what it means to be human.")
         ]
         
-    def load_data(self):
-        try:
-            with open(self.data_file, 'r') as f:
-                data_dict = json.load(f)
-                books_data = data_dict.get('books', [])
-                # Only load from file if session state is empty
-                if not st.session_state.library_books:
-                    st.session_state.library_books = [Book(**book) for book in books_data]
-                if not st.session_state.borrowing_history:
-                    st.session_state.borrowing_history = data_dict.get('borrowing_history', [])
-        except FileNotFoundError:
-            # This is expected on Streamlit Cloud - we already have sample books
-            pass
-            
+    def sync(self):
+        """Apply the books other sessions changed since this session's last run"""
+        self.subscriber.sync()
+        self.similar_books.sync()
+    
+    @property
+    def catalogue(self) -> CatalogueOverlay:
+        return self.subscriber.catalogue
+    
+    @property
+    def index(self) -> CatalogueOverlay:
+        return self.subscriber.catalogue
+    
+    @property
+    def catalogue_frame(self):
+        return self.subscriber.catalogue.frame
+    
     @property
     def books(self):
-        return st.session_state.library_books
+        return self.catalogue.books
     
     @property 
     def borrowing_history(self):
-        return st.session_state.borrowing_history
+        return self.catalogue.borrowing_history
     
     def save_data(self):
         # For Streamlit Cloud, data persists in session state
         # For local development, save to file
         try:
-            data = {
-                'books': [asdict(book) for book in self.books],
-                'borrowing_history': self.borrowing_history
-            }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.storage.save_all([asdict(book) for book in self.books], list(self.borrowing_history))
         except:
             pass  # Skip file saving on Streamlit Cloud
     
-    def add_book(self, book: Book):
-        st.session_state.library_books.append(book)
-        self.save_data()
+    def _commit(self, book_id: str, book: Optional[Book] = None, entry: Optional[Dict] = None):
+        """Apply a change here, then persist it and share it with the other sessions"""
+        try:
+            self.subscriber.commit(self.storage, book_id, book, entry)
+        except:
+            pass  # Skip file saving on Streamlit Cloud; the change stays in this session
+        self.similar_books.sync()
+    
+    def get_book(self, book_id: str) -> Optional[Book]:
+        return self.catalogue.get(book_id)
+    
+    def search_books(self, query: str) -> List[Book]:
+        """Ranked full-text search; an empty query returns the whole catalogue"""
+        if not query.strip():
+            return self.books
+        return [self.catalogue.get(book_id) for book_id in self.catalogue.search(query)]
+    
+    def fuzzy_search_books(self, query: str, limit: int = 20) -> List[Book]:
+        """Typo-tolerant title/author search, most similar first"""
+        return [self.catalogue.get(book_id) for book_id, _ in self.catalogue.fuzzy_search(query, limit)]
+    
+    def get_stats(self) -> LibraryStats:
+        """Total/borrowed/available/overdue counts and genre distribution from the index"""
+        return self.catalogue.stats(today=datetime.now().date())
+    
+    def get_similar_books(self, book: Book, k: int = 3) -> List[Book]:
+        """Books most similar by genre, tags, author and decade"""
+        # The shared table follows every committed change; changes kept in
+        # this session only are skipped or fall back to catalogue order
+        recommendations = [self.catalogue.get(book_id) for book_id, _ in self.similar_books.get(book.id, k)]
+        recommendations = [rec for rec in recommendations if rec is not None]
+        
+        # Fill remaining slots in catalogue order, as before
+        if len(recommendations) < k:
+            chosen = {book.id} | {rec.id for rec in recommendations}
+            for other in self.books:
+                if len(recommendations) >= k:
+                    break
+                if other.id not in chosen:
+                    recommendations.append(other)
+        return recommendations
+    
+    def add_book(self, book: Book) -> bool:
+        """Add ``book``; False (nothing added) if its id is taken"""
+        if book.id in self.catalogue:
+            return False
+        self._commit(book.id, book)
+        return True
     
     def update_book(self, book_id: str, updated_book: Book):
-        for i, book in enumerate(st.session_state.library_books):
-            if book.id == book_id:
-                st.session_state.library_books[i] = updated_book
-                break
-        self.save_data()
+        if book_id not in self.catalogue:
+            return
+        self._commit(book_id, updated_book)
     
     def delete_book(self, book_id: str):
-        st.session_state.library_books = [book for book in st.session_state.library_books if book.id != book_id]
-        self.save_data()
+        if book_id not in self.catalogue:
+            return
+        self._commit(book_id)
     
     def check_out_book(self, book_id: str, borrower_name: str, days: int = 14):
-        for book in st.session_state.library_books:
-            if book.id == book_id:
-                book.is_borrowed = True
-                book.borrower_name = borrower_name
-                book.due_date = (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
-                
-                st.session_state.borrowing_history.append({
-                    'book_id': book_id,
-                    'book_title': book.title,
-                    'borrower_name': borrower_name,
-                    'checkout_date': datetime.now().strftime("%Y-%m-%d"),
-                    'due_date': book.due_date,
-                    'action': 'checkout'
-                })
-                break
-        self.save_data()
+        book = self.catalogue.get(book_id)
+        if not book:
+            return
+        # Copy on write: the stored book may be shared with other sessions
+        book = replace(book, is_borrowed=True, borrower_name=borrower_name,
+                       due_date=(datetime.now() + timedelta(days=days)).date())
+        
+        entry = {
+            'book_id': book_id,
+            'book_title': book.title,
+            'borrower_name': borrower_name,
+            'checkout_date': datetime.now().date(),
+            'due_date': book.due_date,
+            'action': 'checkout'
+        }
+        self._commit(book_id, book, entry)
     
     def check_in_book(self, book_id: str):
-        for book in st.session_state.library_books:
-            if book.id == book_id:
-                book.is_borrowed = False
-                borrower_name = book.borrower_name
-                book.borrower_name = ""
-                book.due_date = None
-                
-                st.session_state.borrowing_history.append({
-                    'book_id': book_id,
-                    'book_title': book.title,
-                    'borrower_name': borrower_name,
-                    'return_date': datetime.now().strftime("%Y-%m-%d"),
-                    'action': 'checkin'
-                })
-                break
-        self.save_data()
+        book = self.catalogue.get(book_id)
+        if not book:
+            return
+        borrower_name = book.borrower_name
+        book = replace(book, is_borrowed=False, borrower_name="", due_date=None)
+        
+        entry = {
+            'book_id': book_id,
+            'book_title': book.title,
+            'borrower_name': borrower_name,
+            'return_date': datetime.now().date(),
+            'action': 'checkin'
+        }
+        self._commit(book_id, book, entry)
 
 class AIAssistant:
     def __init__(self):
@@ -229,7 +301,15 @@ class AIAssistant:
             st.warning("Please set GOOGLE_API_KEY in secrets or environment variables")
             return
             
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.model_name = 'gemini-2.0-flash-exp'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.cache = ResponseCache()
+    
+    def _generate(self, prompt: str, validate=None) -> str:
+        """Call Gemini, serving repeated prompts from the on-disk cache"""
+        return self.cache.get_or_generate(
+            self.model_name, prompt, lambda p: self.model.generate_content(p).text.strip(), validate
+        )
     
     def generate_book_summary(self, title: str, author: str, genre: str, year: int = None) -> str:
         try:
@@ -243,11 +323,16 @@ Focus on:
 
 Keep it engaging and informative for library users deciding whether to read it."""
             
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return self._generate(prompt)
         except Exception as e:
             return f"Could not generate summary: {str(e)}"
     
+    def summarize_in_batches(self, books: List[Book], batch_size: int = 20, max_workers: int = 4,
+                             requests_per_minute: int = 30):
+        """Yield ``(batch, {book_id: summary}, error)`` as concurrent batch requests finish"""
+        summarizer = BatchSummarizer(self._generate, batch_size, max_workers, requests_per_minute)
+        return summarizer.run(books)
+    
     def get_reading_recommendations(self, books: List[Book], current_book: Book) -> List[str]:
         try:
             # Filter out the current book and create a comprehensive list
@@ -282,41 +367,11 @@ Explanation here.
 **Book Title** by Author Name
 Explanation here."""
             
-            response = self.model.generate_content(prompt)
-            return [line.strip() for line in response.text.strip().split('\n') if line.strip()]
+            response = self._generate(prompt)
+            return [line.strip() for line in response.split('\n') if line.strip()]
         except Exception as e:
             return [f"Could not generate recommendations: {str(e)}"]
     
-    def get_simple_recommendations(self, books: List[Book], current_book: Book) -> List[Book]:
-        """Get simple rule-based recommendations without AI"""
-        other_books = [book for book in books if book.id != current_book.id]
-        recommendations = []
-        
-        # 1. Same genre books
-        genre_matches = [book for book in other_books if book.genre == current_book.genre]
-        recommendations.extend(genre_matches[:2])
-        
-        # 2. Books with similar tags
-        if current_book.tags and len(recommendations) < 3:
-            tag_matches = []
-            for book in other_books:
-                if book not in recommendations and book.tags:
-                    common_tags = set(current_book.tags) & set(book.tags)
-                    if common_tags:
-                        tag_matches.append((book, len(common_tags)))
-            
-            # Sort by number of common tags
-            tag_matches.sort(key=lambda x: x[1], reverse=True)
-            for book, _ in tag_matches[:3-len(recommendations)]:
-                recommendations.append(book)
-        
-        # 3. Fill remaining with popular books (by author similarity or random)
-        if len(recommendations) < 3:
-            remaining = [book for book in other_books if book not in recommendations]
-            recommendations.extend(remaining[:3-len(recommendations)])
-        
-        return recommendations[:3]
-    
     def get_library_insights(self, books: List[Book]) -> str:
         try:
             genre_counts = {}
@@ -332,8 +387,7 @@ Explanation here."""
 
 Focus on trends, popular genres, or recommendations for collection development."""
             
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return self._generate(prompt)
         except Exception as e:
             return f"Could not generate insights: {str(e)}"
 
@@ -350,6 +404,11 @@ def main():
     
     library_manager = st.session_state.library_manager
     ai_assistant = st.session_state.ai_assistant
+    library_manager.sync()
+    
+    if library_manager.load_report.errors:
+        with st.expander(f"⚠️ Skipped {len(library_manager.load_report.errors)} invalid records in library data"):
+            st.text(library_manager.load_report.summary())
     
     # Show initialization success
     if len(library_manager.books) > 0:
@@ -388,7 +447,7 @@ def main():
                 submitted = st.form_submit_button("Add Book")
                 
                 if submitted and title and author and genre:
-                    book_id = f"{len(library_manager.books) + 1:04d}"
+                    book_id = new_book_id()
                     tags_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
                     
                     summary = ""
@@ -407,9 +466,11 @@ def main():
                         summary=summary
                     )
                     
-                    library_manager.add_book(new_book)
-                    st.success(f"Added '{title}' to the library!")
-                    st.rerun()
+                    if library_manager.add_book(new_book):
+                        st.success(f"Added '{title}' to the library!")
+                        st.rerun()
+                    else:
+                        st.error(f"A book with id {book_id} already exists")
         
         # Display books
         st.subheader("Current Collection")
@@ -444,7 +505,7 @@ def main():
                         st.write(f"**📚 Books similar to '{book.title}':**")
                         
                         # Get recommendations (simple first, then AI if available)
-                        recommendations = ai_assistant.get_simple_recommendations(library_manager.books, book)
+                        recommendations = library_manager.get_similar_books(book)
                         
                         if recommendations:
                             for i, rec_book in enumerate(recommendations):
@@ -544,8 +605,8 @@ def main():
     elif page == "🔄 Check-In/Out":
         st.header("Check-In / Check-Out")
         
-        available_books = [book for book in library_manager.books if not book.is_borrowed]
-        borrowed_books = [book for book in library_manager.books if book.is_borrowed]
+        available_books = library_manager.index.filter("Available")
+        borrowed_books = library_manager.index.filter("Borrowed")
         
         col1, col2 = st.columns(2)
         
@@ -583,17 +644,22 @@ def main():
         # Show overdue books
         if borrowed_books:
             st.subheader("⚠️ Status Overview")
-            overdue_books = []
-            for book in borrowed_books:
-                if book.due_date and datetime.strptime(book.due_date, "%Y-%m-%d") < datetime.now():
-                    overdue_books.append(book)
-            
-            if overdue_books:
-                st.error(f"**{len(overdue_books)} Overdue Books:**")
-                for book in overdue_books:
-                    st.write(f"- {book.title} (Due: {book.due_date}, Borrower: {book.borrower_name})")
+            overdue = overdue_items(library_manager.index)
+            
+            if overdue:
+                st.error(f"**{len(overdue)} Overdue Books:**")
+                for item in overdue:
+                    st.write(f"- {item.title} (Due: {item.due_date}, Borrower: {item.borrower_name})")
+                st.download_button("📄 Download overdue report", to_csv(overdue),
+                                   file_name=f"overdue_{datetime.now().strftime('%Y-%m-%d')}.csv", mime="text/csv")
             else:
                 st.success("All borrowed books are current")
+            
+            due_soon = due_soon_items(library_manager.index, days=3)
+            if due_soon:
+                st.warning(f"**{len(due_soon)} due in the next 3 days:**")
+                for item in due_soon:
+                    st.write(f"- {item.title} (Due: {item.due_date}, Borrower: {item.borrower_name})")
     
     elif page == "🔍 Search & Browse":
         st.header("Search & Browse")
@@ -606,16 +672,12 @@ def main():
             search_filter = st.selectbox("Filter by", ["All", "Available", "Borrowed"])
         
         # Filter books based on search
-        filtered_books = library_manager.books
+        filtered_books = library_manager.search_books(search_query)
         
-        if search_query:
-            filtered_books = [
-                book for book in filtered_books
-                if (search_query.lower() in book.title.lower() or
-                    search_query.lower() in book.author.lower() or
-                    search_query.lower() in book.genre.lower() or
-                    any(search_query.lower() in tag.lower() for tag in book.tags))
-            ]
+        if search_query and not filtered_books:
+            filtered_books = library_manager.fuzzy_search_books(search_query)
+            if filtered_books:
+                st.info(f"No exact matches for '{search_query}' - showing similar titles and authors")
         
         if search_filter == "Available":
             filtered_books = [book for book in filtered_books if not book.is_borrowed]
@@ -623,7 +685,7 @@ def main():
             filtered_books = [book for book in filtered_books if book.is_borrowed]
         
         # Genre filter
-        genres = list(set(book.genre for book in library_manager.books))
+        genres = library_manager.index.genres()
         selected_genres = st.multiselect("Filter by genres", genres)
         if selected_genres:
             filtered_books = [book for book in filtered_books if book.genre in selected_genres]
@@ -652,7 +714,7 @@ def main():
                     st.write("---")
                     st.write(f"**📚 Books similar to '{book.title}':**")
                     
-                    recommendations = ai_assistant.get_simple_recommendations(library_manager.books, book)
+                    recommendations = library_manager.get_similar_books(book)
                     
                     if recommendations:
                         for rec_book in recommendations:
@@ -696,11 +758,43 @@ def main():
                             summary = ai_assistant.generate_book_summary(
                                 selected_book.title, selected_book.author, selected_book.genre, selected_book.year
                             )
-                            selected_book.summary = summary
-                            library_manager.update_book(selected_book.id, selected_book)
+                            library_manager.update_book(selected_book.id, replace(selected_book, summary=summary))
                             st.success("Summary generated and saved!")
                             st.write(summary)
                             st.rerun()
+                    
+                    st.write("---")
+                    st.write(f"**Summarize all {len(books_without_summary)} books without a summary**")
+                    batch_col1, batch_col2, batch_col3 = st.columns(3)
+                    with batch_col1:
+                        batch_size = st.number_input("Books per request", min_value=1, max_value=50, value=20)
+                    with batch_col2:
+                        max_workers = st.number_input("Concurrent requests", min_value=1, max_value=16, value=4)
+                    with batch_col3:
+                        requests_per_minute = st.number_input("Requests per minute", min_value=1, max_value=600, value=30)
+                    
+                    if st.button("🤖 Summarize All Missing"):
+                        progress = st.progress(0.0, text="Starting batch summarization...")
+                        done = failed = 0
+                        batches = ai_assistant.summarize_in_batches(
+                            books_without_summary, batch_size, max_workers, requests_per_minute
+                        )
+                        for batch, summaries, error in batches:
+                            # Save each batch as soon as it lands so an interruption loses nothing
+                            for book in batch:
+                                if book.id in summaries:
+                                    library_manager.update_book(book.id, replace(book, summary=summaries[book.id]))
+                            done += len(summaries)
+                            failed += len(batch) - len(summaries)
+                            progress.progress(
+                                (done + failed) / len(books_without_summary),
+                                text=f"Summarized {done} of {len(books_without_summary)} books"
+                            )
+                        
+                        if failed:
+                            st.warning(f"Generated {done} summaries; {failed} failed and can be retried")
+                        else:
+                            st.success(f"Generated {done} summaries!")
                 else:
                     st.info("All books already have summaries!")
             else:
@@ -738,37 +832,44 @@ def main():
         st.header("Library Analytics")
         
         if library_manager.books:
+            stats = library_manager.get_stats()
+            
             # Basic stats
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("Total Books", len(library_manager.books))
+                st.metric("Total Books", stats.total)
             with col2:
-                borrowed_count = sum(1 for book in library_manager.books if book.is_borrowed)
-                st.metric("Currently Borrowed", borrowed_count)
+                st.metric("Currently Borrowed", stats.borrowed)
             with col3:
-                available_count = len(library_manager.books) - borrowed_count
-                st.metric("Available", available_count)
+                st.metric("Available", stats.available)
             with col4:
-                overdue_count = sum(1 for book in library_manager.books 
-                                   if book.is_borrowed and book.due_date and 
-                                   datetime.strptime(book.due_date, "%Y-%m-%d") < datetime.now())
-                st.metric("Overdue", overdue_count)
+                st.metric("Overdue", stats.overdue)
             
-            # Genre distribution
-            st.subheader("📈 Genre Distribution")
-            genre_counts = {}
-            for book in library_manager.books:
-                genre_counts[book.genre] = genre_counts.get(book.genre, 0) + 1
+            # Distributions from the columnar catalogue view
+            frame = library_manager.catalogue_frame
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("📈 Genre Distribution")
+                st.bar_chart(frame.genre_distribution())
+            with col2:
+                st.subheader("🗓️ Books by Decade")
+                st.bar_chart(frame.decade_histogram())
             
-            if genre_counts:
-                genre_df = pd.DataFrame(list(genre_counts.items()), columns=['Genre', 'Count'])
-                st.bar_chart(genre_df.set_index('Genre'))
+            loans_per_month = frame.loans_per_month()
+            if not loans_per_month.empty:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.subheader("📤 Loans per Month")
+                    st.bar_chart(loans_per_month)
+                with col2:
+                    st.subheader("🏆 Top Borrowers")
+                    st.bar_chart(frame.top_borrowers())
             
             # Recent activity
             st.subheader("📅 Recent Activity")
             if library_manager.borrowing_history:
                 recent_history = sorted(library_manager.borrowing_history, 
-                                      key=lambda x: x.get('checkout_date', x.get('return_date', '')), 
+                                      key=lambda x: x.get('checkout_date') or x.get('return_date') or date.min, 
                                       reverse=True)[:10]
                 
                 for activity in recent_history:
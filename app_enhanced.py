@@ -1,14 +1,28 @@
 import streamlit as st
-import pandas as pd
 import json
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict
+from datetime import date, datetime, timedelta
+from dataclasses import dataclass, asdict, replace
+from typing import Callable, List, Optional, Dict, Tuple
 import google.generativeai as genai
 import os
 import base64
+import uuid
 from io import BytesIO
 
+from ai_cache import ResponseCache
+from change_feed import ChangeFeed, FeedSubscriber
+from compact_book import compact_record
+from library_index import LibraryStats
+from library_storage import create_storage, new_book_id
+from shared_catalogue import BaseCatalogue, CatalogueOverlay
+
+# Book cards rendered per page on "My Books"
+PAGE_SIZES = [10, 20, 50, 100]
+DEFAULT_PAGE_SIZE = 20
+
+# How often an idle page checks for changes committed by other sessions
+LIVE_UPDATE_SECONDS = 5
+
 # Configure page with custom styling
 st.set_page_config(
     page_title="📚 BookNest - AI Library Manager",
@@ -444,6 +458,7 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@compact_record
 @dataclass
 class Book:
     id: str
@@ -455,7 +470,7 @@ class Book:
     tags: List[str]
     is_borrowed: bool = False
     borrower_name: str = ""
-    due_date: Optional[str] = None
+    due_date: Optional[date] = None
     summary: str = ""
 
 @dataclass
@@ -463,80 +478,156 @@ class LibraryData:
     books: List[Book]
     borrowing_history: List[Dict]
 
+@st.cache_resource(show_spinner=False)
+def load_change_feed(data_file: str) -> ChangeFeed:
+    """The stored catalogue, loaded and indexed once per process, and the
+    feed of changes sessions have committed on top of it"""
+    return ChangeFeed(BaseCatalogue.load(create_storage(data_file), Book))
+
 class LibraryManager:
     def __init__(self):
         self.data_file = "library_data.json"
+        self.storage = create_storage(self.data_file)
+        # Bumped on every mutation of a book; keys the rendered card cache
+        self.revisions: Dict[str, int] = {}
+        self.card_cache: Dict[str, Tuple[Tuple, str]] = {}
         self.load_data()
-        
+    
     def load_data(self):
-        try:
-            with open(self.data_file, 'r') as f:
-                data_dict = json.load(f)
-                books_data = data_dict.get('books', [])
-                self.books = [Book(**book) for book in books_data]
-                self.borrowing_history = data_dict.get('borrowing_history', [])
-        except FileNotFoundError:
-            self.books = []
-            self.borrowing_history = []
-            
-    def save_data(self):
-        data = {
-            'books': [asdict(book) for book in self.books],
-            'borrowing_history': self.borrowing_history
-        }
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Attach to the shared catalogue, caught up with every committed change"""
+        self.feed = load_change_feed(self.data_file)
+        self.load_report = self.feed.base.load_report
+        # Books and indexes are shared by every session; this session's view
+        # of the changes made since they were loaded is kept in its overlay
+        self.subscriber = FeedSubscriber(self.feed, uuid.uuid4().hex)
+        self.revisions.clear()
+        self.card_cache.clear()
+    
+    def sync(self):
+        """Apply the books other sessions changed since this session's last run"""
+        changed = self.subscriber.sync()
+        if changed is None:
+            # Moved to a rebased catalogue
+            self.revisions.clear()
+            self.card_cache.clear()
+            return
+        for book_id in changed:
+            self.revisions[book_id] = self.revisions.get(book_id, 0) + 1
+            self.card_cache.pop(book_id, None)
+    
+    def has_updates(self) -> bool:
+        """Whether other sessions committed changes this session has not applied"""
+        return self.feed.version != self.subscriber.version or self.feed.base is not self.catalogue.base
+    
+    @property
+    def catalogue(self) -> CatalogueOverlay:
+        return self.subscriber.catalogue
+    
+    @property
+    def index(self) -> CatalogueOverlay:
+        return self.subscriber.catalogue
     
-    def add_book(self, book: Book):
-        self.books.append(book)
-        self.save_data()
+    @property
+    def catalogue_frame(self):
+        return self.subscriber.catalogue.frame
+    
+    @property
+    def books(self):
+        return self.catalogue.books
+    
+    @property
+    def borrowing_history(self):
+        return self.catalogue.borrowing_history
+    
+    def save_data(self):
+        """Rewrite the full catalogue (mutations are persisted individually)"""
+        self.storage.save_all([asdict(book) for book in self.books], list(self.borrowing_history))
+    
+    def _commit(self, book_id: str, book: Optional[Book] = None, entry: Optional[Dict] = None):
+        """Apply a change here, persist it and publish it to the other sessions"""
+        if book is None:
+            self.revisions.pop(book_id, None)
+            self.card_cache.pop(book_id, None)
+        else:
+            self.revisions[book_id] = self.revisions.get(book_id, 0) + 1
+        self.subscriber.commit(self.storage, book_id, book, entry)
+    
+    def get_book(self, book_id: str) -> Optional[Book]:
+        return self.catalogue.get(book_id)
+    
+    def search_books(self, query: str) -> List[Book]:
+        """Ranked full-text search; an empty query returns the whole catalogue"""
+        if not query.strip():
+            return self.books
+        return [self.catalogue.get(book_id) for book_id in self.catalogue.search(query)]
+    
+    def fuzzy_search_books(self, query: str, limit: int = 20) -> List[Book]:
+        """Typo-tolerant title/author search, most similar first"""
+        return [self.catalogue.get(book_id) for book_id, _ in self.catalogue.fuzzy_search(query, limit)]
+    
+    def filter_books(self, status: str = "All", genre: str = "All") -> List[Book]:
+        """Filter by status and genre using the in-memory indexes"""
+        return self.catalogue.filter(status, genre, today=datetime.now().date())
+    
+    def get_stats(self) -> LibraryStats:
+        """Total/borrowed/available/overdue counts and genre distribution from the index"""
+        return self.catalogue.stats(today=datetime.now().date())
+    
+    def page_books(self, status: str = "All", genre: str = "All", after: int = -1,
+                   limit: int = 20) -> Tuple[List[Book], int]:
+        """One page of filtered books after catalogue position ``after``, plus the total match count"""
+        return self.catalogue.page(status, genre, datetime.now().date(), after, limit)
+    
+    def add_book(self, book: Book) -> bool:
+        """Add ``book``; False (nothing added) if its id is taken"""
+        if book.id in self.catalogue:
+            return False
+        self._commit(book.id, book)
+        return True
     
     def update_book(self, book_id: str, updated_book: Book):
-        for i, book in enumerate(self.books):
-            if book.id == book_id:
-                self.books[i] = updated_book
-                break
-        self.save_data()
+        if book_id not in self.catalogue:
+            return
+        self._commit(book_id, updated_book)
     
     def delete_book(self, book_id: str):
-        self.books = [book for book in self.books if book.id != book_id]
-        self.save_data()
+        if book_id not in self.catalogue:
+            return
+        self._commit(book_id)
     
     def check_out_book(self, book_id: str, borrower_name: str, days: int = 14):
-        for book in self.books:
-            if book.id == book_id:
-                book.is_borrowed = True
-                book.borrower_name = borrower_name
-                book.due_date = (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
-                
-                self.borrowing_history.append({
-                    'book_id': book_id,
-                    'book_title': book.title,
-                    'borrower_name': borrower_name,
-                    'checkout_date': datetime.now().strftime("%Y-%m-%d"),
-                    'due_date': book.due_date,
-                    'action': 'checkout'
-                })
-                break
-        self.save_data()
+        book = self.catalogue.get(book_id)
+        if not book:
+            return
+        # Copy on write: the stored book may be shared with other sessions
+        book = replace(book, is_borrowed=True, borrower_name=borrower_name,
+                       due_date=(datetime.now() + timedelta(days=days)).date())
+        
+        entry = {
+            'book_id': book_id,
+            'book_title': book.title,
+            'borrower_name': borrower_name,
+            'checkout_date': datetime.now().date(),
+            'due_date': book.due_date,
+            'action': 'checkout'
+        }
+        self._commit(book_id, book, entry)
     
     def check_in_book(self, book_id: str):
-        for book in self.books:
-            if book.id == book_id:
-                book.is_borrowed = False
-                borrower_name = book.borrower_name
-                book.borrower_name = ""
-                book.due_date = None
-                
-                self.borrowing_history.append({
-                    'book_id': book_id,
-                    'book_title': book.title,
-                    'borrower_name': borrower_name,
-                    'return_date': datetime.now().strftime("%Y-%m-%d"),
-                    'action': 'checkin'
-                })
-                break
-        self.save_data()
+        book = self.catalogue.get(book_id)
+        if not book:
+            return
+        borrower_name = book.borrower_name
+        book = replace(book, is_borrowed=False, borrower_name="", due_date=None)
+        
+        entry = {
+            'book_id': book_id,
+            'book_title': book.title,
+            'borrower_name': borrower_name,
+            'return_date': datetime.now().date(),
+            'action': 'checkin'
+        }
+        self._commit(book_id, book, entry)
 
 class AIAssistant:
     def __init__(self):
@@ -549,7 +640,15 @@ class AIAssistant:
             st.warning("Please set GOOGLE_API_KEY in secrets or environment variables")
             return
             
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.model_name = 'gemini-2.0-flash-exp'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.cache = ResponseCache()
+    
+    def _generate(self, prompt: str) -> str:
+        """Call Gemini, serving repeated prompts from the on-disk cache"""
+        return self.cache.get_or_generate(
+            self.model_name, prompt, lambda p: self.model.generate_content(p).text.strip()
+        )
     
     def generate_book_summary(self, title: str, author: str, genre: str, year: int = None) -> str:
         try:
@@ -563,8 +662,7 @@ Focus on:
 
 Keep it engaging and informative for library users deciding whether to read it."""
             
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return self._generate(prompt)
         except Exception as e:
             return f"Could not generate summary: {str(e)}"
     
@@ -602,8 +700,8 @@ Explanation here.
 **Book Title** by Author Name
 Explanation here."""
             
-            response = self.model.generate_content(prompt)
-            return [line.strip() for line in response.text.strip().split('\n') if line.strip()]
+            response = self._generate(prompt)
+            return [line.strip() for line in response.split('\n') if line.strip()]
         except Exception as e:
             return [f"Could not generate recommendations: {str(e)}"]
     
@@ -622,8 +720,7 @@ Explanation here."""
 
 Focus on trends, popular genres, or recommendations for collection development."""
             
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return self._generate(prompt)
         except Exception as e:
             return f"Could not generate insights: {str(e)}"
     
@@ -639,8 +736,7 @@ User question: {question}
 Provide a helpful, friendly response. If the question is about book recommendations, be specific. 
 If it's about library operations, be practical. Keep responses concise but informative."""
             
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return self._generate(prompt)
         except Exception as e:
             return f"Sorry, I'm having trouble connecting right now: {str(e)}"
 
@@ -661,13 +757,20 @@ def show_toast(message: str, toast_type: str = "success"):
     </script>
     """, unsafe_allow_html=True)
 
-def render_book_card(book: Book, library_manager: LibraryManager, show_actions: bool = True):
-    """Render a modern book card"""
+def book_card_html(book: Book, library_manager: LibraryManager) -> str:
+    """Card HTML for ``book``, rebuilt only after the book changes.
+    
+    Borrowed books are also keyed by today's date so they turn overdue
+    without a mutation.
+    """
+    today = datetime.now().date() if book.is_borrowed else None
+    key = (library_manager.revisions.get(book.id, 0), today)
+    cached = library_manager.card_cache.get(book.id)
+    if cached and cached[0] == key:
+        return cached[1]
     
     # Determine status
-    is_overdue = False
-    if book.is_borrowed and book.due_date:
-        is_overdue = datetime.strptime(book.due_date, "%Y-%m-%d") < datetime.now()
+    is_overdue = bool(book.is_borrowed and book.due_date and book.due_date <= today)
     
     status_class = "status-overdue" if is_overdue else ("status-borrowed" if book.is_borrowed else "status-available")
     status_text = "OVERDUE" if is_overdue else ("BORROWED" if book.is_borrowed else "AVAILABLE")
@@ -698,7 +801,12 @@ def render_book_card(book: Book, library_manager: LibraryManager, show_actions:
     </div>
     """
     
-    st.markdown(card_html, unsafe_allow_html=True)
+    library_manager.card_cache[book.id] = (key, card_html)
+    return card_html
+
+def render_book_card(book: Book, library_manager: LibraryManager, show_actions: bool = True):
+    """Render a modern book card"""
+    st.markdown(book_card_html(book, library_manager), unsafe_allow_html=True)
     
     if show_actions:
         col1, col2, col3, col4 = st.columns(4)
@@ -723,8 +831,7 @@ def render_book_card(book: Book, library_manager: LibraryManager, show_actions:
                         summary = st.session_state.ai_assistant.generate_book_summary(
                             book.title, book.author, book.genre, book.year
                         )
-                        book.summary = summary
-                        library_manager.update_book(book.id, book)
+                        library_manager.update_book(book.id, replace(book, summary=summary))
                         show_toast("Summary generated successfully!")
                         st.rerun()
         
@@ -757,31 +864,69 @@ def render_book_card(book: Book, library_manager: LibraryManager, show_actions:
                         st.session_state[f"checkout_modal_{book.id}"] = False
                         st.rerun()
 
+def render_book_pages(key: str, view: tuple, page_size: int, fetch: Callable[[int, int], Tuple[List[Book], int]],
+                      next_cursor: Callable[[int, List[Book]], int], library_manager: LibraryManager,
+                      show_actions: bool = True, note: str = ""):
+    """Render one page of books with Previous/Next controls.
+
+    ``fetch(cursor, limit)`` returns a page starting after ``cursor`` (-1 for
+    the first page) and the total match count; ``next_cursor`` gives the
+    cursor after a page. Only the visible page is rendered. Changing
+    ``view`` (the filters) starts over from the first page.
+    """
+    if st.session_state.get(f"{key}_view") != view:
+        st.session_state[f"{key}_view"] = view
+        st.session_state[f"{key}_cursors"] = [-1]
+    cursors = st.session_state[f"{key}_cursors"]
+    
+    page, total = fetch(cursors[-1], page_size)
+    if not page and len(cursors) > 1:
+        # The page emptied (e.g. its books were deleted); step back
+        cursors.pop()
+        page, total = fetch(cursors[-1], page_size)
+    
+    first = (len(cursors) - 1) * page_size
+    if page:
+        st.write(f"Showing {first + 1}-{first + len(page)} of {total} books{note}")
+    else:
+        st.write(f"Showing 0 of {total} books{note}")
+    
+    for book in page:
+        render_book_card(book, library_manager, show_actions=show_actions)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=len(cursors) == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<div style='text-align: center;'>Page {len(cursors)} of {max(1, -(-total // page_size))}</div>",
+                    unsafe_allow_html=True)
+    with col3:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=first + len(page) >= total, use_container_width=True):
+            cursors.append(next_cursor(cursors[-1], page))
+            st.rerun()
+
 def render_stats_dashboard(library_manager: LibraryManager):
     """Render statistics dashboard"""
-    books = library_manager.books
-    total_books = len(books)
-    borrowed_books = sum(1 for book in books if book.is_borrowed)
-    available_books = total_books - borrowed_books
-    overdue_books = sum(1 for book in books if book.is_borrowed and book.due_date and 
-                       datetime.strptime(book.due_date, "%Y-%m-%d") < datetime.now())
+    stats = library_manager.get_stats()
     
     stats_html = f"""
     <div class="stats-grid">
         <div class="stat-card">
-            <div class="stat-number">{total_books}</div>
+            <div class="stat-number">{stats.total}</div>
             <div class="stat-label">Total Books</div>
         </div>
         <div class="stat-card">
-            <div class="stat-number" style="color: #48BB78;">{available_books}</div>
+            <div class="stat-number" style="color: #48BB78;">{stats.available}</div>
             <div class="stat-label">Available</div>
         </div>
         <div class="stat-card">
-            <div class="stat-number" style="color: #ED8936;">{borrowed_books}</div>
+            <div class="stat-number" style="color: #ED8936;">{stats.borrowed}</div>
             <div class="stat-label">Borrowed</div>
         </div>
         <div class="stat-card">
-            <div class="stat-number" style="color: #E53E3E;">{overdue_books}</div>
+            <div class="stat-number" style="color: #E53E3E;">{stats.overdue}</div>
             <div class="stat-label">Overdue</div>
         </div>
     </div>
@@ -855,6 +1000,12 @@ def render_ai_chat():
                 else:
                     st.error("AI Assistant not available. Please check your API key.")
 
+@st.fragment(run_every=LIVE_UPDATE_SECONDS)
+def watch_for_changes(library_manager: LibraryManager):
+    """Rerun the page when another session commits a change"""
+    if library_manager.has_updates():
+        st.rerun()
+
 def main():
     # Header
     st.markdown("""
@@ -873,6 +1024,12 @@ def main():
     
     library_manager = st.session_state.library_manager
     ai_assistant = st.session_state.ai_assistant
+    library_manager.sync()
+    watch_for_changes(library_manager)
+    
+    if library_manager.load_report.errors:
+        with st.expander(f"⚠️ Skipped {len(library_manager.load_report.errors)} invalid records in library data"):
+            st.text(library_manager.load_report.summary())
     
     # Navigation
     if 'current_page' not in st.session_state:
@@ -898,32 +1055,22 @@ def main():
         if library_manager.books:
             # Filter options
             with st.expander("🔧 Filter Options", expanded=False):
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 with col1:
                     filter_status = st.selectbox("Filter by status", ["All", "Available", "Borrowed", "Overdue"])
                 with col2:
-                    filter_genre = st.selectbox("Filter by genre", ["All"] + list(set(book.genre for book in library_manager.books)))
-            
-            # Apply filters
-            filtered_books = library_manager.books
-            
-            if filter_status != "All":
-                if filter_status == "Available":
-                    filtered_books = [book for book in filtered_books if not book.is_borrowed]
-                elif filter_status == "Borrowed":
-                    filtered_books = [book for book in filtered_books if book.is_borrowed]
-                elif filter_status == "Overdue":
-                    filtered_books = [book for book in filtered_books if book.is_borrowed and book.due_date and 
-                                    datetime.strptime(book.due_date, "%Y-%m-%d") < datetime.now()]
-            
-            if filter_genre != "All":
-                filtered_books = [book for book in filtered_books if book.genre == filter_genre]
+                    filter_genre = st.selectbox("Filter by genre", ["All"] + library_manager.index.genres())
+                with col3:
+                    page_size = st.selectbox("Books per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
             
-            st.write(f"Showing {len(filtered_books)} of {len(library_manager.books)} books")
-            
-            # Display books
-            for book in filtered_books:
-                render_book_card(book, library_manager)
+            # Cursor-based paging: each page starts after the catalogue position
+            # of the previous page's last book
+            render_book_pages(
+                "books", (filter_status, filter_genre, page_size), page_size,
+                lambda after, limit: library_manager.page_books(filter_status, filter_genre, after, limit),
+                lambda after, page: library_manager.index.position(page[-1].id),
+                library_manager, note=f" ({len(library_manager.books)} in library)"
+            )
                 
         else:
             st.info("📖 No books in your library yet. Add your first book using the 'Add Book' tab!")
@@ -949,7 +1096,7 @@ def main():
             submitted = st.form_submit_button("➕ Add Book to Library", use_container_width=True)
             
             if submitted and title and author and genre:
-                book_id = f"{len(library_manager.books) + 1:04d}"
+                book_id = new_book_id()
                 tags_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
                 
                 summary = ""
@@ -968,9 +1115,11 @@ def main():
                     summary=summary
                 )
                 
-                library_manager.add_book(new_book)
-                show_toast(f"📚 '{title}' added to your library!")
-                st.rerun()
+                if library_manager.add_book(new_book):
+                    show_toast(f"📚 '{title}' added to your library!")
+                    st.rerun()
+                else:
+                    st.error(f"A book with id {book_id} already exists")
             elif submitted:
                 st.error("⚠️ Please fill in all required fields (marked with *)")
     
@@ -980,52 +1129,69 @@ def main():
         # Search interface
         search_query = st.text_input("🔍 Search books...", placeholder="Enter title, author, genre, or tags")
         
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
             search_filter = st.selectbox("📊 Filter by availability", ["All", "Available", "Borrowed"])
         with col2:
-            genres = list(set(book.genre for book in library_manager.books))
+            genres = library_manager.index.genres()
             selected_genres = st.multiselect("📂 Filter by genres", genres)
+        with col3:
+            page_size = st.selectbox("Results per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
         
-        # Filter books based on search
-        filtered_books = library_manager.books
-        
-        if search_query:
-            filtered_books = [
-                book for book in filtered_books
-                if (search_query.lower() in book.title.lower() or
-                    search_query.lower() in book.author.lower() or
-                    search_query.lower() in book.genre.lower() or
-                    any(search_query.lower() in tag.lower() for tag in book.tags))
-            ]
-        
-        if search_filter == "Available":
-            filtered_books = [book for book in filtered_books if not book.is_borrowed]
-        elif search_filter == "Borrowed":
-            filtered_books = [book for book in filtered_books if book.is_borrowed]
-        
-        if selected_genres:
-            filtered_books = [book for book in filtered_books if book.genre in selected_genres]
-        
-        st.write(f"📊 Found {len(filtered_books)} books")
+        view = (search_query, search_filter, tuple(selected_genres), page_size)
+        if not search_query.strip() and len(selected_genres) <= 1:
+            # Browsing: page through the index like My Books
+            genre = selected_genres[0] if selected_genres else "All"
+            fetch = lambda after, limit: library_manager.page_books(search_filter, genre, after, limit)
+            next_cursor = lambda after, page: library_manager.index.position(page[-1].id)
+        else:
+            # Ranked (or multi-genre) results: collect the matches, render one
+            # page at a time, with the rank offset as the cursor
+            if search_query.strip():
+                filtered_books = library_manager.search_books(search_query)
+                if not filtered_books:
+                    filtered_books = library_manager.fuzzy_search_books(search_query)
+                    if filtered_books:
+                        st.info(f"No exact matches for '{search_query}' - showing similar titles and authors")
+                if search_filter == "Available":
+                    filtered_books = [book for book in filtered_books if not book.is_borrowed]
+                elif search_filter == "Borrowed":
+                    filtered_books = [book for book in filtered_books if book.is_borrowed]
+                if selected_genres:
+                    filtered_books = [book for book in filtered_books if book.genre in selected_genres]
+            else:
+                filtered_books = sorted(
+                    (book for genre in selected_genres for book in library_manager.filter_books(search_filter, genre)),
+                    key=lambda book: library_manager.index.position(book.id)
+                )
+            fetch = lambda after, limit: (filtered_books[after + 1:after + 1 + limit], len(filtered_books))
+            next_cursor = lambda after, page: after + len(page)
         
-        # Display results
-        for book in filtered_books:
-            render_book_card(book, library_manager, show_actions=False)
+        render_book_pages("search", view, page_size, fetch, next_cursor, library_manager, show_actions=False)
     
     elif st.session_state.current_page == "📊 Insights":
         st.subheader("📊 Library Analytics & AI Insights")
         
         if library_manager.books:
-            # Genre distribution chart
-            genre_counts = {}
-            for book in library_manager.books:
-                genre_counts[book.genre] = genre_counts.get(book.genre, 0) + 1
-            
-            if genre_counts:
+            # Distributions from the columnar catalogue view
+            frame = library_manager.catalogue_frame
+            col1, col2 = st.columns(2)
+            with col1:
                 st.write("📈 **Genre Distribution**")
-                genre_df = pd.DataFrame(list(genre_counts.items()), columns=['Genre', 'Count'])
-                st.bar_chart(genre_df.set_index('Genre'))
+                st.bar_chart(frame.genre_distribution())
+            with col2:
+                st.write("🗓️ **Books by Decade**")
+                st.bar_chart(frame.decade_histogram())
+            
+            loans_per_month = frame.loans_per_month()
+            if not loans_per_month.empty:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write("📤 **Loans per Month**")
+                    st.bar_chart(loans_per_month)
+                with col2:
+                    st.write("🏆 **Top Borrowers**")
+                    st.bar_chart(frame.top_borrowers())
             
             # AI Insights
             st.write("🤖 **AI Library Analysis**")
@@ -1038,7 +1204,7 @@ def main():
             st.write("📅 **Recent Activity**")
             if library_manager.borrowing_history:
                 recent_history = sorted(library_manager.borrowing_history, 
-                                      key=lambda x: x.get('checkout_date', x.get('return_date', '')), 
+                                      key=lambda x: x.get('checkout_date') or x.get('return_date') or date.min, 
                                       reverse=True)[:10]
                 
                 for activity in recent_history:
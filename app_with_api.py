@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
 import json
-import requests
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass, asdict
 from typing import List, Optional, Dict
 import google.generativeai as genai
@@ -11,6 +10,15 @@ import base64
 from io import BytesIO
 import time
 
+from ai_cache import ResponseCache
+from compact_book import compact_record
+from http_cache import HttpCache
+from http_client import create_session
+from library_loader import LoadReport, stream_books
+from library_storage import JsonStorage, new_book_id
+from ol_import import ConcurrentImporter
+from open_library_records import book_record, cover_url, determine_genre
+
 # Configure page with custom styling
 st.set_page_config(
     page_title="📚 BookNest - AI Library Manager",
@@ -76,6 +84,7 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@compact_record
 @dataclass
 class Book:
     id: str
@@ -87,33 +96,37 @@ class Book:
     tags: List[str]
     is_borrowed: bool = False
     borrower_name: str = ""
-    due_date: Optional[str] = None
+    due_date: Optional[date] = None
     summary: str = ""
     cover_url: str = ""
 
 class OpenLibraryAPI:
     """Interface to Open Library API"""
     
-    def __init__(self):
+    def __init__(self, pool_size: int = 10, max_retries: int = 3, timeout: float = 10):
         self.base_url = "https://openlibrary.org"
         self.covers_url = "https://covers.openlibrary.org/b"
+        # Keep-alive connection pool shared by every request (and import thread)
+        self.session = create_session(pool_size=pool_size, max_retries=max_retries, timeout=timeout)
+        # Search and work-detail responses are cached on disk and revalidated
+        self.cache = HttpCache()
+    
+    def fetch_search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Search Open Library, raising on failure (safe to call from worker threads)"""
+        url = f"{self.base_url}/search.json"
+        params = {
+            'q': query,
+            'limit': limit,
+            'fields': 'key,title,author_name,first_publish_year,isbn,subject,cover_i'
+        }
+        
+        data = self.cache.get_json(self.session, url, params)
+        return data.get('docs', [])
     
     def search_books(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for books using Open Library API"""
         try:
-            url = f"{self.base_url}/search.json"
-            params = {
-                'q': query,
-                'limit': limit,
-                'fields': 'key,title,author_name,first_publish_year,isbn,subject,cover_i'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            return data.get('docs', [])
-            
+            return self.fetch_search(query, limit)
         except Exception as e:
             st.error(f"Error searching Open Library: {e}")
             return []
@@ -125,10 +138,7 @@ class OpenLibraryAPI:
             work_key = work_key.replace('/works/', '')
             url = f"{self.base_url}/works/{work_key}.json"
             
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            return response.json()
+            return self.cache.get_json(self.session, url)
             
         except Exception as e:
             st.error(f"Error getting book details: {e}")
@@ -136,107 +146,50 @@ class OpenLibraryAPI:
     
     def get_cover_url(self, cover_id: int, size: str = "M") -> str:
         """Get book cover URL"""
-        if cover_id:
-            return f"{self.covers_url}/id/{cover_id}-{size}.jpg"
-        return ""
+        return cover_url(cover_id, size)
     
     def convert_to_book(self, ol_book: Dict) -> Book:
         """Convert Open Library book data to our Book format"""
         try:
-            # Extract basic info
-            title = ol_book.get('title', 'Unknown Title')
-            authors = ol_book.get('author_name', ['Unknown Author'])
-            author = ', '.join(authors[:2])  # Take first 2 authors
-            year = ol_book.get('first_publish_year', 2000)
-            
-            # Get ISBN
-            isbns = ol_book.get('isbn', [])
-            isbn = isbns[0] if isbns else f"OL-{ol_book.get('key', '').replace('/works/', '')}"
-            
-            # Get subjects for genre and tags
-            subjects = ol_book.get('subject', [])
-            genre = self._determine_genre(subjects)
-            tags = subjects[:5]  # Take first 5 subjects as tags
-            
-            # Get cover URL
-            cover_id = ol_book.get('cover_i')
-            cover_url = self.get_cover_url(cover_id) if cover_id else ""
-            
-            # Generate unique ID
-            book_id = f"OL-{hash(title + author) % 10000:04d}"
-            
-            return Book(
-                id=book_id,
-                title=title,
-                author=author,
-                genre=genre,
-                year=int(year) if year else 2000,
-                isbn=isbn,
-                tags=tags,
-                cover_url=cover_url
-            )
-            
+            return self.build_book(ol_book)
         except Exception as e:
             st.error(f"Error converting book data: {e}")
             return None
     
+    def build_book(self, ol_book: Dict) -> Book:
+        """Convert Open Library book data, raising on bad records"""
+        record = book_record(ol_book, "")
+        # Generate unique ID
+        record['id'] = f"OL-{hash(record['title'] + record['author']) % 10000:04d}"
+        return Book(**record)
+    
     def _determine_genre(self, subjects: List[str]) -> str:
         """Determine genre from subjects"""
-        subjects_lower = [s.lower() for s in subjects]
-        
-        genre_keywords = {
-            'Fiction': ['fiction', 'novel', 'literature'],
-            'Mystery': ['mystery', 'detective', 'crime', 'thriller'],
-            'Sci-Fi': ['science fiction', 'sci-fi', 'fantasy', 'dystopian'],
-            'Romance': ['romance', 'love story'],
-            'Biography': ['biography', 'memoir', 'autobiography'],
-            'History': ['history', 'historical'],
-            'Science': ['science', 'technology', 'physics', 'biology'],
-            'Self-Help': ['self-help', 'psychology', 'philosophy']
-        }
-        
-        for genre, keywords in genre_keywords.items():
-            if any(keyword in ' '.join(subjects_lower) for keyword in keywords):
-                return genre
-        
-        return 'Fiction'  # Default genre
+        return determine_genre(subjects)
 
 class LibraryManager:
     def __init__(self):
         self.data_file = "library_data.json"
+        self.storage = JsonStorage(self.data_file)
         self.books = []
         self.borrowing_history = []
         self.load_data()
         
     def load_data(self):
-        """Load data with better error handling"""
+        """Stream the data file in, reporting invalid records together"""
+        self.books = []
+        self.borrowing_history = []
+        load_report = LoadReport()
         try:
             if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data_dict = json.load(f)
+                for books, history in stream_books(self.storage, Book, load_report):
+                    self.books.extend(books)
+                    self.borrowing_history.extend(history)
                 
-                books_data = data_dict.get('books', [])
-                self.books = []
-                
-                for book_data in books_data:
-                    try:
-                        # Ensure all required fields exist
-                        if not all(key in book_data for key in ['id', 'title', 'author', 'genre', 'year', 'isbn', 'tags']):
-                            st.warning(f"Skipping incomplete book: {book_data.get('title', 'Unknown')}")
-                            continue
-                        
-                        # Add cover_url if missing
-                        if 'cover_url' not in book_data:
-                            book_data['cover_url'] = ""
-                        
-                        book = Book(**book_data)
-                        self.books.append(book)
-                        
-                    except Exception as e:
-                        st.error(f"Error loading book {book_data.get('title', 'Unknown')}: {e}")
-                        continue
-                
-                self.borrowing_history = data_dict.get('borrowing_history', [])
+                if load_report.errors:
+                    st.warning(f"⚠️ Skipped {len(load_report.errors)} invalid records in {self.data_file}")
+                    with st.expander("Details"):
+                        st.text(load_report.summary())
                 
                 if self.books:
                     st.success(f"✅ Loaded {len(self.books)} books successfully!")
@@ -245,8 +198,6 @@ class LibraryManager:
                     
             else:
                 st.info("📚 No library data found. You can add books manually or import from Open Library.")
-                self.books = []
-                self.borrowing_history = []
                 
         except Exception as e:
             st.error(f"❌ Error loading library data: {e}")
@@ -256,18 +207,20 @@ class LibraryManager:
     def save_data(self):
         """Save data with error handling"""
         try:
-            data = {
-                'books': [asdict(book) for book in self.books],
-                'borrowing_history': self.borrowing_history
-            }
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self.storage.save_all([asdict(book) for book in self.books], self.borrowing_history)
         except Exception as e:
             st.error(f"Error saving data: {e}")
     
-    def add_book(self, book: Book):
+    def add_book(self, book: Book) -> bool:
+        """Add ``book`` and journal it; False (nothing added) if its id is taken"""
+        if any(existing.id == book.id for existing in self.books):
+            return False
         self.books.append(book)
-        self.save_data()
+        try:
+            self.storage.put_book(asdict(book))
+        except Exception as e:
+            st.error(f"Error saving data: {e}")
+        return True
     
     def update_book(self, book_id: str, updated_book: Book):
         for i, book in enumerate(self.books):
@@ -282,17 +235,25 @@ class LibraryManager:
 
 class AIAssistant:
     def __init__(self):
+        self.model_name = 'gemini-2.0-flash-exp'
+        self.cache = ResponseCache()
         # Configure Gemini AI
         if 'GOOGLE_API_KEY' in st.secrets:
             genai.configure(api_key=st.secrets['GOOGLE_API_KEY'])
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = genai.GenerativeModel(self.model_name)
         elif 'GOOGLE_API_KEY' in os.environ:
             genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = genai.GenerativeModel(self.model_name)
         else:
             st.warning("⚠️ Please set GOOGLE_API_KEY for AI features")
             self.model = None
     
+    def _generate(self, prompt: str) -> str:
+        """Call Gemini, serving repeated prompts from the on-disk cache"""
+        return self.cache.get_or_generate(
+            self.model_name, prompt, lambda p: self.model.generate_content(p).text.strip()
+        )
+    
     def generate_book_summary(self, title: str, author: str, genre: str, year: int = None) -> str:
         if not self.model:
             return "AI features require GOOGLE_API_KEY to be set."
@@ -308,8 +269,7 @@ Focus on:
 
 Keep it engaging and informative for library users deciding whether to read it."""
             
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return self._generate(prompt)
         except Exception as e:
             return f"Could not generate summary: {str(e)}"
 
@@ -367,6 +327,31 @@ def render_book_card(book: Book, show_actions: bool = True):
                 st.success("Book deleted!")
                 st.rerun()
 
+def quick_import(library_manager: LibraryManager, ai_assistant: AIAssistant, ol_api: OpenLibraryAPI,
+                 searches: List[str], per_search: int = 3, max_workers: int = 8) -> int:
+    """Import the top results for each search concurrently, adding books as they finish"""
+    summarize = None
+    if ai_assistant.model:
+        summarize = lambda book: ai_assistant.generate_book_summary(book.title, book.author, book.genre, book.year)
+    importer = ConcurrentImporter(ol_api.fetch_search, ol_api.build_book, summarize, max_workers)
+    
+    expected = len(searches) * per_search
+    progress = st.progress(0.0, text=f"Importing {', '.join(searches)}...")
+    imported = 0
+    for search, book, error in importer.run(searches, per_search):
+        if error:
+            st.warning(f"⚠️ {search}: {error}")
+            continue
+        book.id = new_book_id()
+        if not library_manager.add_book(book):
+            st.warning(f"⚠️ {book.title}: id {book.id} is already taken")
+            continue
+        imported += 1
+        st.write(f"✅ {book.title} by {book.author}")
+        progress.progress(min(imported / expected, 1.0), text=f"Imported {imported} books...")
+    progress.empty()
+    return imported
+
 def main():
     st.title("🏠 BookNest - AI Library Manager")
     st.markdown("*Your intelligent library management system with Open Library integration*")
@@ -459,7 +444,7 @@ def main():
             submitted = st.form_submit_button("➕ Add Book")
             
             if submitted and title and author and genre:
-                book_id = f"{len(library_manager.books) + 1:04d}"
+                book_id = new_book_id()
                 tags_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
                 
                 summary = ""
@@ -478,9 +463,11 @@ def main():
                     summary=summary
                 )
                 
-                library_manager.add_book(new_book)
-                st.success(f"✅ Added '{title}' to your library!")
-                st.rerun()
+                if library_manager.add_book(new_book):
+                    st.success(f"✅ Added '{title}' to your library!")
+                    st.rerun()
+                else:
+                    st.error(f"A book with id {book_id} already exists")
     
     with tab3:
         st.subheader("🌐 Import Books from Open Library")
@@ -523,7 +510,7 @@ def main():
                             book = ol_api.convert_to_book(result)
                             if book:
                                 # Generate unique ID for our system
-                                book.id = f"{len(library_manager.books) + 1:04d}"
+                                book.id = new_book_id()
                                 
                                 # Generate AI summary if possible
                                 if ai_assistant.model:
@@ -532,9 +519,11 @@ def main():
                                             book.title, book.author, book.genre, book.year
                                         )
                                 
-                                library_manager.add_book(book)
-                                st.success(f"✅ Imported '{book.title}'!")
-                                st.rerun()
+                                if library_manager.add_book(book):
+                                    st.success(f"✅ Imported '{book.title}'!")
+                                    st.rerun()
+                                else:
+                                    st.error(f"A book with id {book.id} already exists")
                             else:
                                 st.error("Failed to import book")
                     
@@ -552,29 +541,23 @@ def main():
             "George Orwell 1984"
         ]
         
+        selected_searches = []
         cols = st.columns(len(popular_searches))
         for i, search in enumerate(popular_searches):
             with cols[i]:
                 if st.button(search, key=f"popular_{i}"):
-                    with st.spinner(f"Importing {search}..."):
-                        results = ol_api.search_books(search, 3)
-                        imported = 0
-                        for result in results:
-                            book = ol_api.convert_to_book(result)
-                            if book:
-                                book.id = f"{len(library_manager.books) + 1:04d}"
-                                if ai_assistant.model:
-                                    book.summary = ai_assistant.generate_book_summary(
-                                        book.title, book.author, book.genre, book.year
-                                    )
-                                library_manager.add_book(book)
-                                imported += 1
-                        
-                        if imported > 0:
-                            st.success(f"✅ Imported {imported} books!")
-                            st.rerun()
-                        else:
-                            st.error("No books imported")
+                    selected_searches = [search]
+        
+        if st.button("⚡ Import All Popular", key="popular_all"):
+            selected_searches = popular_searches
+        
+        if selected_searches:
+            imported = quick_import(library_manager, ai_assistant, ol_api, selected_searches)
+            if imported > 0:
+                st.success(f"✅ Imported {imported} books!")
+                st.rerun()
+            else:
+                st.error("No books imported")
     
     with tab4:
         st.subheader("📊 Library Analytics")
@@ -0,0 +1,163 @@
+"""
+Versioned feed of committed library changes, shared by every session
+
+Sessions of the same server process share a ``BaseCatalogue``
+(``shared_catalogue``), each with its own overlay. Without a feed, a
+change committed in one session stays invisible to the others until they
+reload everything. With one:
+
+- a session commits through ``ChangeFeed.commit``, which writes the change
+  to storage and records it under the next version number, atomically
+- every other session remembers the last version it applied and, on its
+  next run, ``sync`` applies only the newer changes to its overlay
+- once ``rebase_every`` changes pile up, a background thread folds them
+  into a new base, so overlays stay small; sessions move to the new base
+  on their next ``sync``
+
+Books in the feed are shared like base books and must not be mutated.
+"""
+
+import threading
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from shared_catalogue import BaseCatalogue, CatalogueOverlay
+
+
+@dataclass(frozen=True)
+class Change:
+    version: int
+    # Session that committed the change
+    source: str
+    book_id: Optional[str] = None
+    # The book as stored after the change; None with a book_id means deleted
+    book: Optional[object] = None
+    # Borrowing-history entry appended by the change
+    entry: Optional[Dict] = None
+
+    def write_to(self, storage):
+        if self.book is not None:
+            storage.put_book(asdict(self.book))
+        elif self.book_id is not None:
+            storage.delete_book(self.book_id)
+        if self.entry is not None:
+            storage.append_history(self.entry)
+
+    def apply_to(self, overlay: CatalogueOverlay, with_history: bool = True):
+        if self.book is not None:
+            overlay.put(self.book)
+        elif self.book_id is not None:
+            overlay.delete(self.book_id)
+        if self.entry is not None and with_history:
+            overlay.append_history(self.entry)
+
+
+class ChangeFeed:
+    """Base catalogue plus the changes committed on top of it, by version"""
+
+    def __init__(self, base: BaseCatalogue, rebase_every: int = 1000):
+        self.base = base
+        # Version already folded into ``base``
+        self.base_version = 0
+        self.version = 0
+        self.rebase_every = rebase_every
+        # Changes base_version + 1 .. version, in order
+        self._changes: List[Change] = []
+        self._lock = threading.Lock()
+        self._rebase_lock = threading.Lock()
+        self._rebaser: Optional[threading.Thread] = None
+
+    def commit(self, storage, change: Change) -> int:
+        """Write ``change`` to ``storage`` and publish it under the next version.
+
+        Holding the lock across both keeps the feed in the same order as
+        the storage. Nothing is published if the write raises.
+        """
+        with self._lock:
+            change.write_to(storage)
+            self.version += 1
+            self._changes.append(replace(change, version=self.version))
+            version = self.version
+            should_rebase = len(self._changes) >= self.rebase_every
+        if should_rebase:
+            self._start_rebase()
+        return version
+
+    def attach(self) -> Tuple[CatalogueOverlay, int]:
+        """A new overlay on the current base with every change applied, and its version"""
+        with self._lock:
+            base, changes, version = self.base, list(self._changes), self.version
+        overlay = CatalogueOverlay(base)
+        for change in changes:
+            change.apply_to(overlay)
+        return overlay, version
+
+    def since(self, base: BaseCatalogue, version: int) -> Optional[List[Change]]:
+        """Changes after ``version``, or None if ``base`` has been replaced (``attach`` again)"""
+        with self._lock:
+            if base is not self.base:
+                return None
+            return self._changes[version - self.base_version:]
+
+    def _start_rebase(self):
+        if self._rebaser and self._rebaser.is_alive():
+            return
+        self._rebaser = threading.Thread(target=self.rebase, name="catalogue-rebase", daemon=True)
+        self._rebaser.start()
+
+    def rebase(self):
+        """Fold the pending changes into a new base (blocking; commits continue meanwhile)"""
+        with self._rebase_lock:
+            with self._lock:
+                base, changes = self.base, list(self._changes)
+            if not changes:
+                return
+            overlay = CatalogueOverlay(base)
+            for change in changes:
+                change.apply_to(overlay)
+            rebased = BaseCatalogue(overlay.books, overlay.borrowing_history, base.load_report)
+            with self._lock:
+                self.base = rebased
+                self.base_version += len(changes)
+                del self._changes[:len(changes)]
+
+
+class FeedSubscriber:
+    """One session's position in a ``ChangeFeed``"""
+
+    def __init__(self, feed: ChangeFeed, source: str):
+        self.feed = feed
+        self.source = source
+        self.catalogue, self.version = feed.attach()
+
+    def sync(self) -> Optional[List[str]]:
+        """Catch up with the feed.
+
+        Returns the ids of books changed by other sessions, or None when
+        the overlay was rebuilt on a new base (everything may have changed).
+        """
+        changes = self.feed.since(self.catalogue.base, self.version)
+        if changes is None:
+            self.catalogue, self.version = self.feed.attach()
+            return None
+        changed = []
+        for change in changes:
+            own = change.source == self.source
+            # Our own changes are already applied; replaying the book keeps
+            # the latest version on top if another session's change came first
+            change.apply_to(self.catalogue, with_history=not own)
+            if change.book_id is not None and not own:
+                changed.append(change.book_id)
+        if changes:
+            self.version = changes[-1].version
+        return changed
+
+    def commit(self, storage, book_id: str, book=None, entry: Optional[Dict] = None):
+        """Apply a change to this session, then persist and publish it.
+
+        ``book`` is the new version of ``book_id`` (None to delete it). If
+        the storage write raises, the change stays in this session only.
+        """
+        change = Change(0, self.source, book_id, book, entry)
+        change.apply_to(self.catalogue)
+        self.feed.commit(storage, change)
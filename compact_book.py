@@ -0,0 +1,165 @@
+"""
+Memory-compact book records
+
+``compact_record`` turns a ``@dataclass`` ``Book`` into a slotted class
+(no per-instance ``__dict__``) whose repeated strings are shared:
+
+- ``genre``, ``author`` and ``borrower_name`` are interned on assignment
+- ``tags`` is stored as packed 32-bit ids into a process-wide tag
+  vocabulary and read back as a ``List[str]``
+
+Attribute access, keyword construction, ``asdict``, equality and pickling
+behave exactly as before. Reading ``book.tags`` returns a fresh list, so
+change tags by assigning a new list rather than mutating the one
+returned.
+
+Run directly to measure the per-book footprint:
+
+    python compact_book.py [--books 100000]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import tracemalloc
+from array import array
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+INTERNED_FIELDS = ('genre', 'author', 'borrower_name')
+
+
+class TagVocabulary:
+    """Tag string <-> small integer id, shared by every book in the process"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def id_for(self, name: str) -> int:
+        tag_id = self.ids.get(name)
+        if tag_id is None:
+            # Streamlit sessions run on separate threads
+            with self._lock:
+                tag_id = self.ids.get(name)
+                if tag_id is None:
+                    tag_id = len(self.names)
+                    self.names.append(sys.intern(name))
+                    self.ids[self.names[tag_id]] = tag_id
+        return tag_id
+
+    def encode(self, tags: Iterable[str]) -> bytes:
+        return array('I', [self.id_for(tag) for tag in tags]).tobytes()
+
+    def decode(self, packed: bytes) -> List[str]:
+        names = self.names
+        return [names[tag_id] for tag_id in memoryview(packed).cast('I')]
+
+
+TAGS = TagVocabulary()
+
+
+def _interned(slot):
+    def get(self):
+        return slot.__get__(self)
+
+    def set(self, value):
+        slot.__set__(self, sys.intern(value) if type(value) is str else value)
+
+    return property(get, set)
+
+
+def _tag_ids(slot, vocabulary: TagVocabulary):
+    def get(self):
+        return vocabulary.decode(slot.__get__(self))
+
+    def set(self, tags):
+        slot.__set__(self, vocabulary.encode(tags or ()))
+
+    return property(get, set)
+
+
+def compact_record(cls=None, *, vocabulary: TagVocabulary = TAGS):
+    """Rebuild a dataclass with ``__slots__``, interned strings and tag ids.
+
+    Apply above ``@dataclass``. This is what ``dataclass(slots=True)`` does
+    on Python 3.10+, done by hand so Python 3.8 keeps working, plus the
+    interning/tag properties wrapped around the slots.
+    """
+    def wrap(cls):
+        names = tuple(f.name for f in fields(cls))
+        namespace = dict(cls.__dict__)
+        # Defaults are already bound into the generated __init__
+        for name in names + ('__dict__', '__weakref__'):
+            namespace.pop(name, None)
+        namespace['__slots__'] = names
+        compact = type(cls)(cls.__name__, cls.__bases__, namespace)
+        compact.__qualname__ = cls.__qualname__
+
+        for name in INTERNED_FIELDS:
+            if name in names:
+                setattr(compact, name, _interned(compact.__dict__[name]))
+        if 'tags' in names:
+            compact.tags = _tag_ids(compact.__dict__['tags'], vocabulary)
+        return compact
+
+    return wrap if cls is None else wrap(cls)
+
+
+def _sample_book_class():
+    @dataclass
+    class Book:
+        id: str
+        title: str
+        author: str
+        genre: str
+        year: int
+        isbn: str
+        tags: List[str]
+        is_borrowed: bool = False
+        borrower_name: str = ""
+        due_date: Optional[date] = None
+        summary: str = ""
+        cover_url: str = ""
+
+    return Book
+
+
+def _sample_records(count: int):
+    # Round-trip through JSON so every string is a fresh object, as on load
+    for i in range(count):
+        yield json.loads(json.dumps(dict(
+            id=f"OL{i}W", title=f"Title {i}", author=f"Author {i % 5000}",
+            genre=("Fiction", "Mystery", "History")[i % 3], year=1900 + i % 120,
+            isbn=f"978{i:010d}", tags=[f"subject {(i + k) % 2000}" for k in range(5)],
+            cover_url=f"https://covers.openlibrary.org/b/id/{i}-M.jpg",
+        )))
+
+
+def measure(book_class, count: int) -> float:
+    """Bytes retained per book after building ``count`` books from fresh dicts"""
+    tracemalloc.start()
+    books = [book_class(**record) for record in _sample_records(count)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del books
+    return retained / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory footprint of compact book records")
+    parser.add_argument("--books", type=int, default=100000)
+    args = parser.parse_args()
+
+    for label, book_class in (("dataclass", _sample_book_class()),
+                              ("compact_record", compact_record(_sample_book_class()))):
+        per_book = measure(book_class, args.books)
+        print(f"{label:>14}: {per_book:,.0f} bytes/book "
+              f"(~{per_book * 1_000_000 / 2**30:,.2f} GiB per million books)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compiled subject -> genre classifier
+
+Genre rules live in ``genre_rules.json`` (override the path with
+``BOOKNEST_GENRE_RULES``): an ordered mapping of genre -> keywords plus a
+default. A book gets the first genre, in file order, that has a keyword
+anywhere in its space-joined, lowercased subjects.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_RULES_FILE = os.environ.get(
+    'BOOKNEST_GENRE_RULES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'genre_rules.json'))
+
+
+def compile_rules(genre_keywords: Dict[str, List[str]]) -> List[Tuple[str, str]]:
+    """Flatten the rules into an ordered ``(keyword, genre)`` table.
+
+    A keyword that contains a keyword of an earlier genre (e.g. Sci-Fi's
+    "science fiction" contains Fiction's "fiction") can never decide the
+    result, so it is dropped, as are duplicates.
+    """
+    table: List[Tuple[str, str]] = []
+    for genre, keywords in genre_keywords.items():
+        earlier = [keyword for keyword, _ in table]
+        for keyword in dict.fromkeys(k.lower() for k in keywords):
+            if not any(other in keyword for other in earlier):
+                table.append((keyword, genre))
+    return table
+
+
+class GenreClassifier:
+    """Classifies subject lists against rules compiled once at load time.
+
+    Subjects are joined and lowercased once per call and matched against
+    the flat keyword table in priority order, stopping at the first hit.
+    Results are memoized per distinct subject list, so the many works that
+    share a subject list cost a dictionary lookup.
+    """
+
+    def __init__(self, genre_keywords: Dict[str, List[str]], default: str = 'Fiction', cache_size: int = 65536):
+        self.default = default
+        self.table = compile_rules(genre_keywords)
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES_FILE) -> 'GenreClassifier':
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        return cls(rules['genres'], rules.get('default', 'Fiction'))
+
+    def _classify(self, subjects: tuple) -> str:
+        text = ' '.join(subjects).lower()
+        for keyword, genre in self.table:
+            if keyword in text:
+                return genre
+        return self.default
+
+    def genre_for(self, subjects: Iterable[str]) -> str:
+        """Genre for one book's subjects"""
+        return self.classify(tuple(subjects))
+
+    def classify_many(self, subject_lists: Iterable[Iterable[str]]) -> List[str]:
+        """Genres for many books; repeated subject lists are classified once"""
+        results: Dict[tuple, str] = {}
+        genres = []
+        for subjects in subject_lists:
+            key = tuple(subjects)
+            if key not in results:
+                results[key] = self.classify(key)
+            genres.append(results[key])
+        return genres
+
+
+_default: Optional[GenreClassifier] = None
+
+
+def default_classifier() -> GenreClassifier:
+    """Classifier for the configured rules file, loaded once per process"""
+    global _default
+    if _default is None:
+        _default = GenreClassifier.from_file()
+    return _default
@@ -0,0 +1,164 @@
+"""
+Persistent HTTP response cache for Open Library requests
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from sqlite_cache import DEFAULT_CACHE_DIR, evict_lru
+
+# live: cache + network, record: live and also write fixtures, replay: fixtures only
+HTTP_MODES = ('live', 'record', 'replay')
+
+
+class HttpCache:
+    """SQLite cache of JSON GET responses keyed by URL + query parameters.
+
+    Responses younger than ``ttl_seconds`` are served without touching the
+    network. Older ones are revalidated with ``If-None-Match`` /
+    ``If-Modified-Since`` when the server sent an ETag or Last-Modified, so
+    an unchanged result costs a 304 instead of a full download; if the
+    network is down a stale copy is served rather than failing. Least
+    recently used entries are evicted once the bodies exceed ``max_bytes``.
+
+    ``mode='record'`` additionally writes every response it returns to
+    ``fixture_dir`` as one JSON file, and ``mode='replay'`` serves only from
+    those files and never opens a connection (for offline tests).
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl_seconds: int = 24 * 3600,
+                 max_bytes: int = 20 * 1024 * 1024, mode: Optional[str] = None,
+                 fixture_dir: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.mode = (mode or os.environ.get('BOOKNEST_HTTP_MODE', 'live')).lower()
+        if self.mode not in HTTP_MODES:
+            raise ValueError(f"Unknown HTTP cache mode {self.mode!r}; expected one of {', '.join(HTTP_MODES)}")
+        self.fixture_dir = fixture_dir or os.environ.get(
+            'BOOKNEST_HTTP_FIXTURES', os.path.join(cache_dir, 'http_fixtures'))
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(cache_dir, 'http_responses.db'),
+                                         timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        url TEXT NOT NULL,
+                        body TEXT NOT NULL,
+                        etag TEXT,
+                        last_modified TEXT,
+                        size INTEGER NOT NULL,
+                        fetched_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_access ON responses(last_access)")
+        except (OSError, sqlite3.Error):
+            self._conn = None
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{url}?{query}".encode('utf-8')).hexdigest()
+
+    def get_json(self, session, url: str, params: Optional[Dict] = None):
+        """GET ``url`` through the cache and return the decoded JSON body"""
+        key = self.make_key(url, params)
+        if self.mode == 'replay':
+            return json.loads(self._read_fixture(key, url))
+
+        entry = self._lookup(key)
+        now = time.time()
+        if entry and now - entry['fetched_at'] <= self.ttl_seconds:
+            body = entry['body']
+        else:
+            body = self._fetch(session, key, url, params, entry, now)
+
+        if self.mode == 'record':
+            self._write_fixture(key, url, params, body)
+        return json.loads(body)
+
+    def _fetch(self, session, key: str, url: str, params: Optional[Dict], entry: Optional[Dict], now: float) -> str:
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = session.get(url, params=params, headers=headers)
+            if response.status_code == 304 and entry:
+                self._touch(key, now)
+                return entry['body']
+            response.raise_for_status()
+        except Exception:
+            if entry:
+                return entry['body']  # Stale beats nothing while offline
+            raise
+        self._store(key, url, response.text, response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'), now)
+        return response.text
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        if self._conn is None:
+            return None
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            return None
+        return {'body': row[0], 'etag': row[1], 'last_modified': row[2], 'fetched_at': row[3]}
+
+    def _touch(self, key: str, now: float):
+        if self._conn is None:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE responses SET fetched_at = ?, last_access = ? WHERE key = ?",
+                                   (now, now, key))
+        except sqlite3.Error:
+            pass
+
+    def _store(self, key: str, url: str, body: str, etag: Optional[str], last_modified: Optional[str], now: float):
+        if self._conn is None:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, url, body, etag, last_modified, size, fetched_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, body, etag, last_modified, len(body.encode('utf-8')), now, now)
+                )
+                evict_lru(self._conn, self.max_bytes)
+        except sqlite3.Error:
+            pass
+
+    def _fixture_path(self, key: str) -> str:
+        return os.path.join(self.fixture_dir, f"{key}.json")
+
+    def _read_fixture(self, key: str, url: str) -> str:
+        try:
+            with open(self._fixture_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)['body']
+        except OSError:
+            raise LookupError(f"No recorded response for {url} in {self.fixture_dir}")
+
+    def _write_fixture(self, key: str, url: str, params: Optional[Dict], body: str):
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        with open(self._fixture_path(key), 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'params': params, 'body': body}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,50 @@
+"""
+Pooled HTTP session with retries for the Open Library client
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Transient statuses worth retrying (rate limiting + gateway/server hiccups)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TimeoutSession(requests.Session):
+    """``requests.Session`` that applies a default timeout to every request"""
+
+    def __init__(self, timeout: float = 10):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_size: int = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                   backoff_jitter: float = 0.5, timeout: float = 10,
+                   user_agent: str = "BookNest/1.0") -> TimeoutSession:
+    """Keep-alive session whose GETs retry with exponential backoff.
+
+    Sleeps ``backoff_factor * 2 ** (retry - 1)`` plus up to ``backoff_jitter``
+    seconds of random jitter between attempts, and waits for the server's
+    ``Retry-After`` instead when a 429/503 response carries one. Up to
+    ``pool_size`` connections per host are kept open for reuse, which should
+    be at least the number of threads sharing the session.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = TimeoutSession(timeout)
+    session.headers['User-Agent'] = user_agent
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,102 @@
+"""
+Incremental parsing of large JSON snapshots
+
+``iter_array_items`` walks a top-level JSON object such as
+``{"books": [...], "borrowing_history": [...]}`` and yields the elements of
+its arrays one at a time, reading the file in fixed-size blocks. Only the
+current block and the element being decoded are held in memory, instead of
+the whole file text plus every parsed record as with ``json.load``.
+"""
+
+import json
+import re
+from typing import Iterator, TextIO, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _Reader:
+    """Buffered text with just enough lookahead for ``raw_decode``"""
+
+    def __init__(self, f: TextIO, block_size: int):
+        self.f = f
+        self.block_size = block_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        block = self.f.read(self.block_size)
+        if not block:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number near the buffer edge may be cut short ("-2." of "-2.5e3")
+            if not isinstance(value, (dict, list, str)) and len(self.buffer) - end < 3 and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_array_items(f: TextIO, block_size: int = 1 << 16) -> Iterator[Tuple[str, object]]:
+    """Yield ``(key, element)`` for each element of each top-level array in ``f``.
+
+    Members of the top-level object that are not arrays are skipped.
+    Raises ``ValueError`` (``json.JSONDecodeError`` for bad values) on
+    malformed input, after yielding everything before the fault.
+    """
+    reader = _Reader(f, block_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError(f"Expected an object key but found {key!r}")
+        reader.expect(':')
+        if reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield key, reader.value()
+                    if reader.peek() == ']':
+                        reader.expect(']')
+                        break
+                    reader.expect(',')
+        else:
+            reader.value()
+
+        if reader.peek() == '}':
+            return
+        reader.expect(',')
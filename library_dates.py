@@ -0,0 +1,148 @@
+"""
+Date handling at the storage boundary
+
+In memory, ``Book.due_date`` and the date fields of borrowing-history
+entries are ``datetime.date`` objects, so comparisons and sorting never
+parse strings. On disk they stay ISO ``YYYY-MM-DD`` strings; the storage
+engines convert with ``decode_book``/``encode_book`` and
+``decode_history``/``encode_history``.
+
+Run directly to normalize the dates in an existing data file (older files
+may hold full timestamps or other formats):
+
+    python library_dates.py [library_data.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+DATE_FORMAT = "%Y-%m-%d"
+
+BOOK_DATE_FIELDS = ('due_date',)
+HISTORY_DATE_FIELDS = ('checkout_date', 'due_date', 'return_date')
+
+# Formats accepted from older data files, tried after ISO
+LEGACY_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y")
+
+
+def parse_date(value) -> Optional[date]:
+    """``date`` for an ISO string, timestamp string, ``date`` or ``datetime``; None if empty"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date {value!r}")
+
+
+def format_date(value) -> Optional[str]:
+    parsed = parse_date(value)
+    return parsed.strftime(DATE_FORMAT) if parsed else None
+
+
+def _convert(record: Dict, fields: Tuple[str, ...], convert) -> Dict:
+    if not any(record.get(field) is not None for field in fields):
+        return record
+    record = dict(record)
+    for field in fields:
+        if field in record:
+            record[field] = convert(record[field])
+    return record
+
+
+def _parse_stored(value) -> Optional[date]:
+    # A corrupt date must not stop the catalogue loading; migrate_file reports them
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def decode_book(record: Dict) -> Dict:
+    return _convert(record, BOOK_DATE_FIELDS, _parse_stored)
+
+
+def encode_book(record: Dict) -> Dict:
+    return _convert(record, BOOK_DATE_FIELDS, format_date)
+
+
+def decode_history(entry: Dict) -> Dict:
+    return _convert(entry, HISTORY_DATE_FIELDS, _parse_stored)
+
+
+def encode_history(entry: Dict) -> Dict:
+    return _convert(entry, HISTORY_DATE_FIELDS, format_date)
+
+
+def migrate_file(data_file: str) -> Tuple[int, List[str]]:
+    """Rewrite every date in ``data_file`` as ISO ``YYYY-MM-DD``.
+
+    A backup is kept at ``<data_file>.bak``. Dates that cannot be parsed are
+    cleared and reported. Returns ``(fields_changed, problems)``.
+    """
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    changed = 0
+    problems = []
+
+    def normalize(record: Dict, fields: Tuple[str, ...], label: str):
+        nonlocal changed
+        for field in fields:
+            value = record.get(field)
+            if value is None:
+                continue
+            try:
+                fixed = format_date(value)
+            except ValueError:
+                problems.append(f"{label}: cleared unparseable {field} {value!r}")
+                fixed = None
+            if fixed != value:
+                record[field] = fixed
+                changed += 1
+
+    for book in data.get('books', []):
+        normalize(book, BOOK_DATE_FIELDS, f"book {book.get('id')}")
+    for i, entry in enumerate(data.get('borrowing_history', [])):
+        normalize(entry, HISTORY_DATE_FIELDS, f"history entry {i}")
+
+    if changed:
+        shutil.copyfile(data_file, f"{data_file}.bak")
+        tmp_file = f"{data_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, data_file)
+    return changed, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize the dates in a BookNest data file")
+    parser.add_argument("data_file", nargs="?", default="library_data.json")
+    args = parser.parse_args()
+
+    changed, problems = migrate_file(args.data_file)
+    for problem in problems:
+        print(f"⚠️ {problem}")
+    if changed:
+        print(f"✅ Normalized {changed} dates (backup: {args.data_file}.bak)")
+    else:
+        print("✅ All dates already in YYYY-MM-DD format")
+
+
+if __name__ == "__main__":
+    main()
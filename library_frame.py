@@ -0,0 +1,215 @@
+"""
+Columnar view of the catalogue and loan history for the analytics pages
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Date columns are held as int64 day numbers (NaT for missing) and viewed as
+# datetime64[D] when a frame is built, avoiding a numpy scalar per value
+NAT = np.iinfo(np.int64).min
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _day(value: Optional[date]) -> int:
+    return value.toordinal() - EPOCH_ORDINAL if value else NAT
+
+
+class _Columns:
+    """Fixed-dtype numpy columns addressed by row slot, doubling when full"""
+
+    def __init__(self, dtypes: Dict[str, object], capacity: int = 256):
+        self.dtypes = dtypes
+        self.capacity = capacity
+        self.arrays = {name: self._empty(dtype, capacity) for name, dtype in dtypes.items()}
+
+    @staticmethod
+    def _empty(dtype, capacity: int) -> np.ndarray:
+        if np.dtype(dtype).kind == 'M':
+            return np.full(capacity, NAT, dtype=np.int64)
+        return np.zeros(capacity, dtype=dtype)
+
+    def load(self, values: Dict[str, list]):
+        """Replace the columns wholesale with equal-length value lists"""
+        count = len(next(iter(values.values())))
+        self.capacity = max(self.capacity, count)
+        for name, dtype in self.dtypes.items():
+            self.arrays[name] = self._empty(dtype, self.capacity)
+            self.arrays[name][:count] = values[name]
+
+    def put(self, slot: int, values: Dict[str, object]):
+        if slot >= self.capacity:
+            self._grow(max(slot + 1, self.capacity * 2))
+        for name, value in values.items():
+            self.arrays[name][slot] = value
+
+    def _grow(self, capacity: int):
+        for name, dtype in self.dtypes.items():
+            grown = self._empty(dtype, capacity)
+            grown[:self.capacity] = self.arrays[name]
+            self.arrays[name] = grown
+        self.capacity = capacity
+
+    def frame(self, rows) -> pd.DataFrame:
+        columns = {}
+        for name, dtype in self.dtypes.items():
+            column = self.arrays[name][rows]
+            columns[name] = column.view(dtype) if np.dtype(dtype).kind == 'M' else column
+        return pd.DataFrame(columns)
+
+
+class FrameAggregates:
+    """Chart-ready series built from the ``*_counts`` methods of a subclass"""
+
+    def genre_distribution(self) -> pd.Series:
+        """Books per genre, largest first"""
+        counts = self.genre_counts().sort_values(ascending=False, kind='stable')
+        return counts.rename_axis('Genre').rename('Count')
+
+    def decade_histogram(self) -> pd.Series:
+        """Books per publication decade, e.g. ``1990s``, oldest first"""
+        counts = self.decade_counts().sort_index()
+        counts.index = counts.index.astype(str) + 's'
+        return counts.rename_axis('Decade').rename('Count')
+
+    def loans_per_month(self) -> pd.Series:
+        """Checkouts per ``YYYY-MM``, in date order"""
+        counts = self.month_counts().sort_index()
+        counts.index = counts.index.astype(str)
+        return counts.rename_axis('Month').rename('Loans')
+
+    def top_borrowers(self, n: int = 10) -> pd.Series:
+        """Borrowers with the most checkouts"""
+        counts = self.borrower_counts().sort_values(ascending=False, kind='stable')
+        return counts.head(n).rename_axis('Borrower').rename('Loans')
+
+
+class CatalogueFrame(FrameAggregates):
+    """Books and loans as pandas DataFrames, maintained incrementally.
+
+    Follows the ``add``/``remove``/``rebuild`` protocol of ``LibraryIndex``:
+    each book owns a slot in preallocated numpy columns that ``add``
+    overwrites and ``remove`` frees for reuse, so a mutation is O(1). Loans
+    are appended by ``add_history``. ``books()``/``loans()`` slice the live
+    rows into a DataFrame that is cached until the next change, and the
+    counts below are vectorized group-bys over those frames.
+    """
+
+    BOOK_COLUMNS = {
+        'id': object,
+        'genre': object,
+        'author': object,
+        'year': np.int64,
+        'is_borrowed': bool,
+        'borrower_name': object,
+        'due_date': 'datetime64[D]',
+    }
+    LOAN_COLUMNS = {
+        'book_id': object,
+        'borrower_name': object,
+        'checkout_date': 'datetime64[D]',
+    }
+
+    def __init__(self):
+        self.slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._live = np.zeros(256, dtype=bool)
+        self._size = 0
+        self._books = _Columns(self.BOOK_COLUMNS)
+        self._loans = _Columns(self.LOAN_COLUMNS)
+        self._loan_count = 0
+        self._books_frame: Optional[pd.DataFrame] = None
+        self._loans_frame: Optional[pd.DataFrame] = None
+
+    def rebuild(self, books: Iterable, history: Iterable[Dict] = ()):
+        self.__init__()
+        books = list(books)
+        self._books.load(self._book_values(books))
+        self.slots = {book.id: slot for slot, book in enumerate(books)}
+        self._size = len(books)
+        self._live = np.zeros(self._books.capacity, dtype=bool)
+        self._live[:self._size] = True
+
+        loans = [entry for entry in history if entry.get('action') == 'checkout']
+        self._loans.load(self._loan_values(loans))
+        self._loan_count = len(loans)
+
+    @staticmethod
+    def _book_values(books: List) -> Dict[str, list]:
+        return {
+            'id': [book.id for book in books],
+            'genre': [book.genre for book in books],
+            'author': [book.author for book in books],
+            'year': [book.year for book in books],
+            'is_borrowed': [book.is_borrowed for book in books],
+            'borrower_name': [book.borrower_name for book in books],
+            'due_date': [_day(book.due_date) for book in books],
+        }
+
+    @staticmethod
+    def _loan_values(loans: List[Dict]) -> Dict[str, list]:
+        return {
+            'book_id': [entry.get('book_id') for entry in loans],
+            'borrower_name': [entry.get('borrower_name') or "" for entry in loans],
+            'checkout_date': [_day(entry.get('checkout_date')) for entry in loans],
+        }
+
+    def add(self, book):
+        """Insert or replace ``book``'s row"""
+        slot = self.slots.get(book.id)
+        if slot is None:
+            slot = self._free.pop() if self._free else self._size
+            self.slots[book.id] = slot
+            self._size = max(self._size, slot + 1)
+        self._books.put(slot, {name: values[0] for name, values in self._book_values([book]).items()})
+        if slot >= len(self._live):
+            self._live = np.concatenate([self._live, np.zeros(self._books.capacity - len(self._live), dtype=bool)])
+        self._live[slot] = True
+        self._books_frame = None
+
+    def remove(self, book_id: str):
+        slot = self.slots.pop(book_id, None)
+        if slot is None:
+            return
+        self._live[slot] = False
+        # Drop references so freed rows don't keep strings alive
+        self._books.put(slot, {'id': None, 'genre': None, 'author': None, 'borrower_name': None})
+        self._free.append(slot)
+        self._books_frame = None
+
+    def add_history(self, entry: Dict):
+        """Record a borrowing-history entry; only checkouts count as loans"""
+        if entry.get('action') != 'checkout':
+            return
+        self._loans.put(self._loan_count, {name: values[0] for name, values in self._loan_values([entry]).items()})
+        self._loan_count += 1
+        self._loans_frame = None
+
+    def books(self) -> pd.DataFrame:
+        """One row per book (in no particular order)"""
+        if self._books_frame is None:
+            self._books_frame = self._books.frame(np.flatnonzero(self._live[:self._size]))
+        return self._books_frame
+
+    def loans(self) -> pd.DataFrame:
+        """One row per checkout, oldest first"""
+        if self._loans_frame is None:
+            self._loans_frame = self._loans.frame(slice(0, self._loan_count))
+        return self._loans_frame
+
+    # Raw counts behind the aggregates (also combined by OverlayFrame)
+    def genre_counts(self) -> pd.Series:
+        return self.books()['genre'].value_counts()
+
+    def decade_counts(self) -> pd.Series:
+        return (self.books()['year'] // 10 * 10).value_counts()
+
+    def month_counts(self) -> pd.Series:
+        return self.loans()['checkout_date'].dropna().dt.to_period('M').value_counts()
+
+    def borrower_counts(self) -> pd.Series:
+        borrowers = self.loans()['borrower_name']
+        return borrowers[borrowers != ""].value_counts()
@@ -0,0 +1,169 @@
+"""
+In-memory indexes over the BookNest catalogue
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import date, timedelta
+from heapq import nsmallest
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+@dataclass
+class LibraryStats:
+    """Point-in-time aggregates for the dashboards"""
+    total: int
+    borrowed: int
+    available: int
+    overdue: int
+    genre_counts: Dict[str, int]
+
+
+class LibraryIndex:
+    """id -> Book map plus secondary indexes, updated incrementally.
+
+    ``LibraryManager`` calls ``add`` (insert or replace) and ``remove`` from
+    every mutation method. Removal works from the values captured at ``add``
+    time, so it is safe even when the caller already mutated the book.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[str, object] = {}
+        self.by_genre: Dict[str, Set[str]] = {}
+        self.by_author: Dict[str, Set[str]] = {}
+        self.borrowed: Set[str] = set()
+        # Sorted (due_date, book_id) pairs
+        self.due_dates: List[Tuple[date, str]] = []
+        # Catalogue position of each book, used to return results in list order
+        self.positions: Dict[str, int] = {}
+        self._entries: Dict[str, Tuple[str, str, bool, Optional[date]]] = {}
+
+    def rebuild(self, books: Iterable):
+        self.__init__()
+        for position, book in enumerate(books):
+            self.add(book, position)
+
+    def add(self, book, position: Optional[int] = None):
+        """Index ``book``, replacing any previous version with the same id"""
+        if book.id in self._entries:
+            self._unindex(book.id)
+        if position is not None:
+            self.positions[book.id] = position
+        elif book.id not in self.positions:
+            self.positions[book.id] = len(self.positions)
+
+        self.by_id[book.id] = book
+        self.by_genre.setdefault(book.genre, set()).add(book.id)
+        self.by_author.setdefault(book.author, set()).add(book.id)
+        if book.is_borrowed:
+            self.borrowed.add(book.id)
+            if book.due_date:
+                insort(self.due_dates, (book.due_date, book.id))
+        self._entries[book.id] = (book.genre, book.author, book.is_borrowed, book.due_date)
+
+    def remove(self, book_id: str):
+        if book_id in self._entries:
+            self._unindex(book_id)
+        self.by_id.pop(book_id, None)
+        self.positions.pop(book_id, None)
+
+    def renumber(self, books: Iterable):
+        """Refresh catalogue positions after books were removed from the list"""
+        self.positions = {book.id: position for position, book in enumerate(books)}
+
+    def _unindex(self, book_id: str):
+        genre, author, is_borrowed, due_date = self._entries.pop(book_id)
+        self._discard(self.by_genre, genre, book_id)
+        self._discard(self.by_author, author, book_id)
+        self.borrowed.discard(book_id)
+        if is_borrowed and due_date:
+            i = bisect_right(self.due_dates, (due_date, book_id)) - 1
+            if i >= 0 and self.due_dates[i] == (due_date, book_id):
+                del self.due_dates[i]
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, book_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(book_id)
+            if not ids:
+                del index[key]
+
+    def get(self, book_id: str):
+        return self.by_id.get(book_id)
+
+    def genres(self) -> List[str]:
+        return list(self.by_genre)
+
+    def overdue_count(self, today: date) -> int:
+        return bisect_right(self.due_dates, (today, '\uffff'))
+
+    def stats(self, today: date) -> LibraryStats:
+        """Totals read straight off the maintained sets, without scanning books"""
+        total = len(self.by_id)
+        borrowed = len(self.borrowed)
+        return LibraryStats(
+            total=total,
+            borrowed=borrowed,
+            available=total - borrowed,
+            overdue=self.overdue_count(today),
+            genre_counts={genre: len(ids) for genre, ids in self.by_genre.items()},
+        )
+
+    def overdue_ids(self, today: date) -> List[str]:
+        """Ids of borrowed books due on or before ``today``"""
+        # Matches the old `strptime(due_date) < datetime.now()` check
+        return [book_id for _, book_id in self.due_dates[:self.overdue_count(today)]]
+
+    def matching_ids(self, status: str = "All", genre: str = "All", today: Optional[date] = None) -> Optional[Set[str]]:
+        """Ids matching a status ("All", "Available", "Borrowed", "Overdue")
+        and genre, or None when nothing is filtered out"""
+        ids: Optional[Set[str]] = None
+        if genre != "All":
+            ids = set(self.by_genre.get(genre, ()))
+
+        if status == "Borrowed":
+            ids = self.borrowed if ids is None else ids & self.borrowed
+        elif status == "Overdue":
+            overdue = set(self.overdue_ids(today))
+            ids = overdue if ids is None else ids & overdue
+        elif status == "Available":
+            if ids is None:
+                ids = self.by_id.keys() - self.borrowed
+            else:
+                ids = ids - self.borrowed
+
+        return ids
+
+    def due_between(self, start: date, end: date) -> List[str]:
+        """Ids of borrowed books due from ``start`` to ``end`` inclusive, earliest first"""
+        lo = bisect_left(self.due_dates, (start, ''))
+        hi = bisect_right(self.due_dates, (end, '\uffff'))
+        return [book_id for _, book_id in self.due_dates[lo:hi]]
+
+    def due_within(self, today: date, days: int) -> List[str]:
+        """Ids of borrowed books not yet overdue but due in the next ``days`` days"""
+        start = today + timedelta(days=1)
+        return self.due_between(start, start + timedelta(days=days - 1))
+
+    def filter(self, status: str = "All", genre: str = "All", today: Optional[date] = None) -> List:
+        """Books matching ``status`` and ``genre``, in catalogue order"""
+        ids = self.matching_ids(status, genre, today)
+        if ids is None:
+            return list(self.by_id.values())
+        return [self.by_id[book_id] for book_id in sorted(ids, key=self.positions.__getitem__)]
+
+    def page(self, books: List, status: str = "All", genre: str = "All", today: Optional[date] = None,
+             after: int = -1, limit: int = 20) -> Tuple[List, int]:
+        """One page of matching books after catalogue position ``after``.
+
+        ``books`` is the catalogue list that ``positions`` refer to. Returns
+        ``(page, total_matches)``; only the page itself is materialized.
+        """
+        ids = self.matching_ids(status, genre, today)
+        if ids is None:
+            return books[after + 1:after + 1 + limit], len(self.by_id)
+        positions = self.positions
+        page_ids = nsmallest(limit, (book_id for book_id in ids if positions[book_id] > after),
+                             key=positions.__getitem__)
+        return [self.by_id[book_id] for book_id in page_ids], len(ids)
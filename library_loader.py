@@ -0,0 +1,135 @@
+"""
+Chunked loading of stored library data into an app's ``Book`` objects
+
+Records arrive from ``LibraryStorage.load_chunks`` a chunk at a time, so
+callers can index each chunk as it is built. Invalid records are skipped
+and collected in a ``LoadReport`` to be shown once, rather than raising or
+warning per record.
+"""
+
+from dataclasses import MISSING, dataclass, field, fields
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class LoadReport:
+    books: int = 0
+    history: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self, limit: int = 20) -> str:
+        """The first ``limit`` errors, one per line"""
+        lines = self.errors[:limit]
+        if len(self.errors) > limit:
+            lines.append(f"... and {len(self.errors) - limit} more")
+        return '\n'.join(lines)
+
+
+def _label(record) -> str:
+    if isinstance(record, dict):
+        return str(record.get('title') or record.get('id') or 'untitled')
+    return repr(record)[:40]
+
+
+def _as_int(value) -> int:
+    if type(value) is int:
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        return int(value)
+    raise ValueError("must be a whole number")
+
+
+def _as_bool(value) -> bool:
+    if type(value) is bool:
+        return value
+    if type(value) is int and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise ValueError("must be true or false")
+
+
+# Fields the indexes and analytics rely on the type of, with their coercions
+_TYPED_FIELDS = (('year', _as_int), ('is_borrowed', _as_bool))
+
+
+@lru_cache(maxsize=None)
+def _schema(book_class) -> Tuple[FrozenSet[str], Tuple[str, ...]]:
+    """Field names and required (no default) field names of ``book_class``"""
+    book_fields = fields(book_class)
+    required = tuple(f.name for f in book_fields if f.default is MISSING and f.default_factory is MISSING)
+    return frozenset(f.name for f in book_fields), required
+
+
+def book_from_record(book_class, record) -> Tuple[Optional[object], Optional[str]]:
+    """``(book, None)`` for a valid record, ``(None, reason)`` otherwise.
+
+    Keys that ``book_class`` has no field for are ignored, so data written by
+    an app with extra fields (e.g. ``cover_url``) still loads. ``year`` and
+    ``is_borrowed`` are converted from numeric/boolean strings where
+    possible and rejected otherwise.
+    """
+    if not isinstance(record, dict):
+        return None, "not a JSON object"
+    names, required = _schema(book_class)
+    missing = [name for name in required if record.get(name) is None]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    tags = record.get('tags')
+    if tags is not None and not (type(tags) is list and all(type(tag) is str for tag in tags)):
+        return None, "tags must be a list of strings"
+    if not names.issuperset(record):
+        record = {key: value for key, value in record.items() if key in names}
+    for name, coerce in _TYPED_FIELDS:
+        value = record.get(name)
+        if value is None or name not in names:
+            continue
+        try:
+            converted = coerce(value)
+        except ValueError as e:
+            return None, f"{name} {e} (got {value!r})"
+        if converted is not value:
+            record = {**record, name: converted}
+    try:
+        return book_class(**record), None
+    except (TypeError, ValueError) as e:
+        return None, str(e)
+
+
+def stream_books(storage, book_class, report: LoadReport,
+                 chunk_size: int = 1000) -> Iterator[Tuple[List, List[Dict]]]:
+    """Yield ``(books, history_entries)`` for each stored chunk.
+
+    Invalid books and history entries, and repeated book ids (the first
+    one wins), are left out and described in ``report.errors``.
+    """
+    seen = set()
+    number = 0
+    entry_number = 0
+    for chunk in storage.load_chunks(chunk_size):
+        books = []
+        for record in chunk['books']:
+            number += 1
+            book, error = book_from_record(book_class, record)
+            if book is not None and book.id in seen:
+                book, error = None, f"duplicate id {book.id!r}"
+            if error:
+                report.errors.append(f"Book {number} ({_label(record)}): {error}")
+                continue
+            seen.add(book.id)
+            books.append(book)
+
+        history = []
+        for entry in chunk['borrowing_history']:
+            entry_number += 1
+            if isinstance(entry, dict):
+                history.append(entry)
+            else:
+                report.errors.append(f"History entry {entry_number}: not a JSON object")
+
+        report.books += len(books)
+        report.history += len(history)
+        yield books, history
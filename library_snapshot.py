@@ -0,0 +1,291 @@
+"""
+Binary, memory-mapped catalogue snapshot
+
+An optional companion to ``library_data.json``, written next to it as
+``library_data.json.snap`` whenever the JSON snapshot is rewritten (enable
+with ``BOOKNEST_BINARY_SNAPSHOT=1``). Layout, little-endian:
+
+- header: magic, version, counts, table offsets, and the size/mtime of the
+  JSON file it mirrors (a mismatch means the snapshot is stale)
+- heap: each book's text fields back to back, then history entries as JSON
+- book table: one fixed-size row per book (heap start, text field lengths,
+  year, present/null/flag bits)
+- history table: (heap offset, length) per entry
+- id order: book numbers sorted by id, for lookups without a scan
+
+``MappedSnapshot`` maps the file read-only, so opening it is O(1)
+whatever the catalogue size, the page cache is shared by every process
+reading it, and ``get``/``field`` decode only the record or field asked
+for. Loading the app's catalogue still decodes every record, because its
+search, fuzzy and analytics indexes are built from all of them; the
+snapshot saves the JSON parsing, not that pass. Build one for an
+existing data file with:
+
+    python library_snapshot.py [library_data.json]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'BOOKSNAP'
+VERSION = 1
+
+# Text fields in heap order. Tags are joined with TAG_SEPARATOR; extra is a
+# JSON object holding any key (or value) that doesn't fit the fixed layout
+TEXT_FIELDS = ('id', 'title', 'author', 'genre', 'isbn', 'borrower_name', 'due_date',
+               'summary', 'cover_url', 'tags', 'extra')
+TAG_SEPARATOR = '\x1f'
+TAGS_BIT = TEXT_FIELDS.index('tags')
+# Fields tracked by the present/null bit masks, in bit order
+MASK_FIELDS = TEXT_FIELDS[:-1] + ('year', 'is_borrowed')
+
+HEADER = struct.Struct('<8sIQQQQQQq')
+BOOK_ROW = struct.Struct('<Q' + 'I' * len(TEXT_FIELDS) + 'iHHB')
+HISTORY_ROW = struct.Struct('<QI')
+ORDER_ROW = struct.Struct('<I')
+# Leading heap start + id length of a book row
+ID_PREFIX = struct.Struct('<QI')
+
+_INT32 = range(-2 ** 31, 2 ** 31)
+
+
+def snapshot_file(data_file: str) -> str:
+    return f"{data_file}.snap"
+
+
+def _source_stat(data_file: str) -> Tuple[int, int]:
+    stat = os.stat(data_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _encode_book(book: Dict) -> Tuple[List[bytes], int, int, int, int]:
+    """Heap texts, year, present mask, null mask and flags for one book"""
+    extra = {key: value for key, value in book.items() if key not in MASK_FIELDS}
+    present = null = 0
+    texts = []
+    for bit, name in enumerate(TEXT_FIELDS[:-1]):
+        value = book.get(name)
+        if name in book:
+            present |= 1 << bit
+        if name == 'tags' and value is not None:
+            if isinstance(value, list) and all(isinstance(tag, str) and tag and TAG_SEPARATOR not in tag
+                                               for tag in value):
+                texts.append(TAG_SEPARATOR.join(value).encode('utf-8'))
+            else:
+                extra[name] = value
+                texts.append(b'')
+        elif value is None:
+            null |= 1 << bit
+            texts.append(b'')
+        elif isinstance(value, str):
+            texts.append(value.encode('utf-8'))
+        else:
+            extra[name] = value
+            texts.append(b'')
+
+    year = 0
+    year_bit = MASK_FIELDS.index('year')
+    if 'year' in book:
+        present |= 1 << year_bit
+        if type(book['year']) is int and book['year'] in _INT32:
+            year = book['year']
+        else:
+            extra['year'] = book['year']
+
+    flags = 0
+    borrowed_bit = MASK_FIELDS.index('is_borrowed')
+    if 'is_borrowed' in book:
+        present |= 1 << borrowed_bit
+        if type(book['is_borrowed']) is bool:
+            flags = int(book['is_borrowed'])
+        else:
+            extra['is_borrowed'] = book['is_borrowed']
+
+    texts.append(json.dumps(extra, ensure_ascii=False).encode('utf-8') if extra else b'')
+    return texts, year, present, null, flags
+
+
+def write_snapshot(path: str, books: Iterable[Dict], history: Iterable[Dict], source_file: str):
+    """Write the binary snapshot of ``source_file``'s data (atomically).
+
+    ``books``/``history`` are the records as stored on disk (dates as ISO
+    strings) and are consumed in a single pass.
+    """
+    tmp_file = f"{path}.tmp"
+    book_rows = bytearray()
+    history_rows = bytearray()
+    ids = []
+    with open(tmp_file, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        offset = HEADER.size
+        for book in books:
+            texts, year, present, null, flags = _encode_book(book)
+            book_rows += BOOK_ROW.pack(offset, *map(len, texts), year, present, null, flags)
+            ids.append(book.get('id') if isinstance(book.get('id'), str) else '')
+            for text in texts:
+                f.write(text)
+                offset += len(text)
+        for entry in history:
+            blob = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+            history_rows += HISTORY_ROW.pack(offset, len(blob))
+            f.write(blob)
+            offset += len(blob)
+
+        book_table = offset
+        f.write(book_rows)
+        history_table = book_table + len(book_rows)
+        f.write(history_rows)
+        order_table = history_table + len(history_rows)
+        f.write(b''.join(ORDER_ROW.pack(i) for i in sorted(range(len(ids)), key=ids.__getitem__)))
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(ids), len(history_rows) // HISTORY_ROW.size,
+                            book_table, history_table, order_table, *_source_stat(source_file)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+class MappedSnapshot:
+    """Read-only, lazily decoded view of a binary snapshot"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, self.book_count, self.history_count, self._book_table, self._history_table,
+             self._order_table, self.source_size, self.source_mtime_ns) = HEADER.unpack_from(self._map)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a BookNest snapshot (version {VERSION})")
+
+    @classmethod
+    def open_fresh(cls, data_file: str) -> Optional['MappedSnapshot']:
+        """The snapshot for ``data_file`` if it exists and mirrors its current contents"""
+        try:
+            snapshot = cls(snapshot_file(data_file))
+        except (OSError, ValueError):
+            return None
+        try:
+            if (snapshot.source_size, snapshot.source_mtime_ns) == _source_stat(data_file):
+                return snapshot
+        except OSError:
+            pass
+        snapshot.close()
+        return None
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.book_count
+
+    def _row(self, number: int) -> tuple:
+        if not 0 <= number < self.book_count:
+            raise IndexError(number)
+        return BOOK_ROW.unpack_from(self._map, self._book_table + number * BOOK_ROW.size)
+
+    def field(self, number: int, name: str):
+        """One field of book ``number`` without decoding the rest"""
+        return self._decode(number, (name,)).get(name)
+
+    def record(self, number: int) -> Dict:
+        """Book ``number`` as the dict it was written from"""
+        return self._decode(number)
+
+    def _decode(self, number: int, wanted: Optional[Tuple[str, ...]] = None) -> Dict:
+        row = self._row(number)
+        lengths = row[1:1 + len(TEXT_FIELDS)]
+        year, present, null, flags = row[1 + len(TEXT_FIELDS):]
+        blob = self._map[row[0]:row[0] + sum(lengths)]
+
+        record = {}
+        offset = 0
+        for bit, name in enumerate(MASK_FIELDS[:TAGS_BIT + 1]):
+            end = offset + lengths[bit]
+            if present >> bit & 1 and (wanted is None or name in wanted):
+                if null >> bit & 1:
+                    record[name] = None
+                elif bit == TAGS_BIT:
+                    tags = blob[offset:end].decode('utf-8')
+                    record[name] = tags.split(TAG_SEPARATOR) if tags else []
+                else:
+                    record[name] = blob[offset:end].decode('utf-8')
+            offset = end
+        for name, value in (('year', year), ('is_borrowed', bool(flags & 1))):
+            if present >> MASK_FIELDS.index(name) & 1 and (wanted is None or name in wanted):
+                record[name] = value
+
+        if lengths[-1]:
+            extra = json.loads(blob[offset:])
+            record.update(extra if wanted is None else
+                          {key: value for key, value in extra.items() if key in wanted})
+        return record
+
+    def _id(self, number: int) -> str:
+        """Raw id text of book ``number`` ('' if missing or not a string)"""
+        start, length = ID_PREFIX.unpack_from(self._map, self._book_table + number * BOOK_ROW.size)
+        return self._map[start:start + length].decode('utf-8')
+
+    def __getitem__(self, number: int) -> Dict:
+        return self.record(number)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for number in range(self.book_count):
+            yield self.record(number)
+
+    def history(self) -> Iterator[Dict]:
+        for number in range(self.history_count):
+            offset, length = HISTORY_ROW.unpack_from(self._map, self._history_table + number * HISTORY_ROW.size)
+            yield json.loads(self._map[offset:offset + length])
+
+    def get(self, book_id: str) -> Optional[Dict]:
+        """Binary search the id order table; decodes O(log n) ids"""
+        low, high = 0, self.book_count
+        while low < high:
+            middle = (low + high) // 2
+            number = ORDER_ROW.unpack_from(self._map, self._order_table + middle * ORDER_ROW.size)[0]
+            found = self._id(number)
+            if found == book_id:
+                return self.record(number)
+            if found < book_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+
+def main():
+    from json_stream import iter_array_items
+
+    parser = argparse.ArgumentParser(description="Build the binary snapshot for a BookNest data file")
+    parser.add_argument("data_file", nargs="?", default="library_data.json")
+    args = parser.parse_args()
+
+    # Two streaming passes keep memory flat: books, then history
+    def section(name):
+        with open(args.data_file, 'r', encoding='utf-8') as f:
+            for key, record in iter_array_items(f):
+                if key == name and isinstance(record, dict):
+                    yield record
+
+    write_snapshot(snapshot_file(args.data_file), section('books'), section('borrowing_history'), args.data_file)
+    with MappedSnapshot(snapshot_file(args.data_file)) as snapshot:
+        print(f"✅ Wrote {snapshot_file(args.data_file)}: {len(snapshot):,} books, "
+              f"{snapshot.history_count:,} history entries")
+
+
+if __name__ == "__main__":
+    main()
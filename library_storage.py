@@ -0,0 +1,502 @@
+"""
+Storage engines for BookNest library data
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from json_stream import iter_array_items
+from library_dates import decode_book, decode_history, encode_book, encode_history, format_date
+from library_snapshot import MappedSnapshot, snapshot_file, write_snapshot
+
+# Locks are shared per data file so every LibraryManager in the process
+# (one per Streamlit session) serializes on the same journal
+_file_locks: Dict[str, Tuple[threading.Lock, threading.Lock]] = {}
+_file_locks_guard = threading.Lock()
+# Appends since the last compaction and the running compactor, per data
+# file; guarded by that file's journal lock
+_journal_entries: Dict[str, int] = {}
+_compactors: Dict[str, threading.Thread] = {}
+
+
+def _locks_for(path: str) -> Tuple[threading.Lock, threading.Lock]:
+    with _file_locks_guard:
+        key = os.path.abspath(path)
+        if key not in _file_locks:
+            _file_locks[key] = (threading.Lock(), threading.Lock())
+        return _file_locks[key]
+
+
+def new_book_id() -> str:
+    """An id for a new book that cannot clash with existing or concurrently added ones"""
+    return uuid.uuid4().hex[:12]
+
+
+def _chunked(records: Iterator[Tuple[str, object]], chunk_size: int) -> Iterator[Dict]:
+    """Group ``(section, record)`` pairs into ``load``-shaped chunks"""
+    chunk = {'books': [], 'borrowing_history': []}
+    count = 0
+    for section, record in records:
+        chunk[section].append(record)
+        count += 1
+        if count >= chunk_size:
+            yield chunk
+            chunk = {'books': [], 'borrowing_history': []}
+            count = 0
+    if count:
+        yield chunk
+
+
+class LibraryStorage(ABC):
+    """Interface shared by the storage engines.
+
+    Engines deal in plain dicts (``asdict(book)``), so every app can keep its
+    own ``Book`` dataclass. Dates are ``datetime.date`` objects in those
+    dicts and ISO strings on disk (see ``library_dates``).
+    """
+
+    def load(self) -> Dict:
+        """Return ``{'books': [...], 'borrowing_history': [...]}``"""
+        data = {'books': [], 'borrowing_history': []}
+        for chunk in self.load_chunks():
+            data['books'].extend(chunk['books'])
+            data['borrowing_history'].extend(chunk['borrowing_history'])
+        return data
+
+    @abstractmethod
+    def load_chunks(self, chunk_size: int = 1000) -> Iterator[Dict]:
+        """Yield the same data as ``load`` in chunks of at most ``chunk_size`` records.
+
+        Each chunk is ``{'books': [...], 'borrowing_history': [...]}``; all
+        books come before any history.
+        """
+
+    @abstractmethod
+    def save_all(self, books: List[Dict], history: List[Dict]):
+        """Replace everything stored with ``books`` and ``history``"""
+
+    @abstractmethod
+    def put_book(self, book: Dict):
+        """Insert or replace one book"""
+
+    def put_books(self, books: List[Dict]):
+        """Insert or replace many books at once"""
+        for book in books:
+            self.put_book(book)
+
+    @abstractmethod
+    def delete_book(self, book_id: str):
+        """Remove one book by id"""
+
+    @abstractmethod
+    def append_history(self, entry: Dict):
+        """Append one borrowing-history entry"""
+
+
+class JsonStorage(LibraryStorage):
+    """JSON snapshot plus an append-only journal of mutations.
+
+    Every mutation is appended to ``<data_file>.journal`` as one JSON line
+    instead of rewriting the whole snapshot. Once the journal grows past
+    ``compact_every`` entries, a background thread folds it into
+    ``library_data.json``. Loading replays snapshot + journal.
+
+    With ``binary_snapshot`` a memory-mapped copy of the snapshot
+    (``library_snapshot``) is written alongside it and read instead of
+    parsing the JSON, as long as it still mirrors the JSON file.
+    """
+
+    def __init__(self, data_file: str = "library_data.json", compact_every: int = 500,
+                 binary_snapshot: bool = False):
+        self.data_file = data_file
+        self.binary_snapshot = binary_snapshot
+        self.journal_file = f"{data_file}.journal"
+        # Journal being folded into the snapshot by the background compactor
+        self.compacting_file = f"{data_file}.journal.compacting"
+        self.compact_every = compact_every
+        self._lock, self._compact_lock = _locks_for(data_file)
+        self._key = os.path.abspath(data_file)
+        with self._lock:
+            if self._key not in _journal_entries:
+                # Pick up where an earlier process left off
+                _journal_entries[self._key] = sum(self._count_lines(journal)
+                                                  for journal in (self.compacting_file, self.journal_file))
+
+    def load_chunks(self, chunk_size: int = 1000) -> Iterator[Dict]:
+        """Stream the snapshot with the journal applied on top of it.
+
+        The journal (at most ``compact_every`` records, usually) is replayed
+        into memory first; the snapshot is then parsed incrementally, so the
+        full file is never held as one string or one list of dicts. The
+        snapshot is opened together with the journal read, so a compaction
+        in between cannot fold journal records into the snapshot we stream.
+        """
+        journal_books: Dict[str, Dict] = {}
+        journal_history: List[Dict] = []
+        deleted: Set[str] = set()
+        with self._compact_lock:
+            snapshot = self._open_snapshot()
+            # A crash mid-compaction leaves the rotated journal behind
+            for journal in (self.compacting_file, self.journal_file):
+                self._replay(journal, journal_books, journal_history, deleted)
+
+        def records():
+            for section, record in snapshot:
+                if section not in ('books', 'borrowing_history'):
+                    continue
+                if not isinstance(record, dict):
+                    # Left for the caller to report as invalid
+                    yield section, record
+                elif section == 'books':
+                    # Deleted, or deleted and re-added (which moves it to the end)
+                    if record.get('id') not in deleted:
+                        yield section, decode_book(journal_books.pop(record.get('id'), record))
+                else:
+                    yield section, decode_history(record)
+            # Books first added by the journal, then its history entries
+            for record in journal_books.values():
+                yield 'books', decode_book(record)
+            for entry in journal_history:
+                yield 'borrowing_history', decode_history(entry)
+
+        return _chunked(records(), chunk_size)
+
+    def save_all(self, books: List[Dict], history: List[Dict]):
+        """Write a full snapshot and discard the journal"""
+        data = {'books': [encode_book(book) for book in books],
+                'borrowing_history': [encode_history(entry) for entry in history]}
+        with self._compact_lock, self._lock:
+            self._write_snapshot(data)
+            for journal in (self.journal_file, self.compacting_file):
+                if os.path.exists(journal):
+                    os.remove(journal)
+            _journal_entries[self._key] = 0
+
+    def put_book(self, book: Dict):
+        self._append({'op': 'put', 'book': encode_book(book)})
+
+    def put_books(self, books: List[Dict]):
+        """Journal a batch of puts with a single write and fsync"""
+        self._append_many([{'op': 'put', 'book': encode_book(book)} for book in books])
+
+    def delete_book(self, book_id: str):
+        self._append({'op': 'delete', 'id': book_id})
+
+    def append_history(self, entry: Dict):
+        self._append({'op': 'history', 'entry': encode_history(entry)})
+
+    def compact(self):
+        """Fold the journal into the snapshot (blocking)"""
+        with self._compact_lock:
+            with self._lock:
+                if not os.path.exists(self.compacting_file):
+                    if not os.path.exists(self.journal_file):
+                        return
+                    # New mutations go to a fresh journal while we compact
+                    os.replace(self.journal_file, self.compacting_file)
+                    _journal_entries[self._key] = 0
+
+            data = self._read_snapshot()
+            books = {book['id']: book for book in data.get('books', [])}
+            history = data.get('borrowing_history', [])
+            self._replay(self.compacting_file, books, history)
+
+            self._write_snapshot({'books': list(books.values()), 'borrowing_history': history})
+            os.remove(self.compacting_file)
+
+    def _append(self, record: Dict):
+        self._append_many([record])
+
+    def _append_many(self, records: List[Dict]):
+        if not records:
+            return
+        lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        with self._lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            _journal_entries[self._key] += len(records)
+            should_compact = _journal_entries[self._key] >= self.compact_every
+        if should_compact:
+            self._start_compaction()
+
+    def _start_compaction(self):
+        with self._lock:
+            compactor = _compactors.get(self._key)
+            if compactor and compactor.is_alive():
+                return
+            compactor = _compactors[self._key] = threading.Thread(
+                target=self.compact, name="journal-compactor", daemon=True)
+        compactor.start()
+
+    def _open_snapshot(self) -> Iterator[Tuple[str, object]]:
+        """Open the current snapshot now; its records are read as the result is iterated.
+
+        A compaction replaces the snapshot file rather than rewriting it, so
+        the records stay those of the snapshot opened here.
+        """
+        snapshot = MappedSnapshot.open_fresh(self.data_file) if self.binary_snapshot else None
+        if snapshot is not None:
+            return self._iter_mapped(snapshot)
+        try:
+            f = open(self.data_file, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return iter(())
+        return self._iter_json(f)
+
+    @staticmethod
+    def _iter_mapped(snapshot: MappedSnapshot) -> Iterator[Tuple[str, object]]:
+        with snapshot:
+            for record in snapshot:
+                yield 'books', record
+            for entry in snapshot.history():
+                yield 'borrowing_history', entry
+
+    @staticmethod
+    def _iter_json(f) -> Iterator[Tuple[str, object]]:
+        with f:
+            yield from iter_array_items(f)
+
+    def _read_snapshot(self) -> Dict:
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'books': [], 'borrowing_history': []}
+
+    def _write_snapshot(self, data: Dict):
+        # Write to a temp file first so a crash never truncates the snapshot
+        tmp_file = f"{self.data_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.data_file)
+        if self.binary_snapshot:
+            write_snapshot(snapshot_file(self.data_file), data.get('books', []),
+                           data.get('borrowing_history', []), self.data_file)
+
+    @staticmethod
+    def _count_lines(path: str) -> int:
+        try:
+            with open(path, 'rb') as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _replay(journal_file: str, books: Dict[str, Dict], history: List[Dict],
+                deleted: Optional[Set[str]] = None) -> int:
+        """Apply journal records to ``books``/``history`` in place, return the count.
+
+        Ids of deleted books are also added to ``deleted`` when given.
+        """
+        if not os.path.exists(journal_file):
+            return 0
+
+        applied = 0
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write at the tail of the journal
+                    continue
+
+                op = record.get('op')
+                if op == 'put':
+                    books[record['book']['id']] = record['book']
+                elif op == 'delete':
+                    books.pop(record['id'], None)
+                    if deleted is not None:
+                        deleted.add(record['id'])
+                elif op == 'history':
+                    history.append(record['entry'])
+                applied += 1
+        return applied
+
+
+class SqliteStorage(LibraryStorage):
+    """SQLite engine with indexes on id, isbn, genre, author and loan status.
+
+    The full book record is kept as JSON in ``data`` so app-specific fields
+    (e.g. ``cover_url``) round-trip; the indexed fields are mirrored into
+    columns. Every write is a transaction, so a crash can never leave a
+    half-written catalogue behind.
+    """
+
+    def __init__(self, db_file: str = "library_data.db", import_from: Optional[str] = "library_data.json"):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        # Streamlit runs each session on its own thread
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        # The JSON import runs once per database; emptiness alone would
+        # bring deleted books back from a stale JSON file on every start
+        if not self._imported():
+            if import_from and self._is_empty() and os.path.exists(import_from):
+                data = JsonStorage(import_from).load()
+                self.save_all(data['books'], data['borrowing_history'])
+            self._mark_imported()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS books (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    isbn TEXT,
+                    genre TEXT,
+                    author TEXT,
+                    is_borrowed INTEGER NOT NULL DEFAULT 0,
+                    due_date TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_books_isbn ON books(isbn);
+                CREATE INDEX IF NOT EXISTS idx_books_genre ON books(genre);
+                CREATE INDEX IF NOT EXISTS idx_books_author ON books(author);
+                CREATE INDEX IF NOT EXISTS idx_books_loans ON books(is_borrowed, due_date);
+                CREATE TABLE IF NOT EXISTS borrowing_history (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book_id TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_history_book ON borrowing_history(book_id);
+            """)
+
+    def _imported(self) -> bool:
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+
+    def _mark_imported(self):
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA user_version = 1")
+
+    def _is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM books LIMIT 1").fetchone() is None
+
+    @staticmethod
+    def _book_row(book: Dict) -> Tuple:
+        book = encode_book(book)
+        return (
+            book['id'],
+            book.get('isbn'),
+            book.get('genre'),
+            book.get('author'),
+            1 if book.get('is_borrowed') else 0,
+            book.get('due_date'),
+            json.dumps(book, ensure_ascii=False),
+        )
+
+    def load_chunks(self, chunk_size: int = 1000) -> Iterator[Dict]:
+        """Page through both tables by ``seq`` so no lock is held between chunks"""
+        for table, decode in (('books', decode_book), ('borrowing_history', decode_history)):
+            last_seq = -1
+            while True:
+                with self._lock:
+                    rows = self._conn.execute(
+                        f"SELECT seq, data FROM {table} WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, chunk_size)
+                    ).fetchall()
+                if not rows:
+                    break
+                last_seq = rows[-1][0]
+                records = [decode(json.loads(data)) for _, data in rows]
+                if table == 'books':
+                    yield {'books': records, 'borrowing_history': []}
+                else:
+                    yield {'books': [], 'borrowing_history': records}
+
+    def save_all(self, books: List[Dict], history: List[Dict]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM books")
+            self._conn.execute("DELETE FROM borrowing_history")
+            self._conn.executemany(
+                "INSERT INTO books (id, isbn, genre, author, is_borrowed, due_date, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._book_row(book) for book in books]
+            )
+            self._conn.executemany(
+                "INSERT INTO borrowing_history (book_id, data) VALUES (?, ?)",
+                [(entry.get('book_id'), json.dumps(encode_history(entry), ensure_ascii=False)) for entry in history]
+            )
+
+    _UPSERT_BOOK = """INSERT INTO books (id, isbn, genre, author, is_borrowed, due_date, data)
+                      VALUES (?, ?, ?, ?, ?, ?, ?)
+                      ON CONFLICT(id) DO UPDATE SET
+                          isbn = excluded.isbn, genre = excluded.genre, author = excluded.author,
+                          is_borrowed = excluded.is_borrowed, due_date = excluded.due_date, data = excluded.data"""
+
+    def put_book(self, book: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(self._UPSERT_BOOK, self._book_row(book))
+
+    def put_books(self, books: List[Dict]):
+        """Upsert a batch of books in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(self._UPSERT_BOOK, [self._book_row(book) for book in books])
+
+    def delete_book(self, book_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM books WHERE id = ?", (book_id,))
+
+    def append_history(self, entry: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO borrowing_history (book_id, data) VALUES (?, ?)",
+                (entry.get('book_id'), json.dumps(encode_history(entry), ensure_ascii=False))
+            )
+
+    def get_book(self, book_id: str) -> Optional[Dict]:
+        """Indexed single-book lookup"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM books WHERE id = ?", (book_id,)).fetchone()
+        return decode_book(json.loads(row[0])) if row else None
+
+    def find_books(self, genre: Optional[str] = None, author: Optional[str] = None,
+                   isbn: Optional[str] = None, is_borrowed: Optional[bool] = None,
+                   due_before=None) -> List[Dict]:
+        """Indexed filter query; ``due_before`` takes a ``date`` or ``%Y-%m-%d`` string"""
+        clauses, params = [], []
+        for column, value in (('genre', genre), ('author', author), ('isbn', isbn)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if is_borrowed is not None:
+            clauses.append("is_borrowed = ?")
+            params.append(1 if is_borrowed else 0)
+        if due_before is not None:
+            clauses.append("is_borrowed = 1 AND due_date < ?")
+            params.append(format_date(due_before))
+
+        query = "SELECT data FROM books"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY seq"
+        with self._lock:
+            return [decode_book(json.loads(row[0])) for row in self._conn.execute(query, params)]
+
+
+def create_storage(data_file: str = "library_data.json", backend: Optional[str] = None) -> LibraryStorage:
+    """Build the storage engine selected by ``backend`` or ``BOOKNEST_STORAGE``.
+
+    ``json`` (default) keeps the existing ``library_data.json`` format;
+    ``sqlite`` stores the catalogue next to it in ``library_data.db`` and
+    imports the JSON file on first use. For ``json``, setting
+    ``BOOKNEST_BINARY_SNAPSHOT=1`` also keeps a memory-mapped binary copy.
+    """
+    backend = (backend or os.environ.get('BOOKNEST_STORAGE', 'json')).lower()
+    if backend == 'sqlite':
+        db_file = os.path.splitext(data_file)[0] + '.db'
+        return SqliteStorage(db_file, import_from=data_file)
+    if backend == 'json':
+        return JsonStorage(data_file, binary_snapshot=os.environ.get('BOOKNEST_BINARY_SNAPSHOT') == '1')
+    raise ValueError(f"Unknown storage backend: {backend}")
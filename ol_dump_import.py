@@ -0,0 +1,251 @@
+"""
+Offline importer for Open Library bulk data dumps
+
+Streams a works dump (https://openlibrary.org/developers/dumps) into the
+library store without going through the search API. Dumps are read line by
+line, gzipped or plain, in either the official tab-separated layout
+(type, key, revision, last_modified, JSON) or as bare JSON lines.
+
+Author names and ISBNs live in separate dumps. When ``--authors`` /
+``--editions`` are given they are first loaded into an on-disk SQLite
+lookup next to the data file, so memory stays bounded however large the
+dumps are. Chunks of works are then converted on every core and written
+with one bulk ``put_books`` per chunk:
+
+    python ol_dump_import.py ol_dump_works.txt.gz \\
+        --authors ol_dump_authors.txt.gz --editions ol_dump_editions.txt.gz
+
+Books are keyed by their Open Library work id, so re-running an import
+updates books instead of duplicating them. For multi-million-book catalogues
+use ``BOOKNEST_STORAGE=sqlite``.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional
+
+from genre_classifier import default_classifier
+from open_library_records import book_record
+
+YEAR_PATTERN = re.compile(r"\b(\d{4})\b")
+
+# Lookup connection opened once per worker process
+_lookup: Optional[sqlite3.Connection] = None
+
+
+def open_dump(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def parse_line(line: str) -> Optional[Dict]:
+    """Decode one dump line (TSV with a trailing JSON column, or a JSON line)"""
+    line = line.rstrip('\n')
+    if not line:
+        return None
+    if not line.startswith('{'):
+        line = line.rsplit('\t', 1)[-1]
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    with open_dump(path) as f:
+        for line in f:
+            record = parse_line(line)
+            if record is not None:
+                yield record
+
+
+def iter_chunks(path: str, chunk_size: int) -> Iterator[List[str]]:
+    """Raw lines in chunks, so parsing happens in the worker processes"""
+    with open_dump(path) as f:
+        while True:
+            chunk = list(islice(f, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def build_lookup(lookup_file: str, authors_dump: Optional[str], editions_dump: Optional[str],
+                 batch_size: int = 50000):
+    """Load author names and work ISBNs from their dumps into SQLite"""
+    conn = sqlite3.connect(lookup_file)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("CREATE TABLE IF NOT EXISTS authors (key TEXT PRIMARY KEY, name TEXT NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS work_isbns (work_key TEXT PRIMARY KEY, isbn TEXT NOT NULL)")
+
+    def load(path, table, rows):
+        count = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            with conn:
+                conn.executemany(f"INSERT OR IGNORE INTO {table} VALUES (?, ?)", batch)
+            count += len(batch)
+            print(f"  {table}: {count:,} rows from {os.path.basename(path)}")
+
+    if authors_dump:
+        load(authors_dump, 'authors', (
+            (record['key'], record['name'])
+            for record in iter_records(authors_dump) if record.get('key') and record.get('name')
+        ))
+    if editions_dump:
+        load(editions_dump, 'work_isbns', (
+            (work['key'], isbn)
+            for record in iter_records(editions_dump)
+            for isbn in [(record.get('isbn_13') or record.get('isbn_10') or [None])[0]] if isbn
+            for work in record.get('works', [])[:1] if work.get('key')
+        ))
+    conn.close()
+
+
+def _init_worker(lookup_file: Optional[str]):
+    global _lookup
+    if lookup_file and os.path.exists(lookup_file):
+        _lookup = sqlite3.connect(f"file:{lookup_file}?mode=ro", uri=True)
+
+
+def _lookup_many(table: str, key_column: str, value_column: str, keys: List[str]) -> Dict[str, str]:
+    if _lookup is None or not keys:
+        return {}
+    found = {}
+    for start in range(0, len(keys), 500):
+        batch = keys[start:start + 500]
+        placeholders = ','.join('?' * len(batch))
+        found.update(_lookup.execute(
+            f"SELECT {key_column}, {value_column} FROM {table} WHERE {key_column} IN ({placeholders})", batch
+        ))
+    return found
+
+
+def work_to_search_doc(work: Dict, author_names: Dict[str, str], isbns: Dict[str, str]) -> Dict:
+    """Reshape a works-dump record like a search API document"""
+    doc = {'key': work['key'], 'title': work.get('title', 'Unknown Title')}
+
+    names = [author_names[key] for key in _author_keys(work) if key in author_names]
+    if names:
+        doc['author_name'] = names
+
+    match = YEAR_PATTERN.search(str(work.get('first_publish_date', '')))
+    if match:
+        doc['first_publish_year'] = int(match.group(1))
+
+    if work['key'] in isbns:
+        doc['isbn'] = [isbns[work['key']]]
+
+    subjects = work.get('subjects', [])
+    if subjects:
+        doc['subject'] = [str(subject) for subject in subjects]
+
+    covers = [cover for cover in work.get('covers', []) if isinstance(cover, int) and cover > 0]
+    if covers:
+        doc['cover_i'] = covers[0]
+    return doc
+
+
+def _author_keys(work: Dict) -> List[str]:
+    keys = []
+    for entry in work.get('authors', []):
+        author = entry.get('author') if isinstance(entry, dict) else None
+        key = author.get('key') if isinstance(author, dict) else None
+        if key:
+            keys.append(key)
+    return keys
+
+
+def convert_chunk(lines: List[str]) -> List[Dict]:
+    """Worker: parse a chunk of works-dump lines into book dicts"""
+    works = []
+    for line in lines:
+        record = parse_line(line)
+        if record and record.get('key', '').startswith('/works/') and record.get('title'):
+            works.append(record)
+
+    author_names = _lookup_many('authors', 'key', 'name',
+                                list({key for work in works for key in _author_keys(work)}))
+    isbns = _lookup_many('work_isbns', 'work_key', 'isbn', [work['key'] for work in works])
+
+    docs = [work_to_search_doc(work, author_names, isbns) for work in works]
+    genres = default_classifier().classify_many(doc.get('subject', []) for doc in docs)
+    books = []
+    for doc, genre in zip(docs, genres):
+        book = book_record(doc, doc['key'].replace('/works/', ''), genre)
+        book.update(is_borrowed=False, borrower_name="", due_date=None, summary="")
+        books.append(book)
+    return books
+
+
+def import_dump(works_dump: str, storage, lookup_file: Optional[str] = None, workers: Optional[int] = None,
+                chunk_size: int = 5000, limit: Optional[int] = None) -> int:
+    """Stream ``works_dump`` into ``storage``; return the number of books written"""
+    workers = workers or os.cpu_count() or 1
+    imported = 0
+    started = time.time()
+    with Pool(workers, initializer=_init_worker, initargs=(lookup_file,)) as pool:
+        # Bounded number of chunks in flight keeps memory flat on huge dumps
+        in_flight = deque()
+        chunks = iter_chunks(works_dump, chunk_size)
+        while True:
+            while len(in_flight) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                in_flight.append(pool.apply_async(convert_chunk, (chunk,)))
+            if not in_flight:
+                break
+
+            books = in_flight.popleft().get()
+            if limit is not None:
+                books = books[:limit - imported]
+            storage.put_books(books)
+            imported += len(books)
+
+            rate = imported / max(time.time() - started, 1e-6)
+            print(f"  {imported:,} books imported ({rate:,.0f}/s)")
+            if limit is not None and imported >= limit:
+                pool.terminate()
+                break
+    return imported
+
+
+def main():
+    from library_storage import create_storage
+
+    parser = argparse.ArgumentParser(description="Import an Open Library works dump into BookNest")
+    parser.add_argument("works_dump", help="ol_dump_works_*.txt.gz (or JSON lines)")
+    parser.add_argument("--authors", help="ol_dump_authors_*.txt.gz, to resolve author names")
+    parser.add_argument("--editions", help="ol_dump_editions_*.txt.gz, to resolve ISBNs")
+    parser.add_argument("--data-file", default="library_data.json")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many books")
+    args = parser.parse_args()
+
+    lookup_file = None
+    if args.authors or args.editions:
+        lookup_file = os.path.splitext(args.data_file)[0] + "_ol_lookup.db"
+        print(f"🔗 Building author/ISBN lookup in {lookup_file}")
+        build_lookup(lookup_file, args.authors, args.editions)
+
+    storage = create_storage(args.data_file)
+    print(f"📚 Importing works from {args.works_dump}")
+    imported = import_dump(args.works_dump, storage, lookup_file, args.workers, args.chunk_size, args.limit)
+    print(f"✅ Imported {imported:,} books")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Concurrent Open Library import pipeline
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class ConcurrentImporter:
+    """Fans out Open Library searches and per-book conversion + summary work.
+
+    Every search runs on a bounded thread pool; as soon as a search returns,
+    each of its results is converted and summarized on the same pool. The
+    callables run on worker threads, so they must not touch Streamlit.
+    """
+
+    def __init__(self, search: Callable[[str, int], List[Dict]], convert: Callable[[Dict], object],
+                 summarize: Optional[Callable[[object], str]] = None, max_workers: int = 8):
+        self.search = search
+        self.convert = convert
+        self.summarize = summarize
+        self.max_workers = max_workers
+
+    def _prepare(self, result: Dict):
+        book = self.convert(result)
+        if book is not None and self.summarize is not None:
+            book.summary = self.summarize(book)
+        return book
+
+    def run(self, queries: List[str], per_query: int = 3) -> Iterator[Tuple[str, object, Optional[Exception]]]:
+        """Yield ``(query, book, error)`` as each book finishes.
+
+        Results are yielded on the calling thread in completion order, so the
+        caller can add each book to the library (and update the UI) straight
+        away. ``book`` is None when a search or conversion failed.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self.search, query, per_query): ('search', query) for query in queries}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, query = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        yield query, None, e
+                        continue
+                    if kind == 'search':
+                        for doc in result:
+                            pending[executor.submit(self._prepare, doc)] = ('book', query)
+                    elif result is not None:
+                        yield query, result, None
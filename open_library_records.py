@@ -0,0 +1,53 @@
+"""
+Conversion of Open Library records into BookNest book dicts
+
+Shared by the live API client in the apps and the offline dump importer so
+both produce identical books.
+"""
+
+from typing import Dict, List, Optional
+
+from genre_classifier import default_classifier
+
+COVERS_URL = "https://covers.openlibrary.org/b"
+
+
+def determine_genre(subjects: List[str]) -> str:
+    """Genre for a list of subjects, per the rules in genre_rules.json"""
+    return default_classifier().genre_for(subjects)
+
+
+def cover_url(cover_id: int, size: str = "M") -> str:
+    if cover_id:
+        return f"{COVERS_URL}/id/{cover_id}-{size}.jpg"
+    return ""
+
+
+def book_record(ol_book: Dict, book_id: str, genre: Optional[str] = None) -> Dict:
+    """Book fields for an Open Library search document.
+
+    ``ol_book`` uses the search API's shape (``title``, ``author_name``,
+    ``first_publish_year``, ``isbn``, ``subject``, ``cover_i``, ``key``).
+    Pass ``genre`` when it was already classified in a batch.
+    """
+    title = ol_book.get('title', 'Unknown Title')
+    authors = ol_book.get('author_name', ['Unknown Author'])
+    author = ', '.join(authors[:2])  # Take first 2 authors
+    year = ol_book.get('first_publish_year', 2000)
+
+    isbns = ol_book.get('isbn', [])
+    isbn = isbns[0] if isbns else f"OL-{ol_book.get('key', '').replace('/works/', '')}"
+
+    # Subjects give the genre and the first 5 become tags
+    subjects = ol_book.get('subject', [])
+
+    return {
+        'id': book_id,
+        'title': title,
+        'author': author,
+        'genre': genre or determine_genre(subjects),
+        'year': int(year) if year else 2000,
+        'isbn': isbn,
+        'tags': subjects[:5],
+        'cover_url': cover_url(ol_book.get('cover_i')),
+    }
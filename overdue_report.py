@@ -0,0 +1,105 @@
+"""
+Overdue and due-soon reports built from the due-date index
+
+Run directly to print (or export) the report for library_data.json:
+
+    python overdue_report.py [--as-of 2024-06-01] [--due-within 3] [--csv report.csv]
+"""
+
+import argparse
+import csv
+import io
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from library_index import LibraryIndex
+
+
+@dataclass
+class LoanItem:
+    book_id: str
+    title: str
+    borrower_name: str
+    due_date: date
+    # Positive when overdue, negative when the book is due in the future
+    days_overdue: int
+
+
+def _items(index: LibraryIndex, book_ids: List[str], as_of: date) -> List[LoanItem]:
+    items = []
+    for book_id in book_ids:
+        book = index.get(book_id)
+        items.append(LoanItem(
+            book_id=book.id,
+            title=book.title,
+            borrower_name=book.borrower_name,
+            due_date=book.due_date,
+            days_overdue=(as_of - book.due_date).days,
+        ))
+    return items
+
+
+def overdue_items(index: LibraryIndex, as_of: Optional[date] = None) -> List[LoanItem]:
+    """Loans due on or before ``as_of`` (default today), oldest first"""
+    as_of = as_of or datetime.now().date()
+    return _items(index, index.overdue_ids(as_of), as_of)
+
+
+def due_soon_items(index: LibraryIndex, days: int, as_of: Optional[date] = None) -> List[LoanItem]:
+    """Loans falling due in the ``days`` days after ``as_of``, for reminders"""
+    as_of = as_of or datetime.now().date()
+    return _items(index, index.due_within(as_of, days), as_of)
+
+
+def group_by_borrower(items: List[LoanItem]) -> Dict[str, List[LoanItem]]:
+    """One entry per borrower, so each gets a single reminder listing every loan"""
+    grouped: Dict[str, List[LoanItem]] = {}
+    for item in items:
+        grouped.setdefault(item.borrower_name or "Unknown borrower", []).append(item)
+    return grouped
+
+
+def to_csv(items: List[LoanItem]) -> str:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=['book_id', 'title', 'borrower_name', 'due_date', 'days_overdue'])
+    writer.writeheader()
+    for item in items:
+        writer.writerow(asdict(item))
+    return output.getvalue()
+
+
+def main():
+    from library_storage import create_storage
+
+    parser = argparse.ArgumentParser(description="Report overdue and soon-due BookNest loans")
+    parser.add_argument("--data-file", default="library_data.json")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="Report date (YYYY-MM-DD, default today)")
+    parser.add_argument("--due-within", type=int, default=3, help="Also list loans due in this many days")
+    parser.add_argument("--csv", help="Write the overdue loans to this CSV file")
+    args = parser.parse_args()
+
+    index = LibraryIndex()
+    index.rebuild(SimpleNamespace(**book) for book in create_storage(args.data_file).load()['books'])
+
+    overdue = overdue_items(index, args.as_of)
+    print(f"⚠️ {len(overdue)} overdue loans")
+    for borrower, items in group_by_borrower(overdue).items():
+        print(f"  {borrower}:")
+        for item in items:
+            print(f"    - {item.title} (due {item.due_date}, {item.days_overdue} days overdue)")
+
+    due_soon = due_soon_items(index, args.due_within, args.as_of)
+    print(f"📅 {len(due_soon)} loans due in the next {args.due_within} days")
+    for item in due_soon:
+        print(f"  - {item.title} (due {item.due_date}, borrower: {item.borrower_name})")
+
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+            f.write(to_csv(overdue))
+        print(f"✅ Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
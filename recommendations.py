@@ -0,0 +1,353 @@
+"""
+Vectorized "similar books" recommendations
+
+Run directly to materialize the similar-books table for library_data.json:
+
+    python recommendations.py [--top-n 10]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Weight of each kind of shared feature in the cosine similarity
+FEATURE_WEIGHTS = {
+    'genre': 2.0,
+    'author': 1.5,
+    'tag': 1.0,
+    'decade': 0.5,
+}
+
+
+def book_features(book) -> Dict[str, float]:
+    """Sparse (genre, tag, author, decade) feature vector for one book"""
+    features = {f"genre:{book.genre}": FEATURE_WEIGHTS['genre']}
+    for author in book.author.split(','):
+        if author.strip():
+            features[f"author:{author.strip().lower()}"] = FEATURE_WEIGHTS['author']
+    for tag in book.tags:
+        features[f"tag:{tag.strip().lower()}"] = FEATURE_WEIGHTS['tag']
+    if book.year:
+        features[f"decade:{int(book.year) // 10 * 10}"] = FEATURE_WEIGHTS['decade']
+    return features
+
+
+def features_fingerprint(features: Dict[str, float]) -> str:
+    """Short stable digest of a feature vector, to spot books that changed"""
+    text = json.dumps(sorted(features.items()), ensure_ascii=False)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class SimilarityModel:
+    """Book x feature matrix with cosine-similarity top-k queries.
+
+    Feature extraction happens incrementally in ``add``/``remove``; the
+    L2-normalised CSR matrix is reassembled from the cached rows on the first
+    query after a change. Similarities for any batch of books are then one
+    sparse matrix product.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, int] = {}
+        self.rows: Dict[str, int] = {}
+        self.row_ids: List[Optional[str]] = []
+        self._row_features: List[Dict[int, float]] = []
+        # book_id -> fingerprint of its features
+        self.fingerprints: Dict[str, str] = {}
+        self._matrix = None
+
+    def rebuild(self, books: Iterable):
+        self.__init__()
+        for book in books:
+            self.add(book)
+
+    def add(self, book):
+        """Index ``book``, replacing any previous version with the same id"""
+        vector = {}
+        features = book_features(book)
+        self.fingerprints[book.id] = features_fingerprint(features)
+        for feature, weight in features.items():
+            column = self.columns.setdefault(feature, len(self.columns))
+            vector[column] = weight
+
+        row = self.rows.get(book.id)
+        if row is None:
+            row = len(self.row_ids)
+            self.rows[book.id] = row
+            self.row_ids.append(book.id)
+            self._row_features.append(vector)
+        else:
+            self._row_features[row] = vector
+        self._matrix = None
+
+    def remove(self, book_id: str):
+        row = self.rows.pop(book_id, None)
+        if row is None:
+            return
+        del self.fingerprints[book_id]
+        self.row_ids[row] = None
+        self._row_features[row] = {}
+        self._matrix = None
+        # Reclaim rows once deleted books make up half the matrix
+        if len(self.rows) * 2 < len(self.row_ids):
+            self._compact()
+
+    def _compact(self):
+        live = [(book_id, features) for book_id, features in zip(self.row_ids, self._row_features) if book_id is not None]
+        self.row_ids = [book_id for book_id, _ in live]
+        self._row_features = [features for _, features in live]
+        self.rows = {book_id: row for row, book_id in enumerate(self.row_ids)}
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        if self._matrix is None:
+            indptr = np.zeros(len(self._row_features) + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(features) for features in self._row_features])
+            indices = np.fromiter((c for features in self._row_features for c in features),
+                                  dtype=np.int64, count=indptr[-1])
+            data = np.fromiter((w for features in self._row_features for w in features.values()),
+                               dtype=np.float32, count=indptr[-1])
+            matrix = sparse.csr_matrix((data, indices, indptr),
+                                       shape=(len(self._row_features), max(len(self.columns), 1)))
+            norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            norms[norms == 0] = 1.0
+            self._matrix = sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+        return self._matrix
+
+    def similar_batch(self, book_ids: List[str], k: int = 3) -> Dict[str, List[Tuple[str, float]]]:
+        """Top-k ``(book_id, score)`` neighbours for each of ``book_ids``"""
+        query_ids = [book_id for book_id in book_ids if book_id in self.rows]
+        if not query_ids:
+            return {book_id: [] for book_id in book_ids}
+
+        matrix = self.matrix
+        query_rows = np.array([self.rows[book_id] for book_id in query_ids])
+        scores = (matrix[query_rows] @ matrix.T).toarray()
+        # Never recommend a book for itself
+        scores[np.arange(len(query_rows)), query_rows] = 0.0
+
+        results = {book_id: [] for book_id in book_ids}
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return results
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for i, book_id in enumerate(query_ids):
+            # Highest score first, catalogue order on ties
+            candidates = sorted(top[i], key=lambda row: (-scores[i, row], row))
+            results[book_id] = [(self.row_ids[row], float(scores[i, row]))
+                                for row in candidates if scores[i, row] > 0]
+        return results
+
+    def similar(self, book_id: str, k: int = 3) -> List[Tuple[str, float]]:
+        return self.similar_batch([book_id], k)[book_id]
+
+    def all_pairs(self, k: int = 3, chunk_size: int = 1024) -> Dict[str, List[Tuple[str, float]]]:
+        """Top-k neighbours for every book, computed in row chunks"""
+        book_ids = [book_id for book_id in self.row_ids if book_id is not None]
+        results = {}
+        for start in range(0, len(book_ids), chunk_size):
+            results.update(self.similar_batch(book_ids[start:start + chunk_size], k))
+        return results
+
+
+class SimilarBooksTable:
+    """Materialized top-N similar books for every book.
+
+    Stored next to the library data so recommendations are a dictionary
+    lookup. After a book is added, edited or deleted, ``refresh`` only
+    recomputes the rows that can change: the book itself, books that list
+    it, and books whose score against it beats their current N-th entry.
+
+    Shared by the sessions of a process, the table can ``follow`` their
+    ``change_feed.ChangeFeed``; ``sync`` then applies the committed changes
+    to the model and refreshes the rows they affect.
+    """
+
+    def __init__(self, model: SimilarityModel, table_file: str, top_n: int = 10, save_every: int = 50):
+        self.model = model
+        self.table_file = table_file
+        self.top_n = top_n
+        self.save_every = save_every
+        self.similar: Dict[str, List[Tuple[str, float]]] = {}
+        # book_id -> ids of books whose rows list it
+        self._listed_by: Dict[str, Set[str]] = {}
+        self._unsaved = 0
+        # Reentrant: sync holds it across model changes and refresh
+        self._lock = threading.RLock()
+        self._feed = None
+        self._feed_base = None
+        self._feed_version = 0
+
+    def get(self, book_id: str, k: int = 3) -> List[Tuple[str, float]]:
+        return self.similar.get(book_id, [])[:k]
+
+    def load(self):
+        """Load the stored table, refreshing it for books added, changed or deleted since.
+
+        Each stored row carries the fingerprint of its book's features; a
+        book whose fingerprint differs from the model's is treated like an
+        edit, so ``refresh`` also fixes the rows of the books around it.
+        """
+        try:
+            with open(self.table_file, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = None
+
+        if not stored or stored.get('top_n') != self.top_n or 'fingerprints' not in stored:
+            self.rebuild()
+            return
+
+        fingerprints = stored['fingerprints']
+        current = self.model.fingerprints
+        changed = {book_id for book_id in current if fingerprints.get(book_id) != current[book_id]}
+        changed |= fingerprints.keys() - current.keys()
+        if len(changed) * 2 > len(current):
+            self.rebuild()
+            return
+
+        with self._lock:
+            self.similar = {}
+            self._listed_by = {}
+            for book_id, neighbours in stored.get('similar', {}).items():
+                if book_id not in changed and book_id in current:
+                    self._set_row(book_id, [(other, score) for other, score in neighbours])
+        if changed:
+            self.refresh(changed)
+            self.save()
+
+    def rebuild(self):
+        """Recompute every row in one batched pass and save"""
+        with self._lock:
+            self.similar = {}
+            self._listed_by = {}
+            for book_id, neighbours in self.model.all_pairs(self.top_n).items():
+                self._set_row(book_id, neighbours)
+        self.save()
+
+    def refresh(self, book_ids: Iterable[str]):
+        """Update the table after the given books were added, edited or deleted"""
+        book_ids = set(book_ids)
+        with self._lock:
+            affected: Set[str] = set()
+            for book_id in book_ids:
+                affected |= self._listed_by.get(book_id, set())
+
+            live = [book_id for book_id in book_ids if book_id in self.model.rows]
+            if live:
+                matrix = self.model.matrix
+                scores = (matrix @ matrix[[self.model.rows[book_id] for book_id in live]].T).toarray()
+                best = scores.max(axis=1)
+                for row in np.nonzero(best > 0)[0]:
+                    other = self.model.row_ids[row]
+                    if other is None or other in book_ids:
+                        continue
+                    neighbours = self.similar.get(other, [])
+                    if len(neighbours) < self.top_n or best[row] > neighbours[-1][1]:
+                        affected.add(other)
+
+            for book_id in book_ids - set(live):
+                self._drop_row(book_id)
+                self._listed_by.pop(book_id, None)
+            self._recompute((affected | set(live)) & self.model.rows.keys())
+
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def follow(self, feed):
+        """Track ``feed``, whose current base the model and table already reflect"""
+        with self._lock:
+            self._feed = feed
+            self._feed_base, self._feed_version = feed.base, feed.version
+
+    def sync(self):
+        """Apply the changes committed to the followed feed since the last sync"""
+        if self._feed is None:
+            return
+        with self._lock:
+            changes = self._feed.since(self._feed_base, self._feed_version)
+            if changes is None:
+                # The feed was rebased past changes not applied here: start
+                # again from its new base
+                catalogue, self._feed_version = self._feed.attach()
+                self._feed_base = catalogue.base
+                self.model.rebuild(catalogue.books)
+                self.rebuild()
+                return
+            if not changes:
+                return
+            for change in changes:
+                if change.book is not None:
+                    self.model.add(change.book)
+                elif change.book_id is not None:
+                    self.model.remove(change.book_id)
+            self._feed_version = changes[-1].version
+            self.refresh({change.book_id for change in changes if change.book_id is not None})
+
+    def save(self):
+        with self._lock:
+            data = {
+                'top_n': self.top_n,
+                'fingerprints': {book_id: self.model.fingerprints[book_id] for book_id in self.similar},
+                'similar': {book_id: [[other, round(score, 6)] for other, score in neighbours]
+                            for book_id, neighbours in self.similar.items()},
+            }
+        tmp_file = f"{self.table_file}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.table_file)
+            self._unsaved = 0
+        except OSError:
+            pass  # Read-only deployments keep the table in memory only
+
+    def _recompute(self, book_ids: Set[str], chunk_size: int = 1024):
+        book_ids = list(book_ids)
+        for start in range(0, len(book_ids), chunk_size):
+            for book_id, neighbours in self.model.similar_batch(book_ids[start:start + chunk_size], self.top_n).items():
+                self._set_row(book_id, neighbours)
+
+    def _set_row(self, book_id: str, neighbours: List[Tuple[str, float]]):
+        self._drop_row(book_id)
+        self.similar[book_id] = neighbours
+        for other, _ in neighbours:
+            self._listed_by.setdefault(other, set()).add(book_id)
+
+    def _drop_row(self, book_id: str):
+        for other, _ in self.similar.pop(book_id, []):
+            listed = self._listed_by.get(other)
+            if listed is not None:
+                listed.discard(book_id)
+
+
+def similar_table_file(data_file: str) -> str:
+    return os.path.splitext(data_file)[0] + "_similar.json"
+
+
+def main():
+    from library_storage import create_storage
+
+    parser = argparse.ArgumentParser(description="Materialize the BookNest similar-books table")
+    parser.add_argument("--data-file", default="library_data.json")
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    books = [SimpleNamespace(**book) for book in create_storage(args.data_file).load()['books']]
+    model = SimilarityModel()
+    model.rebuild(books)
+    table = SimilarBooksTable(model, similar_table_file(args.data_file), top_n=args.top_n)
+    table.rebuild()
+    print(f"✅ Stored top-{args.top_n} similar books for {len(table.similar)} books in {table.table_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Full-text and fuzzy search indexes for the Search & Browse pages
+"""
+
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Relative weight of a match in each field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'author': 2.0,
+    'genre': 1.5,
+    'tags': 1.5,
+    'summary': 0.5,
+}
+
+# Minimum Dice similarity for a fuzzy term match ("tolkein" ~ "tolkien" is 0.5)
+FUZZY_THRESHOLD = 0.45
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Tokenized inverted index over title, author, genre, tags and summary.
+
+    Built once from the catalogue and kept current through ``add`` (insert
+    or replace) and ``remove``. Every query term is prefix-matched, so
+    results update while the user is still typing.
+    """
+
+    def __init__(self):
+        # token -> {book_id: field weight}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        # Sorted vocabulary for prefix lookups
+        self.vocabulary: List[str] = []
+        self._doc_tokens: Dict[str, Dict[str, float]] = {}
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+
+    def rebuild(self, books: Iterable):
+        self.__init__()
+        for book in books:
+            self.add(book)
+
+    def add(self, book):
+        """Index ``book``, replacing any previous version with the same id"""
+        if book.id in self._doc_tokens:
+            self._unindex(book.id)
+        else:
+            self._order[book.id] = self._next_order
+            self._next_order += 1
+
+        fields = {
+            'title': book.title,
+            'author': book.author,
+            'genre': book.genre,
+            'tags': ' '.join(book.tags),
+            'summary': book.summary,
+        }
+        tokens: Dict[str, float] = {}
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text or ''):
+                if weight > tokens.get(token, 0.0):
+                    tokens[token] = weight
+
+        for token, weight in tokens.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                insort(self.vocabulary, token)
+            self.postings[token][book.id] = weight
+        self._doc_tokens[book.id] = tokens
+
+    def remove(self, book_id: str):
+        if book_id in self._doc_tokens:
+            self._unindex(book_id)
+            del self._order[book_id]
+
+    def _unindex(self, book_id: str):
+        for token in self._doc_tokens.pop(book_id):
+            docs = self.postings[token]
+            docs.pop(book_id, None)
+            if not docs:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Every vocabulary term matching ``term`` exactly or as a prefix"""
+        start = bisect_left(self.vocabulary, term)
+        end = bisect_left(self.vocabulary, term + '\uffff', start)
+        # Whole-word hits outrank prefix hits
+        return [(token, 1.0 if token == term else 0.5) for token in self.vocabulary[start:end]]
+
+    def scores(self, query: str) -> Dict[str, float]:
+        """Score of each book matching every query term (higher is better)"""
+        terms = tokenize(query)
+        if not terms:
+            return {}
+
+        scores: Dict[str, float] = {}
+        for n, term in enumerate(dict.fromkeys(terms)):
+            term_scores: Dict[str, float] = {}
+            for token, factor in self._expand(term):
+                for book_id, weight in self.postings[token].items():
+                    score = weight * factor
+                    if score > term_scores.get(book_id, 0.0):
+                        term_scores[book_id] = score
+
+            if n == 0:
+                scores = term_scores
+            else:
+                scores = {book_id: score + term_scores[book_id]
+                          for book_id, score in scores.items() if book_id in term_scores}
+            if not scores:
+                return {}
+        return scores
+
+    def search(self, query: str, limit: int = None) -> List[str]:
+        """Ids of books matching every query term, best match first"""
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda book_id: (-scores[book_id], self._order[book_id]))
+        return ranked[:limit] if limit else ranked
+
+
+class TrigramIndex:
+    """Typo-tolerant lookup over title and author words.
+
+    Each distinct word is split into trigrams; a query word only compares
+    against vocabulary words that share at least one trigram with it, so a
+    search touches the matching part of the vocabulary rather than every
+    book in the catalogue.
+    """
+
+    def __init__(self):
+        # trigram -> words containing it
+        self.postings: Dict[str, Set[str]] = {}
+        # word -> ids of books whose title or author contains it
+        self.word_books: Dict[str, Set[str]] = {}
+        self._word_grams: Dict[str, Set[str]] = {}
+        self._doc_words: Dict[str, Set[str]] = {}
+
+    def rebuild(self, books: Iterable):
+        self.__init__()
+        for book in books:
+            self.add(book)
+
+    def add(self, book):
+        """Index ``book``, replacing any previous version with the same id"""
+        if book.id in self._doc_words:
+            self.remove(book.id)
+
+        words = set(tokenize(f"{book.title} {book.author}"))
+        for word in words:
+            if word not in self.word_books:
+                self.word_books[word] = set()
+                grams = trigrams(word)
+                self._word_grams[word] = grams
+                for gram in grams:
+                    self.postings.setdefault(gram, set()).add(word)
+            self.word_books[word].add(book.id)
+        self._doc_words[book.id] = words
+
+    def remove(self, book_id: str):
+        for word in self._doc_words.pop(book_id, ()):
+            books = self.word_books[word]
+            books.discard(book_id)
+            if books:
+                continue
+            del self.word_books[word]
+            for gram in self._word_grams.pop(word):
+                words = self.postings[gram]
+                words.discard(word)
+                if not words:
+                    del self.postings[gram]
+
+    def similar_words(self, term: str, threshold: float = FUZZY_THRESHOLD) -> Dict[str, float]:
+        """Vocabulary words whose Dice similarity to ``term`` meets ``threshold``"""
+        query_grams = trigrams(term)
+        overlaps: Dict[str, int] = {}
+        for gram in query_grams:
+            for word in self.postings.get(gram, ()):
+                overlaps[word] = overlaps.get(word, 0) + 1
+
+        matches = {}
+        for word, shared in overlaps.items():
+            score = 2.0 * shared / (len(query_grams) + len(self._word_grams[word]))
+            if score >= threshold:
+                matches[word] = score
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """``(book_id, score)`` pairs ranked by summed per-word similarity"""
+        scores: Dict[str, float] = {}
+        for term in dict.fromkeys(tokenize(query)):
+            best: Dict[str, float] = {}
+            for word, similarity in self.similar_words(term).items():
+                for book_id in self.word_books[word]:
+                    if similarity > best.get(book_id, 0.0):
+                        best[book_id] = similarity
+            for book_id, similarity in best.items():
+                scores[book_id] = scores.get(book_id, 0.0) + similarity
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        return ranked[:limit]
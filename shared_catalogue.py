@@ -0,0 +1,316 @@
+"""
+One shared catalogue per server process, with per-session overlays
+
+Every Streamlit session used to hold its own copy of the catalogue and its
+indexes. ``BaseCatalogue`` is built once per process (the apps cache it
+with ``st.cache_resource``) and is never modified afterwards, so all
+sessions share its books, history and indexes. Each session instead gets a
+``CatalogueOverlay`` recording only what that session changed:
+
+- its own versions of books it added or edited, and the ids it deleted
+- the borrowing-history entries it appended
+
+Queries read the base indexes, skip ids the overlay touched, and merge in
+results from small indexes over the overlay's own books, so a session
+costs memory and time in proportion to its changes, not the catalogue.
+
+Base books are shared: never mutate one in place. Copy it with
+``dataclasses.replace``, change the copy and ``put`` it.
+"""
+
+from collections.abc import Sequence
+from datetime import date
+from heapq import nsmallest
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from library_frame import CatalogueFrame, FrameAggregates
+from library_index import LibraryIndex, LibraryStats
+from library_loader import LoadReport, stream_books
+from search_index import SearchIndex, TrigramIndex
+
+
+class BaseCatalogue:
+    """Books, history and their indexes as loaded; read-only once built"""
+
+    def __init__(self, books: Iterable = (), history: Iterable[Dict] = (), load_report: Optional[LoadReport] = None):
+        self.index = LibraryIndex()
+        self.search_index = SearchIndex()
+        self.fuzzy_index = TrigramIndex()
+        self.frame = CatalogueFrame()
+        self.load_report = load_report or LoadReport()
+        # Shared by every session: read, never modify
+        self.books: List = []
+        self.history: List[Dict] = []
+        self._extend(books, history)
+
+    @classmethod
+    def load(cls, storage, book_class, chunk_size: int = 1000) -> 'BaseCatalogue':
+        """Stream ``storage`` in, indexing each chunk as it is built"""
+        base = cls()
+        for books, history in stream_books(storage, book_class, base.load_report, chunk_size):
+            base._extend(books, history)
+        return base
+
+    def _extend(self, books: Iterable, history: Iterable[Dict]):
+        for book in books:
+            self.index.add(book, len(self.books))
+            self.search_index.add(book)
+            self.fuzzy_index.add(book)
+            self.frame.add(book)
+            self.books.append(book)
+        for entry in history:
+            self.frame.add_history(entry)
+            self.history.append(entry)
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def __contains__(self, book_id: str) -> bool:
+        return book_id in self.index.by_id
+
+
+class _View(Sequence):
+    """Read-only sequence recomputed from base and overlay on each pass"""
+
+    def __init__(self, length: Callable[[], int], iterate: Callable[[], Iterator]):
+        self._length = length
+        self._iterate = iterate
+
+    def __len__(self) -> int:
+        return self._length()
+
+    def __iter__(self) -> Iterator:
+        return self._iterate()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        if i < 0:
+            i += len(self)
+        for item in islice(self, i, None):
+            return item
+        raise IndexError(i)
+
+
+class OverlayFrame(FrameAggregates):
+    """``CatalogueFrame`` aggregates over the base plus one overlay's changes.
+
+    Counts are the base counts, minus the base rows the overlay hides, plus
+    the overlay's own rows and loans.
+    """
+
+    def __init__(self, base: CatalogueFrame):
+        self.base = base
+        self.own = CatalogueFrame()
+        self.hidden = CatalogueFrame()
+
+    def _combine(self, name: str) -> pd.Series:
+        counts = getattr(self.base, name)()
+        if not (self.own.slots or self.hidden.slots) and self.own.loans().empty:
+            return counts
+        counts = counts.add(getattr(self.own, name)(), fill_value=0).sub(getattr(self.hidden, name)(), fill_value=0)
+        return counts[counts > 0].astype(np.int64)
+
+    def genre_counts(self) -> pd.Series:
+        return self._combine('genre_counts')
+
+    def decade_counts(self) -> pd.Series:
+        return self._combine('decade_counts')
+
+    def month_counts(self) -> pd.Series:
+        return self._combine('month_counts')
+
+    def borrower_counts(self) -> pd.Series:
+        return self._combine('borrower_counts')
+
+
+class CatalogueOverlay:
+    """One session's view of a ``BaseCatalogue``.
+
+    Offers the query methods of ``LibraryIndex`` (so it can stand in for one,
+    e.g. with ``overdue_report``) plus search, and ``put``/``delete``/
+    ``append_history`` to change the session's view.
+    """
+
+    def __init__(self, base: BaseCatalogue):
+        self.base = base
+        # This session's versions of added or edited books
+        self.own: Dict[str, object] = {}
+        # Base ids deleted in this session
+        self.deleted: Set[str] = set()
+        # Positions of books not in the base, after every base position
+        self.added: Dict[str, int] = {}
+        self.history: List[Dict] = []
+        self._next_position = len(base)
+        self._index = LibraryIndex()
+        # Base versions hidden by own or deleted books
+        self._hidden = LibraryIndex()
+        self._search_index = SearchIndex()
+        self._fuzzy_index = TrigramIndex()
+        self.frame = OverlayFrame(base.frame)
+        self.books = _View(self.__len__, self._iter_books)
+        self.borrowing_history = _View(lambda: len(base.history) + len(self.history),
+                                       lambda: chain(base.history, self.history))
+
+    # Changes
+
+    def put(self, book):
+        """Add or replace ``book`` in this session (a copy, never a base book)"""
+        if book.id in self.base:
+            self._hide(book.id)
+            self.deleted.discard(book.id)
+        elif book.id not in self.added:
+            self.added[book.id] = self._next_position
+            self._next_position += 1
+        self.own[book.id] = book
+        self._index.add(book, self.position(book.id))
+        self._search_index.add(book)
+        self._fuzzy_index.add(book)
+        self.frame.own.add(book)
+
+    def delete(self, book_id: str):
+        if self.own.pop(book_id, None) is not None:
+            self._index.remove(book_id)
+            self._search_index.remove(book_id)
+            self._fuzzy_index.remove(book_id)
+            self.frame.own.remove(book_id)
+        self.added.pop(book_id, None)
+        if book_id in self.base:
+            self._hide(book_id)
+            self.deleted.add(book_id)
+
+    def append_history(self, entry: Dict):
+        self.history.append(entry)
+        self.frame.own.add_history(entry)
+
+    def _hide(self, book_id: str):
+        if book_id not in self._hidden.by_id:
+            book = self.base.index.get(book_id)
+            self._hidden.add(book, self.base.index.positions[book_id])
+            self.frame.hidden.add(book)
+
+    # Reads
+
+    def _shadows(self, book_id: str) -> bool:
+        """Whether ``book_id``'s base version is replaced or deleted here"""
+        return book_id in self.own or book_id in self.deleted
+
+    def get(self, book_id: str):
+        book = self.own.get(book_id)
+        if book is None and book_id not in self.deleted:
+            book = self.base.index.get(book_id)
+        return book
+
+    def __contains__(self, book_id: str) -> bool:
+        return self.get(book_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self.deleted) + len(self.added)
+
+    def _iter_books(self, start: int = 0) -> Iterator:
+        """Books in catalogue order from base position ``start``"""
+        own, deleted = self.own, self.deleted
+        for book in islice(self.base.books, start, None):
+            if book.id in own:
+                yield own[book.id]
+            elif book.id not in deleted:
+                yield book
+        for book_id in self.added:
+            yield own[book_id]
+
+    def position(self, book_id: str) -> int:
+        """Catalogue position of ``book_id``, for ordering and paging"""
+        position = self.added.get(book_id)
+        return self.base.index.positions[book_id] if position is None else position
+
+    def genres(self) -> List[str]:
+        return list(self._genre_counts())
+
+    def _genre_counts(self) -> Dict[str, int]:
+        counts = {genre: len(ids) for genre, ids in self.base.index.by_genre.items()}
+        for genre, ids in self._hidden.by_genre.items():
+            counts[genre] -= len(ids)
+        for genre, ids in self._index.by_genre.items():
+            counts[genre] = counts.get(genre, 0) + len(ids)
+        return {genre: count for genre, count in counts.items() if count}
+
+    def overdue_count(self, today: date) -> int:
+        return (self.base.index.overdue_count(today) - self._hidden.overdue_count(today)
+                + self._index.overdue_count(today))
+
+    def stats(self, today: date) -> LibraryStats:
+        total = len(self)
+        borrowed = len(self.base.index.borrowed) - len(self._hidden.borrowed) + len(self._index.borrowed)
+        return LibraryStats(
+            total=total,
+            borrowed=borrowed,
+            available=total - borrowed,
+            overdue=self.overdue_count(today),
+            genre_counts=self._genre_counts(),
+        )
+
+    def _by_due_date(self, base_ids: List[str], own_ids: List[str]) -> List[str]:
+        books = [self.base.index.get(book_id) for book_id in base_ids if not self._shadows(book_id)]
+        books += [self.own[book_id] for book_id in own_ids]
+        return [book.id for book in sorted(books, key=lambda book: (book.due_date, book.id))]
+
+    def overdue_ids(self, today: date) -> List[str]:
+        return self._by_due_date(self.base.index.overdue_ids(today), self._index.overdue_ids(today))
+
+    def due_between(self, start: date, end: date) -> List[str]:
+        return self._by_due_date(self.base.index.due_between(start, end), self._index.due_between(start, end))
+
+    def due_within(self, today: date, days: int) -> List[str]:
+        return self._by_due_date(self.base.index.due_within(today, days), self._index.due_within(today, days))
+
+    def matching_ids(self, status: str = "All", genre: str = "All", today: Optional[date] = None) -> Optional[Set[str]]:
+        """Ids matching ``status`` and ``genre`` (see ``LibraryIndex.matching_ids``)"""
+        ids = self.base.index.matching_ids(status, genre, today)
+        if ids is None:
+            return None
+        if self.own or self.deleted:
+            ids = {book_id for book_id in ids if not self._shadows(book_id)}
+            ids |= self._index.matching_ids(status, genre, today)
+        return ids
+
+    def filter(self, status: str = "All", genre: str = "All", today: Optional[date] = None) -> List:
+        """Books matching ``status`` and ``genre``, in catalogue order"""
+        ids = self.matching_ids(status, genre, today)
+        if ids is None:
+            return list(self.books)
+        return [self.get(book_id) for book_id in sorted(ids, key=self.position)]
+
+    def page(self, status: str = "All", genre: str = "All", today: Optional[date] = None,
+             after: int = -1, limit: int = 20) -> Tuple[List, int]:
+        """One page of matching books after catalogue position ``after``, plus the match count"""
+        ids = self.matching_ids(status, genre, today)
+        if ids is None:
+            if after < len(self.base):
+                books = self._iter_books(after + 1)
+            else:
+                books = (self.own[book_id] for book_id, position in self.added.items() if position > after)
+            return list(islice(books, limit)), len(self)
+        page_ids = nsmallest(limit, (book_id for book_id in ids if self.position(book_id) > after),
+                             key=self.position)
+        return [self.get(book_id) for book_id in page_ids], len(ids)
+
+    def search(self, query: str, limit: int = None) -> List[str]:
+        """Ids ranked as ``SearchIndex.search`` would over this session's view"""
+        scores = {book_id: score for book_id, score in self.base.search_index.scores(query).items()
+                  if not self._shadows(book_id)}
+        scores.update(self._search_index.scores(query))
+        ranked = sorted(scores, key=lambda book_id: (-scores[book_id], self.position(book_id)))
+        return ranked[:limit] if limit else ranked
+
+    def fuzzy_search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """``(book_id, score)`` pairs as ``TrigramIndex.search`` would rank them"""
+        # Ask the base for enough extra hits to cover any this session hides
+        hits = [(book_id, score) for book_id, score
+                in self.base.fuzzy_index.search(query, limit + len(self.own) + len(self.deleted))
+                if not self._shadows(book_id)]
+        hits += self._fuzzy_index.search(query, limit)
+        return sorted(hits, key=lambda hit: -hit[1])[:limit]
@@ -0,0 +1,28 @@
+"""
+Helpers shared by the on-disk SQLite caches (``ai_cache``, ``http_cache``)
+"""
+
+import os
+import sqlite3
+
+DEFAULT_CACHE_DIR = os.environ.get('BOOKNEST_CACHE_DIR', '.booknest_cache')
+
+
+def evict_lru(conn: sqlite3.Connection, max_bytes: int, table: str = 'responses'):
+    """Delete the least recently used rows of ``table`` until their sizes total at most ``max_bytes``.
+
+    ``table`` needs ``key``, ``size`` and (indexed) ``last_access`` columns.
+    Run it inside the caller's write transaction.
+    """
+    total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+    if total <= max_bytes:
+        return
+    excess = total - max_bytes
+    freed = 0
+    doomed = []
+    for key, size in conn.execute(f"SELECT key, size FROM {table} ORDER BY last_access"):
+        doomed.append((key,))
+        freed += size
+        if freed >= excess:
+            break
+    conn.executemany(f"DELETE FROM {table} WHERE key = ?", doomed)
@@ -1,13 +1,20 @@
 import streamlit as st
 import pandas as pd
 import json
-import requests
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta
+from dataclasses import dataclass, asdict, replace
 from typing import List, Optional, Dict
 import google.generativeai as genai
 import os
 
+from ai_cache import ResponseCache
+from compact_book import compact_record
+from http_cache import HttpCache
+from http_client import create_session
+from library_storage import new_book_id
+from open_library_records import book_record, determine_genre
+from shared_catalogue import BaseCatalogue, CatalogueOverlay
+
 # Configure page
 st.set_page_config(
     page_title="📚 BookNest - AI Library Manager",
@@ -61,6 +68,7 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@compact_record
 @dataclass
 class Book:
     id: str
@@ -72,7 +80,7 @@ class Book:
     tags: List[str]
     is_borrowed: bool = False
     borrower_name: str = ""
-    due_date: Optional[str] = None
+    due_date: Optional[date] = None
     summary: str = ""
     cover_url: str = ""
 
@@ -89,7 +97,7 @@ def create_sample_books():
         
         Book("0003", "Pride and Prejudice", "Jane Austen", "Romance", 1813, "978-0-14-143951-8", 
              ["classic", "romance", "regency"], is_borrowed=True, borrower_name="Alice Johnson",
-             due_date=(datetime.now() + timedelta(days=5)).strftime("%Y-%m-%d"),
+             due_date=(datetime.now() + timedelta(days=5)).date(),
              summary="The timeless story of Elizabeth Bennet and Mr. Darcy's complex courtship, filled with wit, social commentary, and one of literature's most satisfying romantic relationships."),
         
         Book("0004", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 1925, "978-0-7432-7356-5", 
@@ -106,7 +114,7 @@ def create_sample_books():
         
         Book("0007", "The Hitchhiker's Guide to the Galaxy", "Douglas Adams", "Sci-Fi", 1979, "978-0-345-39180-3", 
              ["humor", "space", "adventure"], is_borrowed=True, borrower_name="Bob Smith",
-             due_date=(datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d"),
+             due_date=(datetime.now() + timedelta(days=10)).date(),
              summary="A hilarious journey through space with Arthur Dent and his alien friend Ford Prefect, featuring towels, paranoid androids, and the answer to life, the universe, and everything."),
         
         Book("0008", "The Murder of Roger Ackroyd", "Agatha Christie", "Mystery", 1926, "978-0-06-207350-4", 
@@ -139,7 +147,7 @@ def create_sample_books():
         
         Book("0015", "Where the Crawdads Sing", "Delia Owens", "Fiction", 2018, "978-0-7352-1909-0", 
              ["nature", "mystery", "coming-of-age"], is_borrowed=True, borrower_name="Carol Davis",
-             due_date=(datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d"),  # Overdue
+             due_date=(datetime.now() - timedelta(days=2)).date(),  # Overdue
              summary="Kya the 'Marsh Girl' grows up isolated in North Carolina's coastal marshes, weaving together a murder mystery with a beautiful coming-of-age story."),
         
         Book("0016", "The Silent Patient", "Alex Michaelides", "Mystery", 2019, "978-1-250-30170-7", 
@@ -163,88 +171,102 @@ def create_sample_books():
              summary="From the perspective of an artificial friend, this touching story explores what it means to love and be human in a world of advancing technology.")
     ]
 
+def create_sample_history():
+    """Sample borrowing history for Streamlit Cloud"""
+    return [
+        {
+            'book_id': '0001',
+            'book_title': 'To Kill a Mockingbird',
+            'borrower_name': 'John Doe',
+            'checkout_date': date(2024, 1, 15),
+            'return_date': date(2024, 1, 29),
+            'action': 'checkin'
+        },
+        {
+            'book_id': '0002',
+            'book_title': '1984',
+            'borrower_name': 'Jane Smith',
+            'checkout_date': date(2024, 1, 20),
+            'return_date': date(2024, 2, 3),
+            'action': 'checkin'
+        }
+    ]
+
+@st.cache_resource(show_spinner=False)
+def load_shared_catalogue() -> BaseCatalogue:
+    """Sample books and history, built once per process"""
+    return BaseCatalogue(create_sample_books(), create_sample_history())
+
 class LibraryManager:
     def __init__(self):
-        # Initialize with sample books for Streamlit Cloud
-        if 'library_books' not in st.session_state:
-            st.session_state.library_books = create_sample_books()
-        
-        if 'borrowing_history' not in st.session_state:
-            st.session_state.borrowing_history = [
-                {
-                    'book_id': '0001',
-                    'book_title': 'To Kill a Mockingbird',
-                    'borrower_name': 'John Doe',
-                    'checkout_date': '2024-01-15',
-                    'return_date': '2024-01-29',
-                    'action': 'checkin'
-                },
-                {
-                    'book_id': '0002',
-                    'book_title': '1984',
-                    'borrower_name': 'Jane Smith',
-                    'checkout_date': '2024-01-20',
-                    'return_date': '2024-02-03',
-                    'action': 'checkin'
-                }
-            ]
+        # Sample books are shared by every session; this session's demo
+        # changes are kept in its overlay
+        self.catalogue = CatalogueOverlay(load_shared_catalogue())
     
     @property
     def books(self):
-        return st.session_state.library_books
+        return self.catalogue.books
+    
+    @property
+    def borrowing_history(self):
+        return self.catalogue.borrowing_history
     
-    def add_book(self, book: Book):
-        st.session_state.library_books.append(book)
+    def add_book(self, book: Book) -> bool:
+        """Add ``book``; False (nothing added) if its id is taken"""
+        if book.id in self.catalogue:
+            return False
+        self.catalogue.put(book)
+        return True
     
     def update_book(self, book_id: str, updated_book: Book):
-        for i, book in enumerate(st.session_state.library_books):
-            if book.id == book_id:
-                st.session_state.library_books[i] = updated_book
-                break
+        if book_id in self.catalogue:
+            self.catalogue.put(updated_book)
     
     def delete_book(self, book_id: str):
-        st.session_state.library_books = [book for book in st.session_state.library_books if book.id != book_id]
+        self.catalogue.delete(book_id)
     
     def check_out_book(self, book_id: str, borrower_name: str, days: int = 14):
-        for book in st.session_state.library_books:
-            if book.id == book_id:
-                book.is_borrowed = True
-                book.borrower_name = borrower_name
-                book.due_date = (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
-                
-                st.session_state.borrowing_history.append({
-                    'book_id': book_id,
-                    'book_title': book.title,
-                    'borrower_name': borrower_name,
-                    'checkout_date': datetime.now().strftime("%Y-%m-%d"),
-                    'due_date': book.due_date,
-                    'action': 'checkout'
-                })
-                break
+        book = self.catalogue.get(book_id)
+        if not book:
+            return
+        # Copy on write: the sample book is shared with other sessions
+        book = replace(book, is_borrowed=True, borrower_name=borrower_name,
+                       due_date=(datetime.now() + timedelta(days=days)).date())
+        self.catalogue.put(book)
+        self.catalogue.append_history({
+            'book_id': book_id,
+            'book_title': book.title,
+            'borrower_name': borrower_name,
+            'checkout_date': datetime.now().date(),
+            'due_date': book.due_date,
+            'action': 'checkout'
+        })
     
     def check_in_book(self, book_id: str):
-        for book in st.session_state.library_books:
-            if book.id == book_id:
-                book.is_borrowed = False
-                borrower_name = book.borrower_name
-                book.borrower_name = ""
-                book.due_date = None
-                
-                st.session_state.borrowing_history.append({
-                    'book_id': book_id,
-                    'book_title': book.title,
-                    'borrower_name': borrower_name,
-                    'return_date': datetime.now().strftime("%Y-%m-%d"),
-                    'action': 'checkin'
-                })
-                break
+        book = self.catalogue.get(book_id)
+        if not book:
+            return
+        borrower_name = book.borrower_name
+        book = replace(book, is_borrowed=False, borrower_name="", due_date=None)
+        self.catalogue.put(book)
+        self.catalogue.append_history({
+            'book_id': book_id,
+            'book_title': book.title,
+            'borrower_name': borrower_name,
+            'return_date': datetime.now().date(),
+            'action': 'checkin'
+        })
 
 class OpenLibraryAPI:
     """Interface to Open Library API"""
     
-    def __init__(self):
+    def __init__(self, pool_size: int = 10, max_retries: int = 3, timeout: float = 10):
         self.base_url = "https://openlibrary.org"
         self.covers_url = "https://covers.openlibrary.org/b"
+        # Keep-alive connection pool shared by every request (and import thread)
+        self.session = create_session(pool_size=pool_size, max_retries=max_retries, timeout=timeout)
+        # Search and work-detail responses are cached on disk and revalidated
+        self.cache = HttpCache()
     
     def search_books(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for books using Open Library API"""
@@ -256,10 +278,7 @@ class OpenLibraryAPI:
                 'fields': 'key,title,author_name,first_publish_year,isbn,subject,cover_i'
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.cache.get_json(self.session, url, params)
             return data.get('docs', [])
             
         except Exception as e:
@@ -269,70 +288,36 @@ class OpenLibraryAPI:
     def convert_to_book(self, ol_book: Dict, book_id: str) -> Book:
         """Convert Open Library book data to our Book format"""
         try:
-            title = ol_book.get('title', 'Unknown Title')
-            authors = ol_book.get('author_name', ['Unknown Author'])
-            author = ', '.join(authors[:2])
-            year = ol_book.get('first_publish_year', 2000)
-            
-            isbns = ol_book.get('isbn', [])
-            isbn = isbns[0] if isbns else f"OL-{ol_book.get('key', '').replace('/works/', '')}"
-            
-            subjects = ol_book.get('subject', [])
-            genre = self._determine_genre(subjects)
-            tags = subjects[:5]
-            
-            cover_id = ol_book.get('cover_i')
-            cover_url = f"{self.covers_url}/id/{cover_id}-M.jpg" if cover_id else ""
-            
-            return Book(
-                id=book_id,
-                title=title,
-                author=author,
-                genre=genre,
-                year=int(year) if year else 2000,
-                isbn=isbn,
-                tags=tags,
-                cover_url=cover_url
-            )
-            
+            return Book(**book_record(ol_book, book_id))
         except Exception as e:
             st.error(f"Error converting book data: {e}")
             return None
     
     def _determine_genre(self, subjects: List[str]) -> str:
         """Determine genre from subjects"""
-        subjects_lower = [s.lower() for s in subjects]
-        
-        genre_keywords = {
-            'Fiction': ['fiction', 'novel', 'literature'],
-            'Mystery': ['mystery', 'detective', 'crime', 'thriller'],
-            'Sci-Fi': ['science fiction', 'sci-fi', 'fantasy', 'dystopian'],
-            'Romance': ['romance', 'love story'],
-            'Biography': ['biography', 'memoir', 'autobiography'],
-            'History': ['history', 'historical'],
-            'Science': ['science', 'technology', 'physics', 'biology'],
-            'Self-Help': ['self-help', 'psychology', 'philosophy']
-        }
-        
-        for genre, keywords in genre_keywords.items():
-            if any(keyword in ' '.join(subjects_lower) for keyword in keywords):
-                return genre
-        
-        return 'Fiction'
+        return determine_genre(subjects)
 
 class AIAssistant:
     def __init__(self):
+        self.model_name = 'gemini-2.0-flash-exp'
+        self.cache = ResponseCache()
         # Configure Gemini AI
         if 'GOOGLE_API_KEY' in st.secrets:
             genai.configure(api_key=st.secrets['GOOGLE_API_KEY'])
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = genai.GenerativeModel(self.model_name)
         elif 'GOOGLE_API_KEY' in os.environ:
             genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = genai.GenerativeModel(self.model_name)
         else:
             st.info("💡 Add GOOGLE_API_KEY to Streamlit secrets for AI features")
             self.model = None
     
+    def _generate(self, prompt: str) -> str:
+        """Call Gemini, serving repeated prompts from the on-disk cache"""
+        return self.cache.get_or_generate(
+            self.model_name, prompt, lambda p: self.model.generate_content(p).text.strip()
+        )
+    
     def generate_book_summary(self, title: str, author: str, genre: str, year: int = None) -> str:
         if not self.model:
             return "AI features require GOOGLE_API_KEY to be configured in Streamlit secrets."
@@ -348,8 +333,7 @@ Focus on:
 
 Keep it engaging and informative for library users deciding whether to read it."""
             
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            return self._generate(prompt)
         except Exception as e:
             return f"Could not generate summary: {str(e)}"
 
@@ -360,13 +344,7 @@ def render_book_card(book: Book):
     status_text = "BORROWED" if book.is_borrowed else "AVAILABLE"
     
     # Check if overdue
-    is_overdue = False
-    if book.is_borrowed and book.due_date:
-        try:
-            due_date = datetime.strptime(book.due_date, "%Y-%m-%d")
-            is_overdue = due_date < datetime.now()
-        except:
-            pass
+    is_overdue = bool(book.is_borrowed and book.due_date and book.due_date <= datetime.now().date())
     
     if is_overdue:
         status_text = "OVERDUE"
@@ -457,16 +435,9 @@ def main():
         elif filter_status == "Borrowed":
             filtered_books = [book for book in filtered_books if book.is_borrowed]
         elif filter_status == "Overdue":
-            overdue_books = []
-            for book in filtered_books:
-                if book.is_borrowed and book.due_date:
-                    try:
-                        due_date = datetime.strptime(book.due_date, "%Y-%m-%d")
-                        if due_date < datetime.now():
-                            overdue_books.append(book)
-                    except:
-                        pass
-            filtered_books = overdue_books
+            today = datetime.now().date()
+            filtered_books = [book for book in filtered_books
+                              if book.is_borrowed and book.due_date and book.due_date <= today]
         
         st.write(f"Showing {len(filtered_books)} of {len(library_manager.books)} books")
         
@@ -497,8 +468,7 @@ def main():
                             summary = ai_assistant.generate_book_summary(
                                 book.title, book.author, book.genre, book.year
                             )
-                            book.summary = summary
-                            library_manager.update_book(book.id, book)
+                            library_manager.update_book(book.id, replace(book, summary=summary))
                             st.success("Summary generated!")
                             st.rerun()
                     else:
@@ -531,7 +501,7 @@ def main():
             submitted = st.form_submit_button("➕ Add Book")
             
             if submitted and title and author and genre:
-                book_id = f"{len(library_manager.books) + 1:04d}"
+                book_id = new_book_id()
                 tags_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
                 
                 summary = ""
@@ -550,9 +520,11 @@ def main():
                     summary=summary
                 )
                 
-                library_manager.add_book(new_book)
-                st.success(f"✅ Added '{title}' to your library!")
-                st.rerun()
+                if library_manager.add_book(new_book):
+                    st.success(f"✅ Added '{title}' to your library!")
+                    st.rerun()
+                else:
+                    st.error(f"A book with id {book_id} already exists")
     
     with tab3:
         st.subheader("🌐 Import Books from Open Library")
@@ -592,7 +564,7 @@ def main():
                     
                     with col2:
                         if st.button("➕ Import", key=f"import_{i}"):
-                            book_id = f"{len(library_manager.books) + 1:04d}"
+                            book_id = new_book_id()
                             book = ol_api.convert_to_book(result, book_id)
                             if book:
                                 # Generate AI summary if possible
@@ -602,9 +574,11 @@ def main():
                                             book.title, book.author, book.genre, book.year
                                         )
                                 
-                                library_manager.add_book(book)
-                                st.success(f"✅ Imported '{book.title}'!")
-                                st.rerun()
+                                if library_manager.add_book(book):
+                                    st.success(f"✅ Imported '{book.title}'!")
+                                    st.rerun()
+                                else:
+                                    st.error(f"A book with id {book_id} already exists")
                             else:
                                 st.error("Failed to import book")
                     
@@ -626,8 +600,8 @@ def main():
             
             # Recent activity
             st.write("**Recent Activity:**")
-            recent_history = sorted(st.session_state.borrowing_history, 
-                                  key=lambda x: x.get('checkout_date', x.get('return_date', '')), 
+            recent_history = sorted(library_manager.borrowing_history, 
+                                  key=lambda x: x.get('checkout_date') or x.get('return_date') or date.min, 
                                   reverse=True)[:5]
             
             for activity in recent_history:
@@ -0,0 +1,169 @@
+"""
+Batch AI summary generation for books that have no summary yet
+
+Each Gemini request summarizes a whole batch of books, batches run
+concurrently under a requests-per-minute limit, and every finished batch is
+written straight back to the library store. Re-running only picks up books
+that are still missing a summary, so an interrupted backfill resumes where
+it stopped.
+
+Run directly to backfill library_data.json without the UI:
+
+    python summary_batch.py [--batch-size 20] [--workers 4] [--rpm 30]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class RateLimiter:
+    """Spaces calls evenly so at most ``requests_per_minute`` start per minute"""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / max(requests_per_minute, 1)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BatchSummarizer:
+    """Packs many books into each prompt and runs batches concurrently.
+
+    ``generate(prompt, validate)`` returns the model's response; ``validate``
+    raises for a response that cannot be used, which a caching ``generate``
+    must not store (see ``ResponseCache.get_or_generate``), so retries ask
+    the model again instead of replaying the bad response.
+    """
+
+    def __init__(self, generate: Callable[[str, Callable[[str], object]], str], batch_size: int = 20, max_workers: int = 4,
+                 requests_per_minute: int = 30, max_retries: int = 2):
+        self.generate = generate
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.max_retries = max_retries
+
+    @staticmethod
+    def build_prompt(books: List) -> str:
+        book_list = "\n".join(
+            json.dumps({'id': book.id, 'title': book.title, 'author': book.author,
+                        'genre': book.genre, 'year': book.year}, ensure_ascii=False)
+            for book in books
+        )
+        return f"""Generate a compelling 2-3 sentence summary for each of these books (one JSON object per line):
+{book_list}
+
+For each book focus on the main plot or central theme, what makes it noteworthy or appealing, and its impact if it's well-known. Keep it engaging and informative for library users deciding whether to read it.
+
+Respond with only a JSON array of objects with exactly two keys, "id" and "summary", one per book, using the ids given above."""
+
+    @staticmethod
+    def parse_response(text: str, books: List) -> Dict[str, str]:
+        """Map book id -> summary, ignoring ids that were not requested"""
+        start, end = text.find('['), text.rfind(']')
+        if start == -1 or end <= start:
+            raise ValueError("Response did not contain a JSON array")
+        wanted = {book.id for book in books}
+        summaries = {}
+        for item in json.loads(text[start:end + 1]):
+            if isinstance(item, dict) and item.get('id') in wanted and str(item.get('summary', '')).strip():
+                summaries[item['id']] = str(item['summary']).strip()
+        return summaries
+
+    @classmethod
+    def checked_response(cls, text: str, books: List) -> Dict[str, str]:
+        """``parse_response``, raising if the response summarized none of ``books``"""
+        summaries = cls.parse_response(text, books)
+        if not summaries:
+            raise ValueError("Response summarized none of the requested books")
+        return summaries
+
+    def _summarize_batch(self, books: List) -> Dict[str, str]:
+        prompt = self.build_prompt(books)
+        validate = lambda text: self.checked_response(text, books)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return self.checked_response(self.generate(prompt, validate), books)
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def run(self, books: List) -> Iterator[Tuple[List, Dict[str, str], Optional[Exception]]]:
+        """Yield ``(batch, summaries, error)`` in completion order.
+
+        Results are yielded on the calling thread, so callers can save each
+        batch (and touch Streamlit) as soon as it finishes.
+        """
+        batches = [books[i:i + self.batch_size] for i in range(0, len(books), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._summarize_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    yield batch, future.result(), None
+                except Exception as e:
+                    yield batch, {}, e
+
+
+def main():
+    import google.generativeai as genai
+
+    from ai_cache import ResponseCache
+    from library_storage import create_storage
+
+    parser = argparse.ArgumentParser(description="Backfill missing BookNest summaries with Gemini")
+    parser.add_argument("--data-file", default="library_data.json")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rpm", type=int, default=30, help="Gemini requests per minute")
+    args = parser.parse_args()
+
+    if not os.environ.get('GOOGLE_API_KEY'):
+        print("❌ GOOGLE_API_KEY is not set")
+        return
+
+    genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
+    model_name = 'gemini-2.0-flash-exp'
+    model = genai.GenerativeModel(model_name)
+    cache = ResponseCache()
+
+    def generate(prompt: str, validate=None) -> str:
+        return cache.get_or_generate(model_name, prompt, lambda p: model.generate_content(p).text.strip(), validate)
+
+    storage = create_storage(args.data_file)
+    records = {book['id']: book for book in storage.load()['books']}
+    missing = [SimpleNamespace(**record) for record in records.values() if not record.get('summary')]
+    print(f"📚 {len(missing)} of {len(records)} books need a summary")
+
+    summarizer = BatchSummarizer(generate, args.batch_size, args.workers, args.rpm)
+    done = 0
+    for batch, summaries, error in summarizer.run(missing):
+        if error:
+            print(f"❌ Batch of {len(batch)} failed: {error}")
+        for book_id, summary in summaries.items():
+            record = records[book_id]
+            record['summary'] = summary
+            storage.put_book(record)
+        done += len(summaries)
+        print(f"  {done}/{len(missing)} summarized")
+
+    print(f"✅ Generated {done} summaries; re-run to retry any that failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned change feed shared by sessions
+"""
+
+import random
+import threading
+from dataclasses import asdict, dataclass, field, replace
+from datetime import date
+from typing import List, Optional
+
+import pytest
+
+from change_feed import ChangeFeed, FeedSubscriber
+from library_loader import LoadReport, stream_books
+from library_storage import JsonStorage
+from shared_catalogue import BaseCatalogue
+
+
+@dataclass
+class Book:
+    id: str
+    title: str
+    author: str
+    genre: str
+    year: int
+    isbn: str
+    tags: List[str] = field(default_factory=list)
+    is_borrowed: bool = False
+    borrower_name: str = ""
+    due_date: Optional[date] = None
+    summary: str = ""
+
+
+def make_book(book_id, **fields):
+    return Book(book_id, f"Book {book_id}", "Author", "Fiction", 2000, "", **fields)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = JsonStorage(str(tmp_path / "library.json"), compact_every=10 ** 6)
+    storage.save_all([asdict(make_book(str(i))) for i in range(10)], [])
+    return storage
+
+
+def load_feed(storage, rebase_every=1000):
+    return ChangeFeed(BaseCatalogue.load(storage, Book), rebase_every=rebase_every)
+
+
+def snapshot(catalogue):
+    return [asdict(book) for book in catalogue.books], list(catalogue.borrowing_history)
+
+
+def stored(storage):
+    books, history = [], []
+    for chunk_books, chunk_history in stream_books(storage, Book, LoadReport()):
+        books += [asdict(book) for book in chunk_books]
+        history += chunk_history
+    return books, history
+
+
+def test_other_sessions_receive_only_new_changes(storage):
+    feed = load_feed(storage)
+    first, second = FeedSubscriber(feed, "first"), FeedSubscriber(feed, "second")
+    entry = {'book_id': "1", 'borrower_name': "Ann", 'checkout_date': date(2024, 5, 1)}
+
+    first.commit(storage, "1", replace(first.catalogue.get("1"), is_borrowed=True, borrower_name="Ann"), entry)
+    first.commit(storage, "2")
+
+    assert second.catalogue.get("1").is_borrowed is False
+    assert second.sync() == ["1", "2"]
+    assert second.catalogue.get("1").is_borrowed is True and "2" not in second.catalogue
+    assert second.sync() == []
+    # The committing session doesn't apply its own history twice
+    assert first.sync() == []
+    assert list(first.catalogue.borrowing_history) == [entry]
+    assert snapshot(first.catalogue) == snapshot(second.catalogue)
+
+
+def test_failed_write_is_not_published(storage):
+    class BrokenStorage:
+        def put_book(self, book):
+            raise OSError("read-only")
+
+    feed = load_feed(storage)
+    first, second = FeedSubscriber(feed, "first"), FeedSubscriber(feed, "second")
+    with pytest.raises(OSError):
+        first.commit(BrokenStorage(), "new", make_book("new"))
+
+    assert "new" in first.catalogue
+    assert feed.version == 0 and second.sync() == []
+    assert "new" not in second.catalogue
+
+
+def test_sessions_reattach_after_a_rebase(storage):
+    feed = load_feed(storage, rebase_every=10 ** 6)
+    first, second = FeedSubscriber(feed, "first"), FeedSubscriber(feed, "second")
+    first.commit(storage, "new", make_book("new"))
+    old_base = feed.base
+
+    feed.rebase()
+
+    assert feed.base is not old_base and "new" in feed.base
+    assert feed.since(old_base, 0) is None
+    assert second.sync() is None
+    assert "new" in second.catalogue and not second.catalogue.own
+    assert snapshot(second.catalogue) == stored(storage)
+
+
+def test_concurrent_commits_and_rebases_match_storage(storage):
+    feed = load_feed(storage, rebase_every=25)
+    subscribers = [FeedSubscriber(feed, f"session{n}") for n in range(6)]
+    errors = []
+
+    def work(subscriber, seed):
+        rng = random.Random(seed)
+        try:
+            for step in range(60):
+                subscriber.sync()
+                book_id = f"{rng.randrange(15)}"
+                book = subscriber.catalogue.get(book_id)
+                if book is not None and rng.random() < 0.2:
+                    subscriber.commit(storage, book_id)
+                elif book is not None:
+                    borrowed = not book.is_borrowed
+                    entry = {'book_id': book_id, 'borrower_name': subscriber.source, 'action': step}
+                    subscriber.commit(storage, book_id, replace(book, is_borrowed=borrowed), entry)
+                else:
+                    subscriber.commit(storage, book_id, make_book(book_id))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(subscriber, n)) for n, subscriber in enumerate(subscribers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if feed._rebaser:
+        feed._rebaser.join()
+
+    assert not errors
+    assert feed.base_version > 0
+    expected_books, expected_history = stored(storage)
+    for subscriber in subscribers + [FeedSubscriber(feed, "late")]:
+        subscriber.sync()
+        books, history = snapshot(subscriber.catalogue)
+        assert sorted(books, key=lambda book: book['id']) == sorted(expected_books, key=lambda book: book['id'])
+        assert (sorted(history, key=lambda entry: (entry['borrower_name'], entry['action']))
+                == sorted(expected_history, key=lambda entry: (entry['borrower_name'], entry['action'])))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for streamed snapshot parsing and validated, chunked loading
+"""
+
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional
+
+from json_stream import iter_array_items
+from library_loader import LoadReport, book_from_record, stream_books
+from library_storage import JsonStorage
+from shared_catalogue import BaseCatalogue
+
+
+@dataclass
+class Book:
+    id: str
+    title: str
+    author: str
+    genre: str
+    year: int
+    isbn: str
+    tags: List[str] = field(default_factory=list)
+    is_borrowed: bool = False
+    borrower_name: str = ""
+    due_date: Optional[date] = None
+    summary: str = ""
+
+
+def make_record(book_id, **fields):
+    record = {'id': book_id, 'title': f"Book {book_id}", 'author': "Author", 'genre': "Fiction",
+              'year': 2000, 'isbn': "", 'tags': ["classic"]}
+    record.update(fields)
+    return record
+
+
+def test_iter_array_items_across_small_blocks():
+    data = {'books': [make_record("1", title="Zoë \"quoted\" [x]"), make_record("2")],
+            'meta': {'version': 1},
+            'borrowing_history': [{'book_id': "1"}, 7]}
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+
+    items = list(iter_array_items(io.StringIO(text), block_size=3))
+
+    assert [section for section, _ in items] == ['books', 'books', 'borrowing_history', 'borrowing_history']
+    assert items[0][1]['title'] == "Zoë \"quoted\" [x]"
+    assert items[3][1] == 7
+
+
+def test_invalid_records_are_reported_in_one_batch(tmp_path):
+    storage = JsonStorage(str(tmp_path / "library.json"))
+    storage.save_all([make_record("1"), make_record("2", title=None), make_record("3", tags="classic"),
+                      make_record("1", title="Duplicate"), make_record("4", extra="ignored")],
+                     [{'book_id': "1"}])
+    report = LoadReport()
+
+    chunks = list(stream_books(storage, Book, report, chunk_size=2))
+
+    assert [book.id for books, _ in chunks for book in books] == ["1", "4"]
+    assert report.books == 2 and report.history == 1
+    assert len(report.errors) == 3
+    assert "missing title" in report.errors[0]
+    assert "tags" in report.errors[1]
+    assert "duplicate id '1'" in report.errors[2]
+    assert report.summary(limit=1).endswith("... and 2 more")
+
+
+def test_year_and_is_borrowed_are_coerced_or_rejected():
+    book, error = book_from_record(Book, make_record("1", year="1999", is_borrowed="true"))
+    assert error is None and book.year == 1999 and book.is_borrowed is True
+
+    for fields in ({'year': "unknown"}, {'year': 19.5}, {'is_borrowed': "yes"}, {'is_borrowed': 2}):
+        book, error = book_from_record(Book, make_record("1", **fields))
+        assert book is None and error.startswith(next(iter(fields)))
+
+
+def test_badly_typed_record_does_not_stop_the_catalogue_loading(tmp_path):
+    storage = JsonStorage(str(tmp_path / "library.json"))
+    storage.save_all([make_record("1"), make_record("2", year="unknown"), make_record("3", year="1850")], [])
+
+    base = BaseCatalogue.load(storage, Book)
+
+    assert [book.id for book in base.books] == ["1", "3"]
+    assert len(base.load_report.errors) == 1 and "year" in base.load_report.errors[0]
+    assert base.frame.decade_counts().to_dict() == {1850: 1, 2000: 1}
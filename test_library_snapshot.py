@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped binary catalogue snapshot
+"""
+
+import os
+
+from library_snapshot import MappedSnapshot, snapshot_file, write_snapshot
+from library_storage import JsonStorage
+
+BOOKS = [
+    {'id': "b", 'title': "Zoë's Book", 'author': "Author", 'genre': "Fiction", 'year': 1999,
+     'isbn': "", 'tags': ["classic", "long read"], 'is_borrowed': True, 'borrower_name': "Ann",
+     'due_date': "2024-05-01", 'summary': "", 'cover_url': "https://example.com/b.jpg"},
+    {'id': "a", 'title': "Untagged", 'author': "Author", 'genre': "History", 'year': -300,
+     'isbn': None, 'tags': [], 'is_borrowed': False, 'due_date': None, 'rating': 4.5},
+    # Values that don't fit the fixed layout go through the "extra" field
+    {'id': "c", 'title': "Odd", 'author': "A", 'genre': "Fiction", 'year': "unknown",
+     'isbn': 12345, 'tags': ["", "x"], 'is_borrowed': 1},
+]
+HISTORY = [{'book_id': "b", 'borrower_name': "Ann", 'checkout_date': "2024-04-17"}]
+
+
+def write(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    with open(data_file, 'w') as f:
+        f.write("{}")
+    write_snapshot(snapshot_file(data_file), BOOKS, HISTORY, data_file)
+    return data_file
+
+
+def test_records_round_trip_exactly(tmp_path):
+    data_file = write(tmp_path)
+    with MappedSnapshot(snapshot_file(data_file)) as snapshot:
+        assert list(snapshot) == BOOKS
+        assert list(snapshot.history()) == HISTORY
+        assert snapshot[1] == BOOKS[1]
+
+
+def test_lookup_by_id_and_single_field(tmp_path):
+    data_file = write(tmp_path)
+    with MappedSnapshot(snapshot_file(data_file)) as snapshot:
+        assert snapshot.get("c") == BOOKS[2]
+        assert snapshot.get("a") == BOOKS[1]
+        assert snapshot.get("missing") is None
+        assert snapshot.field(0, 'tags') == ["classic", "long read"]
+        assert snapshot.field(2, 'year') == "unknown"
+
+
+def test_stale_snapshot_is_not_used(tmp_path):
+    data_file = write(tmp_path)
+    assert MappedSnapshot.open_fresh(data_file) is not None
+    with open(data_file, 'w') as f:
+        f.write('{"books": []}')
+    assert MappedSnapshot.open_fresh(data_file) is None
+
+
+def test_storage_loads_the_same_data_from_either_snapshot(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    storage = JsonStorage(data_file, binary_snapshot=True)
+    storage.save_all(BOOKS[:2], HISTORY)
+    assert os.path.exists(snapshot_file(data_file))
+
+    assert storage.load() == JsonStorage(data_file).load()
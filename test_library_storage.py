@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for the JSON journal and SQLite storage engines
+"""
+
+import json
+import os
+from datetime import date
+
+import pytest
+
+import library_storage
+from library_storage import JsonStorage, LibraryStorage, SqliteStorage, new_book_id
+
+
+def make_book(book_id, **fields):
+    book = {'id': book_id, 'title': f"Book {book_id}", 'author': "Author", 'genre': "Fiction",
+            'year': 2000, 'isbn': "", 'tags': [], 'is_borrowed': False, 'borrower_name': "",
+            'due_date': None, 'summary': ""}
+    book.update(fields)
+    return book
+
+
+def wait_for_compaction(storage):
+    compactor = library_storage._compactors.get(os.path.abspath(storage.data_file))
+    if compactor:
+        compactor.join(timeout=10)
+
+
+def test_incomplete_engine_fails_on_instantiation():
+    class Incomplete(LibraryStorage):
+        def load_chunks(self, chunk_size=1000):
+            return iter(())
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_new_book_ids_do_not_repeat():
+    ids = {new_book_id() for _ in range(10000)}
+    assert len(ids) == 10000
+
+
+def test_journal_replays_over_snapshot(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    storage = JsonStorage(data_file, compact_every=1000)
+    storage.save_all([make_book("1"), make_book("2"), make_book("3")], [])
+
+    storage.put_book(make_book("2", title="Edited"))
+    storage.delete_book("3")
+    storage.put_book(make_book("4"))
+    storage.append_history({'book_id': "1", 'borrower_name': "Ann", 'checkout_date': date(2024, 5, 1)})
+
+    # Nothing was written to the snapshot itself
+    with open(data_file) as f:
+        assert [book['id'] for book in json.load(f)['books']] == ["1", "2", "3"]
+
+    data = JsonStorage(data_file).load()
+    assert [book['id'] for book in data['books']] == ["1", "2", "4"]
+    assert data['books'][1]['title'] == "Edited"
+    assert data['borrowing_history'][0]['checkout_date'] == date(2024, 5, 1)
+
+
+def test_torn_journal_tail_is_ignored(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    storage = JsonStorage(data_file, compact_every=1000)
+    storage.put_book(make_book("1"))
+    with open(storage.journal_file, 'a') as f:
+        f.write('{"op": "put", "book": {"id": "2"')
+
+    assert [book['id'] for book in storage.load()['books']] == ["1"]
+
+
+def test_compact_folds_journal_into_snapshot(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    storage = JsonStorage(data_file, compact_every=1000)
+    storage.save_all([make_book("1"), make_book("2")], [])
+    storage.delete_book("1")
+    storage.put_book(make_book("3"))
+    before = storage.load()
+
+    storage.compact()
+
+    assert not os.path.exists(storage.journal_file)
+    assert storage.load() == before
+    with open(data_file) as f:
+        assert [book['id'] for book in json.load(f)['books']] == ["2", "3"]
+
+
+def test_compaction_counts_appends_from_every_instance(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    JsonStorage(data_file).save_all([make_book("1")], [])
+
+    # One storage per session: no single instance reaches the threshold
+    for i in range(6):
+        storage = JsonStorage(data_file, compact_every=5)
+        storage.put_book(make_book(f"s{i}"))
+    wait_for_compaction(storage)
+
+    with open(data_file) as f:
+        assert len(json.load(f)['books']) >= 5
+    assert len(storage.load()['books']) == 7
+
+
+def test_compaction_counts_journal_left_by_earlier_process(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    with open(f"{data_file}.journal", 'w') as f:
+        for i in range(4):
+            f.write(json.dumps({'op': 'put', 'book': make_book(str(i))}) + '\n')
+
+    storage = JsonStorage(data_file, compact_every=5)
+    storage.put_book(make_book("4"))
+    wait_for_compaction(storage)
+
+    assert not os.path.exists(storage.journal_file)
+    with open(data_file) as f:
+        assert len(json.load(f)['books']) == 5
+
+
+def test_sqlite_imports_json_once(tmp_path):
+    data_file = str(tmp_path / "library.json")
+    db_file = str(tmp_path / "library.db")
+    JsonStorage(data_file).save_all([make_book("1"), make_book("2")], [])
+
+    storage = SqliteStorage(db_file, import_from=data_file)
+    assert [book['id'] for book in storage.load()['books']] == ["1", "2"]
+
+    # Deleting every book must not bring the stale JSON catalogue back
+    storage.delete_book("1")
+    storage.delete_book("2")
+    storage._conn.close()
+    assert SqliteStorage(db_file, import_from=data_file).load()['books'] == []
+
+
+def test_sqlite_indexed_queries(tmp_path):
+    storage = SqliteStorage(str(tmp_path / "library.db"), import_from=None)
+    storage.put_books([make_book("1", genre="Fantasy"),
+                       make_book("2", is_borrowed=True, due_date=date(2024, 1, 10)),
+                       make_book("3", is_borrowed=True, due_date=date(2024, 3, 1))])
+    storage.put_book(make_book("1", genre="Mystery"))
+
+    assert storage.get_book("2")['due_date'] == date(2024, 1, 10)
+    assert [book['id'] for book in storage.find_books(genre="Mystery")] == ["1"]
+    assert [book['id'] for book in storage.find_books(due_before=date(2024, 2, 1))] == ["2"]
+
+
+@pytest.mark.parametrize('binary_snapshot', [False, True])
+def test_compaction_during_a_streamed_load_applies_the_journal_once(tmp_path, binary_snapshot):
+    data_file = str(tmp_path / "library.json")
+    storage = JsonStorage(data_file, compact_every=1000, binary_snapshot=binary_snapshot)
+    storage.save_all([make_book("1"), make_book("2")], [])
+    storage.append_history({'book_id': "1", 'borrower_name': "Ann", 'checkout_date': date(2024, 5, 1)})
+    storage.delete_book("2")
+    storage.put_book(make_book("3"))
+    expected = storage.load()
+
+    chunks = storage.load_chunks(chunk_size=1)
+    storage.compact()
+    data = {'books': [], 'borrowing_history': []}
+    for chunk in chunks:
+        data['books'].extend(chunk['books'])
+        data['borrowing_history'].extend(chunk['borrowing_history'])
+
+    assert data == expected
+    assert len(data['borrowing_history']) == 1
+    assert storage.load() == expected
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the full-text and trigram search indexes
+"""
+
+from dataclasses import dataclass, field
+from typing import List
+
+from search_index import SearchIndex, TrigramIndex
+
+
+@dataclass
+class Book:
+    id: str
+    title: str
+    author: str = "Author"
+    genre: str = "Fiction"
+    tags: List[str] = field(default_factory=list)
+    summary: str = ""
+
+
+def test_short_prefix_matches_every_term():
+    books = [Book(f"{i:03d}", f"ha{i:03d}x") for i in range(100)] + [Book("hp", "Harry Potter")]
+    index = SearchIndex()
+    index.rebuild(books)
+
+    results = index.search("ha")
+
+    assert len(results) == 101
+    assert "hp" in results
+
+
+def test_whole_word_outranks_prefix_and_all_terms_must_match():
+    index = SearchIndex()
+    index.rebuild([Book("1", "Dune Messiah"), Book("2", "Dunes of Mars"), Book("3", "Dune", genre="Sci-Fi")])
+
+    assert index.search("dune") == ["1", "3", "2"]
+    assert index.search("dune mars") == ["2"]
+    index.remove("2")
+    assert index.search("mars") == []
+
+
+def test_fuzzy_search_tolerates_typos():
+    index = TrigramIndex()
+    index.rebuild([Book("1", "The Hobbit", "J.R.R. Tolkien"), Book("2", "Emma", "Jane Austen")])
+
+    assert [book_id for book_id, _ in index.search("tolkein")] == ["1"]
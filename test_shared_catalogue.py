@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests that a session overlay answers like a catalogue rebuilt from scratch
+"""
+
+import random
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from typing import List, Optional
+
+from change_feed import ChangeFeed, FeedSubscriber
+from library_storage import JsonStorage
+from recommendations import SimilarBooksTable, SimilarityModel
+from shared_catalogue import BaseCatalogue, CatalogueOverlay
+
+TODAY = date(2024, 6, 1)
+GENRES = ["Fiction", "Mystery", "Fantasy", "History"]
+WORDS = ["dragon", "murder", "garden", "river", "empire", "secret", "winter", "storm"]
+
+
+@dataclass
+class Book:
+    id: str
+    title: str
+    author: str
+    genre: str
+    year: int
+    isbn: str
+    tags: List[str] = field(default_factory=list)
+    is_borrowed: bool = False
+    borrower_name: str = ""
+    due_date: Optional[date] = None
+    summary: str = ""
+
+
+def random_book(rng, book_id):
+    borrowed = rng.random() < 0.4
+    return Book(book_id, f"The {rng.choice(WORDS)} {rng.choice(WORDS)}", f"Author {rng.randrange(8)}",
+                rng.choice(GENRES), rng.randrange(1900, 2024), "", rng.sample(WORDS, 2),
+                is_borrowed=borrowed, borrower_name=f"Reader {rng.randrange(5)}" if borrowed else "",
+                due_date=TODAY + timedelta(days=rng.randrange(-20, 20)) if borrowed else None)
+
+
+def all_pages(catalogue, status, genre):
+    books, after = [], -1
+    while True:
+        page, total = catalogue.page(status, genre, TODAY, after=after, limit=7)
+        if not page:
+            return [book.id for book in books], total
+        books += page
+        after = catalogue.position(page[-1].id)
+
+
+def assert_same_answers(overlay, reference):
+    assert [book.id for book in overlay.books] == [book.id for book in reference.books]
+    assert overlay.stats(TODAY) == reference.stats(TODAY)
+    assert sorted(overlay.genres()) == sorted(reference.genres())
+    assert overlay.overdue_ids(TODAY) == reference.overdue_ids(TODAY)
+    assert overlay.due_within(TODAY, 7) == reference.due_within(TODAY, 7)
+    for status in ("All", "Available", "Borrowed", "Overdue"):
+        for genre in ["All"] + GENRES:
+            assert ([book.id for book in overlay.filter(status, genre, TODAY)]
+                    == [book.id for book in reference.filter(status, genre, TODAY)])
+            assert all_pages(overlay, status, genre) == all_pages(reference, status, genre)
+    for query in WORDS[:4] + ["author 3", "garden storm"]:
+        assert overlay.search(query) == reference.search(query)
+        assert (sorted(overlay.fuzzy_search(query[:-1], 1000))
+                == sorted(reference.fuzzy_search(query[:-1], 1000)))
+    for name in ("genre_counts", "decade_counts", "month_counts", "borrower_counts"):
+        assert (getattr(overlay.frame, name)().sort_index().to_dict()
+                == getattr(reference.frame, name)().sort_index().to_dict())
+    assert list(overlay.borrowing_history) == list(reference.borrowing_history)
+
+
+def test_overlay_matches_a_full_rebuild():
+    rng = random.Random(7)
+    books = [random_book(rng, f"b{i}") for i in range(60)]
+    history = [{'book_id': "b0", 'borrower_name': "Reader 0", 'checkout_date': TODAY}]
+    base = BaseCatalogue(books, history)
+    overlay = CatalogueOverlay(base)
+    expected = {book.id: book for book in books}
+    expected_history = list(history)
+
+    for step in range(200):
+        action = rng.random()
+        if action < 0.4 and expected:
+            book_id = rng.choice(list(expected))
+            edited = random_book(rng, book_id)
+            overlay.put(edited)
+            expected[book_id] = edited
+        elif action < 0.6 and expected:
+            book_id = rng.choice(list(expected))
+            overlay.delete(book_id)
+            del expected[book_id]
+        elif action < 0.8:
+            book = random_book(rng, f"new{step}")
+            overlay.put(book)
+            expected[book.id] = book
+        else:
+            entry = {'book_id': rng.choice(list(expected) or ["b0"]), 'borrower_name': f"Reader {step % 4}",
+                     'checkout_date': TODAY - timedelta(days=step)}
+            overlay.append_history(entry)
+            expected_history.append(entry)
+
+        if step % 25 == 0:
+            assert_same_answers(overlay, CatalogueOverlay(BaseCatalogue(expected.values(), expected_history)))
+
+    assert_same_answers(overlay, CatalogueOverlay(BaseCatalogue(expected.values(), expected_history)))
+
+
+def test_sessions_do_not_see_each_others_uncommitted_changes():
+    base = BaseCatalogue([random_book(random.Random(1), "b1")])
+    first, second = CatalogueOverlay(base), CatalogueOverlay(base)
+    first.put(replace(base.books[0], title="Changed"))
+    first.put(random_book(random.Random(2), "b2"))
+
+    assert second.get("b1").title != "Changed"
+    assert "b2" not in second and len(second) == 1
+    assert base.books[0].title != "Changed"
+
+
+def test_similar_books_follow_committed_changes(tmp_path):
+    books = [Book("a", "Dragon", "X", "Fantasy", 1990, "", ["dragon"]),
+             Book("b", "Storm", "Y", "Mystery", 1950, "", ["storm"]),
+             Book("c", "River", "Z", "History", 1800, "", ["river"])]
+    feed = ChangeFeed(BaseCatalogue(books), rebase_every=10 ** 6)
+    model = SimilarityModel()
+    model.rebuild(feed.base.books)
+    table = SimilarBooksTable(model, str(tmp_path / "similar.json"), top_n=3)
+    table.rebuild()
+    table.follow(feed)
+    storage = JsonStorage(str(tmp_path / "library.json"))
+    session = FeedSubscriber(feed, "session")
+
+    session.commit(storage, "d", Book("d", "Dragon II", "X", "Fantasy", 1992, "", ["dragon"]))
+    table.sync()
+    assert table.get("a", 1)[0][0] == "d"
+    assert table.get("d", 1)[0][0] == "a"
+
+    session.commit(storage, "d")
+    table.sync()
+    assert "d" not in table.similar
+    assert all(other != "d" for neighbours in table.similar.values() for other, _ in neighbours)
+
+    # A rebase the table missed rebuilds it from the new base
+    session.commit(storage, "e", Book("e", "Storm Front", "Y", "Mystery", 1951, "", ["storm"]))
+    feed.rebase()
+    table.sync()
+    assert table.get("b", 1)[0][0] == "e"
+    assert set(table.model.rows) == {"a", "b", "c", "e"}
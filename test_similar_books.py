@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the similarity model and the stored similar-books table
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import List
+
+from recommendations import SimilarBooksTable, SimilarityModel
+
+
+@dataclass
+class Book:
+    id: str
+    title: str
+    author: str
+    genre: str
+    year: int
+    tags: List[str] = field(default_factory=list)
+
+
+BOOKS = [Book("1", "A", "Author A", "Fantasy", 1990, ["dragon"]),
+         Book("2", "B", "Author B", "Mystery", 1950, ["storm"]),
+         Book("3", "C", "Author C", "Fantasy", 1991, ["dragon"]),
+         Book("4", "D", "Author D", "Fantasy", 1992, ["dragon"]),
+         Book("5", "E", "Author E", "History", 1800, ["river"]),
+         Book("6", "F", "Author F", "Poetry", 1700, ["verse"])]
+
+
+def build_table(books, table_file, load=True):
+    model = SimilarityModel()
+    model.rebuild(books)
+    table = SimilarBooksTable(model, table_file, top_n=3)
+    if load:
+        table.load()
+    return table
+
+
+def neighbour_ids(similar):
+    return {book_id: [other for other, _ in neighbours] for book_id, neighbours in similar.items()}
+
+
+def fresh_rows(books, table_file):
+    table = build_table(books, table_file, load=False)
+    table.rebuild()
+    return neighbour_ids(table.similar)
+
+
+def test_refresh_matches_a_rebuild(tmp_path):
+    table = build_table(BOOKS, str(tmp_path / "similar.json"))
+    edited = replace(BOOKS[0], genre="Mystery", tags=["storm"])
+    table.model.add(edited)
+    table.model.remove("5")
+    table.refresh(["1", "5"])
+
+    assert neighbour_ids(table.similar) == fresh_rows([edited] + BOOKS[1:4] + BOOKS[5:], str(tmp_path / "fresh.json"))
+
+
+def test_stored_rows_of_books_changed_since_are_recomputed(tmp_path):
+    table_file = str(tmp_path / "similar.json")
+    # The previous process saved rows for an edited version of book 1...
+    edited = [replace(BOOKS[0], genre="Mystery", tags=["storm"])] + BOOKS[1:]
+    build_table(edited, table_file).save()
+
+    # ...and this one starts from the original catalogue again
+    table = build_table(BOOKS, table_file)
+
+    assert neighbour_ids(table.similar) == fresh_rows(BOOKS, str(tmp_path / "fresh.json"))
+    assert [other for other, _ in table.get("1", 2)] == ["3", "4"]
+
+
+def test_unchanged_catalogue_reuses_stored_rows(tmp_path):
+    table_file = str(tmp_path / "similar.json")
+    build_table(BOOKS, table_file).save()
+
+    table = build_table(BOOKS, table_file)
+    table.model.similar_batch = None  # any recomputation would fail
+
+    table.load()
+    assert neighbour_ids(table.similar) == fresh_rows(BOOKS, str(tmp_path / "fresh.json"))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Tests for LRU size eviction in the Gemini and HTTP response caches
+"""
+
+import time
+
+from ai_cache import ResponseCache
+from http_cache import HttpCache
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=25)
+    cache.put("model", "first", "x" * 10)
+    time.sleep(0.01)
+    cache.put("model", "second", "y" * 10)
+    time.sleep(0.01)
+    assert cache.get("model", "first") == "x" * 10  # now more recent than "second"
+    time.sleep(0.01)
+    cache.put("model", "third", "z" * 10)
+
+    assert cache.get("model", "first") == "x" * 10
+    assert cache.get("model", "second") is None
+    assert cache.get("model", "third") == "z" * 10
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=25)
+    for n, url in enumerate(["a", "b", "c"]):
+        cache._store(cache.make_key(url), url, '"' + str(n) * 8 + '"', None, None, time.time())
+        time.sleep(0.01)
+
+    assert cache._lookup(cache.make_key("a")) is None
+    assert cache._lookup(cache.make_key("b")) is not None
+    assert cache._lookup(cache.make_key("c")) is not None
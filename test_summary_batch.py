@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for batched summary generation and its response caching
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from ai_cache import ResponseCache
+from summary_batch import BatchSummarizer
+
+BOOKS = [SimpleNamespace(id=str(i), title=f"Book {i}", author="Author", genre="Fiction", year=2000)
+         for i in range(3)]
+
+
+def cached_generate(cache, responses, calls):
+    """A ``generate`` like the app's: model calls served through ``cache``"""
+    def model(prompt):
+        calls.append(prompt)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    def generate(prompt, validate=None):
+        return cache.get_or_generate("test-model", prompt, model, validate)
+    return generate
+
+
+def summaries_json(books):
+    return json.dumps([{'id': book.id, 'summary': f"About {book.title}"} for book in books])
+
+
+def test_retry_after_unparseable_response_calls_the_model_again(tmp_path):
+    calls = []
+    generate = cached_generate(ResponseCache(str(tmp_path)), ["Sorry, I can't help", summaries_json(BOOKS)], calls)
+    summarizer = BatchSummarizer(generate, batch_size=3, requests_per_minute=6000, max_retries=1)
+
+    (batch, summaries, error), = summarizer.run(BOOKS)
+
+    assert error is None
+    assert len(calls) == 2
+    assert summaries == {book.id: f"About {book.title}" for book in BOOKS}
+
+
+def test_bad_response_is_not_cached_for_a_rerun(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    calls = []
+    summarizer = BatchSummarizer(cached_generate(cache, ["[]"], calls), batch_size=3,
+                                 requests_per_minute=6000, max_retries=0)
+    (_, summaries, error), = summarizer.run(BOOKS)
+    assert summaries == {} and isinstance(error, ValueError)
+
+    # Re-running the backfill asks the model again instead of replaying "[]"
+    calls = []
+    summarizer = BatchSummarizer(cached_generate(cache, [summaries_json(BOOKS)], calls), batch_size=3,
+                                 requests_per_minute=6000, max_retries=0)
+    (_, summaries, error), = summarizer.run(BOOKS)
+    assert error is None and len(calls) == 1 and len(summaries) == 3
+
+
+def test_good_response_is_cached(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    calls = []
+    for _ in range(2):
+        summarizer = BatchSummarizer(cached_generate(cache, [summaries_json(BOOKS)], calls), batch_size=3,
+                                     requests_per_minute=6000)
+        list(summarizer.run(BOOKS))
+    assert len(calls) == 1
+
+
+def test_parse_response_ignores_unrequested_ids():
+    text = "Here you go:\n" + json.dumps([{'id': "0", 'summary': "A"}, {'id': "99", 'summary': "B"}])
+    assert BatchSummarizer.parse_response(text, BOOKS) == {"0": "A"}
+    with pytest.raises(ValueError):
+        BatchSummarizer.parse_response("no array here", BOOKS)